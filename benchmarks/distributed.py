@@ -0,0 +1,102 @@
+"""
+Throughput benchmark of the distributed crawl mode on a synthetic site.
+
+Runs a Coordinator on a Unix socket and N DistributedWorker processes on this machine,
+for each number of workers, and reports the throughput. Responses are delayed to
+simulate the network, each worker process keeps a fixed number of fetches in flight.
+
+    python -m benchmarks.distributed --pages 2000 --workers 1 2 4 8
+"""
+
+import asyncio
+import time
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+from benchmarks.synthetic_site import SyntheticSite
+from web_crawler.coordinator import Coordinator
+from web_crawler.distributed_worker import DistributedWorker
+from web_crawler.storage_client import StorageClient
+
+
+def run_worker(
+    address: str, worker_id: str, site: SyntheticSite, concurrency: int, output_dir: str
+):
+    logging.basicConfig(level=logging.CRITICAL)
+
+    async def crawl():
+        worker = await DistributedWorker.connect(
+            address,
+            worker_id,
+            network_client=site.network_client(),
+            storage_client=StorageClient(
+                output_file_path=Path(output_dir),
+                output_file_name=f"storage.{worker_id}.json",
+            ),
+            num_workers=concurrency,
+        )
+        await worker.crawl_with_workers()
+
+    asyncio.run(crawl())
+
+
+async def crawl(site: SyntheticSite, workers: int, concurrency: int, output_dir: str):
+    address = f"unix:{output_dir}/coordinator.sock"
+    coordinator = Coordinator(site.start_url, lease_timeout=10)
+    server = asyncio.create_task(coordinator.serve(address))
+    await asyncio.sleep(0.1)
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(
+            target=run_worker,
+            args=(address, f"worker{i}", site, concurrency, output_dir),
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # Processes take a while to start, the clock starts with the first lease
+    while coordinator.completed == 0 and not server.done():
+        await asyncio.sleep(0.01)
+    start_time = time.perf_counter()
+    await server
+    elapsed = time.perf_counter() - start_time
+    for process in processes:
+        process.join()
+    return coordinator.completed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=64)
+    parser.add_argument("--fan-out", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    site = SyntheticSite(
+        pages=args.pages, hosts=args.hosts, fan_out=args.fan_out, latency=args.latency
+    )
+    baseline = None
+    print(f"{'workers':>7} {'pages':>7} {'seconds':>8} {'pages/s':>8} {'speedup':>7}")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as output_dir:
+            pages, elapsed = asyncio.run(
+                crawl(site, workers, args.concurrency, output_dir)
+            )
+        throughput = pages / elapsed
+        baseline = baseline or throughput
+        print(
+            f"{workers:>7} {pages:>7} {elapsed:>8.2f} {throughput:>8.0f} {throughput / baseline:>6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+End-to-end throughput benchmark of the crawler on a synthetic site.
+
+Crawls the same synthetic site with a WebCrawler for each number of workers, served
+in-process through httpx.MockTransport or, with --server, from a local HTTP server. It
+reports the throughput, the CPU time per page, the peak RSS and the p99 fetch latency
+of each crawl. Each crawl runs in its own process, so the peak RSS is its own.
+
+    python -m benchmarks.end_to_end --pages 2000 --workers 1 4 16 64 --latency 0.01
+    python -m benchmarks.end_to_end --pages 2000 --page-size 50000 --rate-limit-ratio 0.05 --server
+"""
+
+import asyncio
+import time
+import logging
+import argparse
+import resource
+import tempfile
+import statistics
+import multiprocessing
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.synthetic_site import SyntheticSite, SyntheticSiteServer
+from web_crawler.network_client import FetchResult, NetworkClient
+from web_crawler.storage_client import StorageClient
+from web_crawler.web_crawler import WebCrawler
+
+
+class TimedNetworkClient(NetworkClient):
+    """
+    NetworkClient recording the latency of each fetch, redirects included.
+    """
+
+    def __init__(self, network_client: NetworkClient):
+        super().__init__(
+            client=network_client.client, max_redirects=network_client.max_redirects
+        )
+        self.latencies: List[float] = []
+
+    async def fetch(self, url: str, *args, **kwargs) -> FetchResult:
+        start_time = time.perf_counter()
+        try:
+            return await super().fetch(url, *args, **kwargs)
+        finally:
+            self.latencies.append(time.perf_counter() - start_time)
+
+
+async def crawl(site: SyntheticSite, workers: int, server: bool) -> Dict:
+    logging.basicConfig(level=logging.CRITICAL)
+    site_server = SyntheticSiteServer(site) if server else None
+    if site_server is not None:
+        await site_server.start()
+    network_client = TimedNetworkClient(
+        site_server.network_client() if site_server else site.network_client()
+    )
+    with tempfile.TemporaryDirectory() as output_dir:
+        storage_client = StorageClient(output_file_path=Path(output_dir))
+        crawler = WebCrawler(
+            site.start_url,
+            network_client=network_client,
+            storage_client=storage_client,
+            num_workers=workers,
+            backoff=0,
+        )
+        start_time = time.perf_counter()
+        start_cpu = time.process_time()
+        await crawler.crawl_with_workers()
+        elapsed = time.perf_counter() - start_time
+        cpu = time.process_time() - start_cpu
+        pages = len(storage_client.get_all())
+    await network_client.client.aclose()
+    if site_server is not None:
+        await site_server.close()
+    latencies = network_client.latencies
+    return {
+        "workers": workers,
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed,
+        "cpu_ms_per_page": 1000 * cpu / max(pages, 1),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p99_fetch_ms": (
+            1000 * statistics.quantiles(latencies, n=100)[98]
+            if len(latencies) > 1
+            else 0.0
+        ),
+    }
+
+
+def run(site: SyntheticSite, workers: int, server: bool) -> Dict:
+    return asyncio.run(crawl(site, workers, server))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=16)
+    parser.add_argument("--fan-out", type=int, default=20)
+    parser.add_argument("--page-size", type=int, default=0)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument(
+        "--server",
+        action="store_true",
+        help="Serve the site from a local HTTP server instead of in-process",
+    )
+    args = parser.parse_args()
+
+    site = SyntheticSite(
+        pages=args.pages,
+        hosts=args.hosts,
+        fan_out=args.fan_out,
+        latency=args.latency,
+        page_size=args.page_size,
+        duplicate_ratio=args.duplicate_ratio,
+        rate_limit_ratio=args.rate_limit_ratio,
+        scheme="http" if args.server else "https",
+    )
+    print(
+        f"{'workers':>7} {'pages':>7} {'seconds':>8} {'pages/s':>8} {'cpu ms/page':>11} {'peak rss MB':>11} {'p99 fetch ms':>12}"
+    )
+    # A fresh process per crawl, so the peak RSS of a crawl does not carry over to the next one
+    context = multiprocessing.get_context("spawn")
+    for workers in args.workers:
+        with context.Pool(1) as pool:
+            result = pool.apply(run, (site, workers, args.server))
+        print(
+            f"{result['workers']:>7} {result['pages']:>7} {result['seconds']:>8.2f} {result['pages_per_second']:>8.0f} {result['cpu_ms_per_page']:>11.2f} {result['peak_rss_mb']:>11.1f} {result['p99_fetch_ms']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Memory benchmark of the crawl frontier entries.
+
+Queues N URLs spread over a number of hosts in a Frontier, and reports the memory
+allocated per queued URL, the URL strings themselves excluded. The same URLs are also
+queued in the previous layout of the frontier (a dataclass with a __dict__ per URL,
+wrapped in a [priority, sequence, key, item] list per heap entry) for comparison.
+
+    python -m benchmarks.frontier_memory --urls 1000000 --hosts 1000
+"""
+
+import gc
+import heapq
+import argparse
+import itertools
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, List
+
+from web_crawler.frontier import Frontier
+from web_crawler.scoring import depth_score
+from web_crawler.url_container import URLContainer
+
+
+@dataclass
+class LegacyURLContainer:
+    _base_url: str
+    _tries: int = 0
+    depth: int = 0
+    parent: str | None = None
+
+
+def queue_compact(urls: List[str]):
+    frontier = Frontier(scorer=depth_score)
+    for url in urls:
+        frontier.put_nowait(URLContainer(url, depth=3))
+    return frontier
+
+
+def queue_legacy(urls: List[str]):
+    counter = itertools.count()
+    queues = {}
+    for url in urls:
+        host = url.split("/", 3)[2]
+        entries, positions = queues.setdefault(host, ([], {}))
+        item = LegacyURLContainer(url, depth=3)
+        positions[url] = len(entries)
+        heapq.heappush(entries, [depth_score(item), next(counter), url, item])
+    return queues
+
+
+def measure(queue: Callable[[List[str]], object], urls: List[str]) -> float:
+    gc.collect()
+    tracemalloc.start()
+    frontier = queue(urls)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del frontier
+    return allocated / len(urls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frontier memory benchmark")
+    parser.add_argument("--urls", type=int, default=1_000_000)
+    parser.add_argument("--hosts", type=int, default=1000)
+    args = parser.parse_args()
+
+    urls = [f"https://h{i % args.hosts}.example.com/page/{i}" for i in range(args.urls)]
+    print(f"Queueing {args.urls} URLs over {args.hosts} hosts")
+    for name, queue in (("legacy", queue_legacy), ("compact", queue_compact)):
+        print(f"{name:>8}: {measure(queue, urls):0.0f} bytes per URL")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Link graph load benchmark, JSON output of a crawl against its memory-mapped CSR export.
+
+Writes a random graph of --pages pages with --fan-out links each as a StorageClient JSON
+file, converts it with LinkGraph.from_storage, then times loading each of them and looking
+up the links of --lookups random pages. The file sizes are reported too.
+
+    python -m benchmarks.link_graph --pages 100000 --fan-out 20
+    python -m benchmarks.link_graph --pages 500000 --fan-out 20  # 10M links
+"""
+
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+from web_crawler.link_graph import FILES, LinkGraph
+from web_crawler.storage_client import StorageClient
+
+
+def page_url(page: int) -> str:
+    return f"https://host{page % 100}.example.com/page/{page}"
+
+
+def write_storage(directory: Path, pages: int, fan_out: int, seed: int) -> Path:
+    rng = random.Random(seed)
+    storage_client = StorageClient(output_file_path=directory)
+    for page in range(pages):
+        storage_client.add(
+            page_url(page),
+            {"links": [page_url(rng.randrange(pages)) for _ in range(fan_out)]},
+        )
+    storage_client.write_to_file()
+    return directory / storage_client.output_file_name
+
+
+def timed(function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100_000)
+    parser.add_argument("--fan-out", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as working_dir:
+        working_dir = Path(working_dir)
+        storage_path = write_storage(working_dir, args.pages, args.fan_out, args.seed)
+        graph_dir = working_dir / "graph"
+        (nodes, links), convert_time = timed(
+            LinkGraph.from_storage, storage_path, graph_dir
+        )
+        queries = [
+            page_url(page)
+            for page in random.Random(args.seed + 1).choices(
+                range(args.pages), k=args.lookups
+            )
+        ]
+
+        def load_json():
+            with open(storage_path, "r") as f:
+                return json.load(f)
+
+        storage, json_load_time = timed(load_json)
+        _, json_lookup_time = timed(
+            lambda: [len(storage[url]["links"]) for url in queries]
+        )
+        del storage
+
+        graph, csr_load_time = timed(LinkGraph, graph_dir)
+        _, csr_lookup_time = timed(
+            lambda: [len(graph.neighbors(graph.node(url))) for url in queries]
+        )
+        graph.close()
+
+        json_size = storage_path.stat().st_size
+        csr_size = sum((graph_dir / name).stat().st_size for name in FILES)
+
+    print(f"{nodes} nodes, {links} links, converted in {convert_time:.1f} s")
+    print(
+        f"{'format':>6} {'size MB':>8} {'load ms':>10} {'lookup us':>10}\n"
+        f"{'json':>6} {json_size / 1e6:>8.1f} {1000 * json_load_time:>10.1f} {1e6 * json_lookup_time / args.lookups:>10.2f}\n"
+        f"{'csr':>6} {csr_size / 1e6:>8.1f} {1000 * csr_load_time:>10.1f} {1e6 * csr_lookup_time / args.lookups:>10.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Logging overhead benchmark of a crawl on a synthetic site.
+
+Crawls the same synthetic site with logging off, with every INFO record written by a
+synchronous FileHandler from the event loop (the former setup of main.py), and with the
+records sampled per call site and written by a QueueListener thread (the current setup).
+Each crawl runs in its own process, with its own logging configuration.
+
+    python -m benchmarks.logging_overhead --pages 2000 --workers 16
+"""
+
+import atexit
+import asyncio
+import logging
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+from benchmarks.end_to_end import crawl
+from benchmarks.synthetic_site import SyntheticSite
+from web_crawler.log_sampler import LOG_FORMAT, LogSampler, configure_logging
+
+SETUPS = ("off", "sync", "queued")
+
+
+def run(site: SyntheticSite, workers: int, setup: str) -> dict:
+    with tempfile.TemporaryDirectory() as output_dir:
+        log_file = Path(output_dir) / "debug.log"
+        if setup == "off":
+            logging.basicConfig(level=logging.CRITICAL)
+        elif setup == "sync":
+            logging.basicConfig(
+                format=LOG_FORMAT,
+                level=logging.INFO,
+                handlers=[logging.FileHandler(log_file, mode="w")],
+            )
+        else:
+            listener = configure_logging(logging.INFO, log_file, sampler=LogSampler())
+            # Only the file is benchmarked, as for the other setups
+            listener.handlers = listener.handlers[1:]
+        result = asyncio.run(crawl(site, workers, server=False))
+        if setup == "queued":
+            listener.stop()
+            atexit.unregister(listener.stop)
+        result["log_bytes"] = log_file.stat().st_size if log_file.exists() else 0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--hosts", type=int, default=16)
+    parser.add_argument("--fan-out", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    site = SyntheticSite(pages=args.pages, hosts=args.hosts, fan_out=args.fan_out)
+    print(f"{'logging':>7} {'pages':>7} {'seconds':>8} {'pages/s':>8} {'log KB':>7}")
+    context = multiprocessing.get_context("spawn")
+    for setup in SETUPS:
+        with context.Pool(1) as pool:
+            result = pool.apply(run, (site, args.workers, setup))
+        print(
+            f"{setup:>7} {result['pages']:>7} {result['seconds']:>8.2f} {result['pages_per_second']:>8.0f} {result['log_bytes'] / 1e3:>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Microbenchmarks of the per-page hot path components.
+
+Times each component on its own, with fixtures shaped like real pages:
+- HTMLParser.extract_links on small, medium and huge pages
+- URLFilter.filter_links on mixed relative, absolute, foreign and non-http hrefs, per href
+- URLDeDuplicator.dedup_url against growing visited sets, on its own and the way the
+  crawler calls it, with a copy of the storage keys
+- StorageClient.add, contains and write_to_file at growing numbers of entries
+- Metric updates, as done for each page by the crawler
+
+Results are printed as JSON, in nanoseconds per operation, the best of --repeat runs.
+With --baseline, they are compared to a previous JSON output, and the run fails if any
+benchmark got slower by more than --threshold.
+
+    python -m benchmarks.microbench --output baseline.json
+    python -m benchmarks.microbench --baseline baseline.json --threshold 0.1
+"""
+
+import sys
+import json
+import logging
+import argparse
+import platform
+import itertools
+import tempfile
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Set, Tuple
+
+from bs4 import BeautifulSoup
+
+from web_crawler.html_parser import HTMLParser
+from web_crawler.metrics import CrawlMetrics
+from web_crawler.storage_client import StorageClient
+from web_crawler.url_deduplicator import URLDeDuplicator
+from web_crawler.url_filter import URLFilter
+
+BASE_URL = "https://www.example.com"
+PAGE_LINKS = {"small": 10, "medium": 200, "huge": 5000}
+
+
+def hrefs(count: int) -> List[str]:
+    """
+    Returns a mix of the hrefs found on real pages: relative, absolute in and out of the domain, fragments and other schemes.
+    """
+    kinds = [
+        "/section/{i}",
+        "article-{i}.html",
+        "https://www.example.com/page/{i}",
+        "https://blog.example.com/post/{i}",
+        "https://www.other.org/page/{i}",
+        "cdn.other.net/script-{i}.js",
+        "#comment-{i}",
+        "mailto:user{i}@example.com",
+        "https:///broken/{i}",
+        "",
+    ]
+    return [kinds[i % len(kinds)].format(i=i) for i in range(count)]
+
+
+def page(links: int) -> BeautifulSoup:
+    """
+    Returns a parsed page with the given number of links, surrounded by text.
+    """
+    paragraphs = "".join(
+        f"<p>Paragraph {i} with some text and a <a href='{href}'>link {i}</a>.</p>"
+        for i, href in enumerate(hrefs(links))
+    )
+    return BeautifulSoup(
+        f"<html><head><title>Page</title></head><body>{paragraphs}</body></html>",
+        "html.parser",
+    )
+
+
+def storage(entries: int, output_dir: Path) -> StorageClient:
+    """
+    Returns a StorageClient holding the given number of pages, with their links.
+    """
+    storage_client = StorageClient(output_file_path=output_dir)
+    links = [f"{BASE_URL}/page/{i}" for i in range(5)]
+    for i in range(entries):
+        storage_client.storage[f"{BASE_URL}/page/{i}"] = links
+    return storage_client
+
+
+def cycling(function: Callable, *argument_lists: List) -> Callable:
+    """
+    Returns a callable calling the function with the next arguments of the lists, cycling over them.
+    """
+    arguments = itertools.cycle(zip(*argument_lists))
+    return lambda: function(*next(arguments))
+
+
+def dedup_from_storage(storage_client: StorageClient, incoming: Set[str]) -> Set[str]:
+    """
+    Deduplicates the links of a page the way the crawler does, against a copy of the storage keys.
+    """
+    return URLDeDuplicator().dedup_url(incoming, set(storage_client.get_all_keys()))
+
+
+def cases(sizes: List[int], output_dir: Path) -> Iterator[Tuple[str, Callable]]:
+    """
+    Yields the name and the timed function of each benchmark.
+    """
+    url_filter = URLFilter(BASE_URL)
+    for name, links in PAGE_LINKS.items():
+        yield f"extract_links[{name}]", partial(
+            HTMLParser().extract_links, url_filter.filter_links, page(links)
+        )
+    yield "filter_links[mixed]", cycling(url_filter.filter_links, hrefs(1000))
+
+    incoming = {f"{BASE_URL}/page/{i}" for i in range(0, 100, 2)}
+    links = [f"{BASE_URL}/page/{i}" for i in range(20)]
+    for size in sizes:
+        storage_client = storage(size, output_dir)
+        yield f"dedup_url[{size}]", partial(
+            URLDeDuplicator().dedup_url, incoming, set(storage_client.get_all_keys())
+        )
+        yield f"dedup_url_from_storage[{size}]", partial(
+            dedup_from_storage, storage_client, incoming
+        )
+        # Adds to a storage of its own, the same 1000 new URLs over and over so it keeps its size
+        yield f"storage_add[{size}]", cycling(
+            storage(size, output_dir).add,
+            [f"{BASE_URL}/new/{i}" for i in range(1000)],
+            [links] * 1000,
+        )
+        yield f"storage_contains[{size}]", cycling(
+            storage_client.contains,
+            [f"{BASE_URL}/page/{size // 2}", f"{BASE_URL}/missing"],
+        )
+        yield f"storage_write_to_file[{size}]", storage_client.write_to_file
+
+    metrics = CrawlMetrics()
+    yield "metrics_counter_inc", metrics.links_found.inc
+    yield "metrics_histogram_observe", partial(metrics.parse_seconds.observe, 0.003)
+    yield "metrics_labeled_histogram_observe", lambda: metrics.fetch_seconds.labels(
+        "200"
+    ).observe(0.05)
+
+
+def measure(function: Callable, repeat: int) -> Dict:
+    """
+    Times a function, calibrating the number of calls per run so a run takes at least 0.2 seconds.
+
+    Returns:
+        Dict: The best time per call over the runs, in nanoseconds, and the number of calls per run.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return {"ns_per_op": round(best / number * 1e9, 1), "number": number}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Returns the benchmarks slower than in the baseline by more than the threshold, as printable lines.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["ns_per_op"] / baseline[name]["ns_per_op"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                f"{name}: {baseline[name]['ns_per_op']:.1f} -> {result['ns_per_op']:.1f} ns/op ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--filter", type=str, default="", help="Only run benchmarks containing it"
+    )
+    parser.add_argument(
+        "--output", type=Path, help="JSON file to write, default to stdout"
+    )
+    parser.add_argument(
+        "--baseline", type=Path, help="JSON output of a previous run to compare to"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Slowdown ratio over the baseline flagged as a regression - default is 0.1",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, function in cases(args.sizes, Path(output_dir)):
+            if args.filter in name:
+                results[name] = measure(function, args.repeat)
+                print(
+                    f"{name}: {results[name]['ns_per_op']:.1f} ns/op", file=sys.stderr
+                )
+    report = json.dumps(
+        {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        },
+        indent=2,
+    )
+    if args.output:
+        args.output.write_text(report)
+    else:
+        print(report)
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text())["results"], args.threshold
+        )
+        for regression in regressions:
+            print(f"Regression {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Scaling benchmark of the multi-process crawler on a synthetic site.
+
+Crawls the same synthetic site with a single WebCrawler, then with a ShardedCrawler
+for each number of processes, and reports the throughput and whether the merged
+results match the single-process crawl.
+
+    python -m benchmarks.sharding --pages 5000 --hosts 32 --processes 1 2 4 8
+"""
+
+import asyncio
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic_site import SyntheticSite
+from web_crawler.web_crawler import WebCrawler
+from web_crawler.sharded_crawler import ShardedCrawler
+from web_crawler.storage_client import StorageClient
+
+
+def crawl(site: SyntheticSite, processes: int, workers: int, output_dir: Path):
+    storage_client = StorageClient(output_file_path=output_dir)
+    if processes == 1:
+        crawler = WebCrawler(
+            site.start_url,
+            network_client=site.network_client(),
+            storage_client=storage_client,
+            num_workers=workers,
+        )
+    else:
+        crawler = ShardedCrawler(
+            site.start_url,
+            processes,
+            storage_client=storage_client,
+            network_client_factory=site.network_client,
+            num_workers=workers,
+        )
+    start_time = time.perf_counter()
+    asyncio.run(crawler.crawl_with_workers())
+    return storage_client.get_all(), time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--hosts", type=int, default=32)
+    parser.add_argument("--fan-out", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    site = SyntheticSite(pages=args.pages, hosts=args.hosts, fan_out=args.fan_out)
+    reference = None
+    baseline = None
+    print(
+        f"{'processes':>9} {'pages':>7} {'seconds':>8} {'pages/s':>8} {'speedup':>7} match"
+    )
+    for processes in args.processes:
+        with tempfile.TemporaryDirectory() as output_dir:
+            storage, elapsed = crawl(site, processes, args.workers, Path(output_dir))
+        if reference is None:
+            reference = {
+                url: set((data or {}).get("links", [])) for url, data in storage.items()
+            }
+        match = reference == {
+            url: set((data or {}).get("links", [])) for url, data in storage.items()
+        }
+        throughput = len(storage) / elapsed
+        baseline = baseline or throughput
+        print(
+            f"{processes:>9} {len(storage):>7} {elapsed:>8.2f} {throughput:>8.0f} {throughput / baseline:>6.2f}x {match}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup benchmark of the crawler command line, time to first request.
+
+Runs main.py in a fresh interpreter against a synthetic site served by a local HTTP
+server through its --proxy option, and measures the time from the process start to its
+first connection to the site, the robots.txt fetch. The process is killed right after, so nothing is written. Also measures `main.py --help`, the
+interpreter start and argument parsing alone. Each measure is the median of --runs.
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --main /path/to/other/checkout/main.py
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+from benchmarks.synthetic_site import SyntheticSite, SyntheticSiteServer
+
+MAIN = Path(__file__).parent.parent / "main.py"
+
+
+class FirstRequestServer(SyntheticSiteServer):
+    """
+    SyntheticSiteServer recording the time of its first connection.
+    """
+
+    def __init__(self, site: SyntheticSite):
+        super().__init__(site)
+        self.connected = asyncio.Event()
+        self.connected_at = 0.0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if not self.connected.is_set():
+            self.connected_at = time.perf_counter()
+            self.connected.set()
+        await super().handle(reader, writer)
+
+
+async def first_request(main: Path, site: SyntheticSite, timeout: float) -> float:
+    async with FirstRequestServer(site) as server:
+        with tempfile.TemporaryDirectory() as working_dir:
+            start_time = time.perf_counter()
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                str(main),
+                "--url",
+                site.start_url,
+                "--proxy",
+                f"http://{server.host}:{server.port}",
+                "--checkpoint-interval",
+                "0",
+                cwd=working_dir,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                await asyncio.wait_for(server.connected.wait(), timeout)
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+    return server.connected_at - start_time
+
+
+def help_time(main: Path) -> float:
+    start_time = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(main), "--help"], check=True, stdout=subprocess.DEVNULL
+    )
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--main", type=Path, default=MAIN, help="main.py of the checkout to measure"
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    site = SyntheticSite(pages=10, hosts=1, scheme="http")
+    helps = [help_time(args.main) for _ in range(args.runs)]
+    firsts = [
+        asyncio.run(first_request(args.main, site, args.timeout))
+        for _ in range(args.runs)
+    ]
+    print(f"{'measure':>14} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    for name, times in (("--help", helps), ("first request", firsts)):
+        print(
+            f"{name:>14} {1000 * statistics.median(times):>10.0f} {1000 * min(times):>8.0f} {1000 * max(times):>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import asyncio
+import random
+import httpx
+from typing import List, Set
+
+from web_crawler.network_client import NetworkClient
+
+
+class SyntheticSite:
+    """
+    A deterministic synthetic website served in-process through httpx.MockTransport.
+
+    Pages are spread over several sub-domains of the same domain, so they stay in the
+    crawl scope while being sharded and rate limited per host. Every page links to
+    fan_out pages drawn from a seeded random generator, the same site is generated on
+    every run and in every process. A share of the links can repeat links already on the
+    page, pages can be padded to a given size, and a share of the pages can answer their
+    first request with a 429. See SyntheticSiteServer to serve it over HTTP instead.
+
+    Attributes:
+        pages (int): Number of pages of the site.
+        hosts (int): Number of hosts the pages are spread over.
+        fan_out (int): Number of links per page.
+        domain (str): Registered domain of the site.
+        seed (int): Seed of the link generator.
+        latency (float): Number of seconds each response is delayed by.
+        page_size (int): Minimum size of each page in bytes, pages are padded with text up to it.
+        duplicate_ratio (float): Share of the links of a page repeating another link of the page.
+        rate_limit_ratio (float): Share of the pages answering their first request with a 429.
+        scheme (str): Scheme of the site URLs, http to serve it with SyntheticSiteServer.
+    """
+
+    def __init__(
+        self,
+        pages: int = 1000,
+        hosts: int = 8,
+        fan_out: int = 10,
+        domain: str = "example.com",
+        seed: int = 0,
+        latency: float = 0.0,
+        page_size: int = 0,
+        duplicate_ratio: float = 0.0,
+        rate_limit_ratio: float = 0.0,
+        scheme: str = "https",
+    ):
+        self.pages = pages
+        self.hosts = hosts
+        self.fan_out = fan_out
+        self.domain = domain
+        self.seed = seed
+        self.latency = latency
+        self.page_size = page_size
+        self.duplicate_ratio = duplicate_ratio
+        self.rate_limit_ratio = rate_limit_ratio
+        self.scheme = scheme
+        self._rate_limited: Set[int] = set()
+
+    @property
+    def start_url(self) -> str:
+        return self.url(0)
+
+    def url(self, page: int) -> str:
+        """
+        Returns the URL of a page.
+        """
+        return f"{self.scheme}://h{page % self.hosts}.{self.domain}/p{page}"
+
+    def links(self, page: int) -> List[str]:
+        """
+        Returns the URLs a page links to.
+        """
+        generator = random.Random(self.seed * self.pages + page)
+        fan_out = min(self.fan_out, self.pages)
+        duplicates = round((fan_out - 1) * self.duplicate_ratio)
+        targets = [(page + 1) % self.pages]
+        targets += generator.sample(range(self.pages), fan_out - 1 - duplicates)
+        targets += [generator.choice(targets) for _ in range(duplicates)]
+        return [self.url(target) for target in targets]
+
+    def rate_limits(self, page: int) -> bool:
+        """
+        Returns True if the first request to a page is answered with a 429.
+        """
+        generator = random.Random(f"{self.seed}-429-{page}")
+        return generator.random() < self.rate_limit_ratio
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        """
+        Serves a request to the site.
+        """
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, text="User-agent: *\nRequest-rate: 10000/1")
+        try:
+            page = int(request.url.path.removeprefix("/p"))
+        except ValueError:
+            return httpx.Response(404)
+        if (
+            not 0 <= page < self.pages
+            or request.url.host != httpx.URL(self.url(page)).host
+        ):
+            return httpx.Response(404)
+        if page not in self._rate_limited and self.rate_limits(page):
+            self._rate_limited.add(page)
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        anchors = "".join(
+            f'<li><a href="{link}">Page {link}</a></li>' for link in self.links(page)
+        )
+        text = f"<html><head><title>Page {page}</title></head><body><ul>{anchors}</ul>"
+        padding = self.page_size - len(text) - len("<p></p></body></html>")
+        text += f"<p>{'lorem ipsum ' * (padding // 12 + 1) if padding > 0 else ''}</p></body></html>"
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "text/html"},
+            text=text,
+        )
+
+    def network_client(self) -> NetworkClient:
+        """
+        Returns a NetworkClient serving the site, picklable to be used as a factory in other processes.
+        """
+        transport = httpx.MockTransport(handler=self.handler)
+        return NetworkClient(client=httpx.AsyncClient(transport=transport))
+
+
+class SyntheticSiteServer:
+    """
+    Serves a SyntheticSite over HTTP on localhost, to benchmark the crawler with real sockets.
+
+    The site hosts do not resolve, so the server acts as a forward HTTP proxy for them:
+    the network client sends every request to the server with the absolute URL of the
+    page, and the server answers it with the site handler. The site must use the http
+    scheme, requests to an https URL would go through a CONNECT tunnel instead.
+
+    Attributes:
+        site (SyntheticSite): The site served.
+        host (str): Address the server listens on.
+        port (int): Port the server listens on, 0 picks a free port on start.
+    """
+
+    def __init__(self, site: SyntheticSite, host: str = "127.0.0.1", port: int = 0):
+        if site.scheme != "http":
+            raise ValueError("SyntheticSiteServer serves http sites only")
+        self.site = site
+        self.host = host
+        self.port = port
+        self._server: asyncio.Server | None = None
+
+    async def start(self):
+        """
+        Starts listening, on a free port if none was given.
+        """
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """
+        Stops listening, network clients should be closed first.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def __aenter__(self) -> "SyntheticSiteServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers the requests of a keep-alive connection until the client closes it.
+        """
+        try:
+            while request_line := await reader.readline():
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "://" not in target:
+                    target = f"http://{headers.get('host', self.host)}{target}"
+                response = await self.site.handler(httpx.Request(method, target))
+                body = response.content
+                head = [f"HTTP/1.1 {response.status_code} {response.reason_phrase}"]
+                head += [
+                    f"{name}: {value}"
+                    for name, value in response.headers.items()
+                    if name.lower() not in ("content-length", "transfer-encoding")
+                ]
+                head.append(f"Content-Length: {len(body)}")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def network_client(self) -> NetworkClient:
+        """
+        Returns a NetworkClient sending its requests to the server.
+        """
+        return NetworkClient(
+            client=httpx.AsyncClient(
+                proxy=f"http://{self.host}:{self.port}",
+                timeout=5,
+                follow_redirects=False,
+                trust_env=False,
+            )
+        )
@@ -1,30 +1,142 @@
-import asyncio
 import time
 import logging
+import os
+import functools
+import socket
 import argparse
+from pathlib import Path
 
-from web_crawler.web_crawler import WebCrawler
-
-logging.basicConfig(
-    format="%(asctime)s %(levelname)s:%(name)s: %(message)s",
-    level=logging.INFO,
-    datefmt="%H:%M:%S",
-    encoding="utf-8",
-    handlers=[logging.FileHandler("debug.log", mode="w"), logging.StreamHandler()],
-)
+from web_crawler.storage_client import StorageClient
+from web_crawler.event_loop import EVENT_LOOPS, run
+from web_crawler.scoring import InLinkScorer, depth_score
+from web_crawler.crawl_budget import CrawlBudget
+from web_crawler.recrawl_scheduler import RecrawlScheduler
+from web_crawler.log_sampler import LogSampler, configure_logging
+from web_crawler.tracing import Tracer
 
 logger = logging.getLogger("web_crawler")
 logging.getLogger("chardet.charsetprober").disabled = True
 
 
-async def main(url: str, num_workers: int, max_retries: int, backoff: int):
+async def main(
+    url: str,
+    num_workers: int,
+    max_retries: int,
+    backoff: int,
+    min_concurrency: int,
+    max_concurrency: int | None,
+    priority: str,
+    budget: CrawlBudget,
+    processes: int = 1,
+    serve: str | None = None,
+    coordinator: str | None = None,
+    lease_timeout: float = 30.0,
+    event_loop: str = "auto",
+    shutdown_timeout: float = 10.0,
+    checkpoint_interval: float | None = 30.0,
+    recrawl: RecrawlScheduler | None = None,
+    parse_workers: int = 1,
+    store_workers: int = 1,
+    metrics_port: int | None = None,
+    metrics_file: Path | None = None,
+    metrics_interval: float = 15.0,
+    status_interval: float | None = None,
+    status_file: Path | None = None,
+    trace_file: Path | None = None,
+    trace_sample_rate: float = 1.0,
+    proxy: str | None = None,
+):
+    from web_crawler.network_client import NetworkClient
+
     start_time = time.perf_counter()
-    wc = WebCrawler(
-        url, num_workers=num_workers, max_retries=max_retries, backoff=backoff
+    scorer = {"bfs": depth_score, "inlinks": InLinkScorer(), "fifo": None}[priority]
+    crawler_kwargs = dict(
+        num_workers=num_workers,
+        max_retries=max_retries,
+        backoff=backoff,
+        min_concurrency=min_concurrency,
+        max_concurrency=max_concurrency,
+        scorer=scorer,
+        shutdown_timeout=shutdown_timeout,
+        checkpoint_interval=checkpoint_interval,
+        parse_workers=parse_workers,
+        store_workers=store_workers,
     )
-    await wc.crawl_with_workers()
+    # Each shard builds its network client in its own process
+    network_client_factory = functools.partial(NetworkClient, proxy=proxy)
+    # Only single process crawlers report their status and traces, shards would overwrite each other's files
+    reporting_kwargs = dict(
+        status_interval=status_interval,
+        status_file=status_file,
+        tracer=Tracer(trace_file, trace_sample_rate) if trace_file else None,
+    )
+    # Crawlers are imported by the branch running them, the others pull in httpx and bs4 for nothing,
+    # and --help or invalid arguments answer right away
+    if serve:
+        from web_crawler.coordinator import Coordinator
+
+        await Coordinator(
+            url, lease_timeout=lease_timeout, scorer=scorer, budget=budget
+        ).serve(serve)
+    elif coordinator:
+        from web_crawler.distributed_worker import DistributedWorker
+
+        worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        wc = await DistributedWorker.connect(
+            coordinator,
+            worker_id,
+            network_client=network_client_factory(),
+            storage_client=StorageClient(
+                output_file_path=Path(__file__).parent,
+                output_file_name=f"storage.{worker_id}.json",
+            ),
+            **crawler_kwargs,
+            **reporting_kwargs,
+        )
+        async with wc.metrics.exporting(metrics_port, metrics_file, metrics_interval):
+            await wc.crawl_with_workers()
+    elif processes > 1:
+        from web_crawler.sharded_crawler import ShardedCrawler
+
+        wc = ShardedCrawler(
+            url,
+            processes,
+            budget=budget,
+            event_loop=event_loop,
+            network_client_factory=network_client_factory,
+            **crawler_kwargs,
+        )
+        await wc.crawl_with_workers()
+    elif recrawl is not None:
+        from web_crawler.web_crawler import WebCrawler
+
+        storage_client = StorageClient(output_file_path=Path(__file__).parent)
+        logger.info("Loaded %s stored pages to recrawl", storage_client.load())
+        wc = WebCrawler(
+            url,
+            network_client=network_client_factory(),
+            storage_client=storage_client,
+            budget=budget,
+            recrawl=recrawl,
+            **crawler_kwargs,
+            **reporting_kwargs,
+        )
+        async with wc.metrics.exporting(metrics_port, metrics_file, metrics_interval):
+            await wc.crawl_with_workers()
+    else:
+        from web_crawler.web_crawler import WebCrawler
+
+        wc = WebCrawler(
+            url,
+            network_client=network_client_factory(),
+            budget=budget,
+            **crawler_kwargs,
+            **reporting_kwargs,
+        )
+        async with wc.metrics.exporting(metrics_port, metrics_file, metrics_interval):
+            await wc.crawl_with_workers()
     elapsed = time.perf_counter() - start_time
-    logger.info(f"{__file__} executed in {elapsed:0.2f} seconds.")
+    logger.info("%s executed in %0.2f seconds.", __file__, elapsed)
 
 
 if __name__ == "__main__":
@@ -32,7 +144,9 @@ if __name__ == "__main__":
     required = parser.add_argument_group("required arguments")
     optional = parser.add_argument_group("optional arguments")
     required.add_argument(
-        "--url", type=str, help="The URL to start crawling from", required=True
+        "--url",
+        type=str,
+        help="The URL to start crawling from, not needed when joining a coordinator",
     )
     optional.add_argument(
         "--workers",
@@ -58,9 +172,227 @@ if __name__ == "__main__":
         type=int,
         help="Backoff time in seconds between retries - default is 5 seconds",
     )
+    optional.add_argument(
+        "--min-concurrency",
+        type=int,
+        default=1,
+        help="Minimum number of in-flight fetches per host - default is 1",
+    )
+    optional.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=None,
+        help="Maximum number of in-flight fetches per host - default to the number of workers",
+    )
+    optional.add_argument(
+        "--priority",
+        type=str,
+        choices=["bfs", "inlinks", "fifo"],
+        default="bfs",
+        help="Order in which discovered URLs are crawled - breadth-first, most linked first or discovery order - default is bfs",
+    )
+    optional.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        help="Maximum number of links followed from the start URL - default is unlimited",
+    )
+    optional.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Maximum number of pages crawled - default is unlimited",
+    )
+    optional.add_argument(
+        "--max-pages-per-host",
+        type=int,
+        default=None,
+        help="Maximum number of pages crawled per host - default is unlimited",
+    )
+    optional.add_argument(
+        "--max-url-length",
+        type=int,
+        default=2048,
+        help="Maximum URL length - default is 2048",
+    )
+    optional.add_argument(
+        "--max-duration",
+        type=float,
+        default=None,
+        help="Maximum crawl wall time in seconds - default is unlimited",
+    )
+    optional.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Number of crawler processes, hosts are sharded across them - default is 1",
+    )
+    optional.add_argument(
+        "--serve",
+        type=str,
+        default=None,
+        help="Run as the coordinator of a distributed crawl, on host:port or unix:/path/to/socket",
+    )
+    optional.add_argument(
+        "--coordinator",
+        type=str,
+        default=None,
+        help="Run as a worker of the distributed crawl served on host:port or unix:/path/to/socket",
+    )
+    optional.add_argument(
+        "--lease-timeout",
+        type=float,
+        default=30.0,
+        help="Seconds without news from a worker before its URLs are given to others - default is 30",
+    )
+    optional.add_argument(
+        "--proxy",
+        type=str,
+        default=None,
+        help="Send the requests through this HTTP proxy, e.g. http://127.0.0.1:3128 - default is none",
+    )
+    optional.add_argument(
+        "--event-loop",
+        type=str,
+        choices=EVENT_LOOPS,
+        default="auto",
+        help="Event loop implementation, auto uses uvloop when it is installed - default is auto",
+    )
+    optional.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=10.0,
+        help="Seconds in-flight fetches have to finish on SIGINT or SIGTERM - default is 10",
+    )
+    optional.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between two flushes of the new results to the storage journal, 0 to disable - default is 30",
+    )
+    optional.add_argument(
+        "--recrawl",
+        action="store_true",
+        help="Revisit the pages of the previous crawl that are due, from their estimated change rate, instead of starting from the URL",
+    )
+    optional.add_argument(
+        "--recrawl-budget",
+        type=float,
+        default=None,
+        help="Number of fetches per day the revisits are spread over to maximize freshness - default is one revisit per estimated change",
+    )
+    optional.add_argument(
+        "--parse-workers",
+        type=int,
+        default=1,
+        help="Number of pages parsed at the same time, in worker threads - default is 1",
+    )
+    optional.add_argument(
+        "--store-workers",
+        type=int,
+        default=1,
+        help="Number of pages stored at the same time - default is 1",
+    )
+    optional.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve the crawl metrics in the Prometheus text format on this port - default is disabled",
+    )
+    optional.add_argument(
+        "--metrics-file",
+        type=Path,
+        default=None,
+        help="Write snapshots of the crawl metrics in the Prometheus text format to this file - default is disabled",
+    )
+    optional.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        help="Seconds between two snapshots of the metrics file - default is 15",
+    )
+    optional.add_argument(
+        "--status-interval",
+        type=float,
+        default=0.0,
+        help="Seconds between two reports of the crawl progress, 0 to disable - default is 0",
+    )
+    optional.add_argument(
+        "--status-file",
+        type=Path,
+        default=None,
+        help="Write the last crawl progress report as JSON to this file - default is disabled",
+    )
+    optional.add_argument(
+        "--trace-file",
+        type=Path,
+        default=None,
+        help="Write per-URL trace spans in the Chrome trace event format to this file - default is disabled",
+    )
+    optional.add_argument(
+        "--trace-sample-rate",
+        type=float,
+        default=1.0,
+        help="Share of the URLs traced, between 0 and 1 - default is 1",
+    )
+    optional.add_argument(
+        "--log-level",
+        type=str,
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        default="INFO",
+        help="Level of the records written to debug.log and the console - default is INFO",
+    )
+    optional.add_argument(
+        "--log-burst",
+        type=int,
+        default=10,
+        help="Number of records of a log call site written per second before sampling them - default is 10",
+    )
+    optional.add_argument(
+        "--log-sample-every",
+        type=int,
+        default=100,
+        help="Past the burst, one record of a log call site written in this many, 0 to drop them all - default is 100",
+    )
+    optional.add_argument(
+        "--profile",
+        type=str,
+        choices=("cprofile", "sampling"),
+        default=None,
+        help="Profile the run with cProfile or a sampling profiler - default is disabled",
+    )
+    optional.add_argument(
+        "--profile-output",
+        type=Path,
+        default=Path("profile"),
+        help="Path of the profile files, without extension - default is profile",
+    )
+    optional.add_argument(
+        "--profile-start",
+        type=float,
+        default=0.0,
+        help="Seconds into the run the profiling starts at - default is 0",
+    )
+    optional.add_argument(
+        "--profile-duration",
+        type=float,
+        default=None,
+        help="Seconds the profiling lasts - default is until the end of the run",
+    )
+    optional.add_argument(
+        "--profile-interval",
+        type=float,
+        default=0.005,
+        help="Seconds between two samples of the sampling profiler - default is 0.005",
+    )
 
     args = parser.parse_args()
-    logger.info(f"Starting web crawler with current args:\n {args}")
+    # Configured here only, shard processes re-import this module and must not truncate the log file
+    configure_logging(
+        args.log_level,
+        sampler=LogSampler(burst=args.log_burst, sample_every=args.log_sample_every),
+    )
+    logger.info("Starting web crawler with current args:\n %s", args)
     # Check for arguments validity
     if args.workers < 1:
         logger.error("Number of workers must be greater than 0")
@@ -71,8 +403,132 @@ if __name__ == "__main__":
     if args.backoff < 0:
         logger.error("Backoff time must be greater than or equal to 0")
         exit(1)
-    if args.url == "":
+    if args.processes < 1:
+        logger.error("Number of processes must be greater than 0")
+        exit(1)
+    if args.min_concurrency < 1:
+        logger.error("Minimum concurrency must be greater than 0")
+        exit(1)
+    if args.max_concurrency is not None and args.max_concurrency < args.min_concurrency:
+        logger.error(
+            "Maximum concurrency must be greater than or equal to minimum concurrency"
+        )
+        exit(1)
+    for name in (
+        "max_depth",
+        "max_pages",
+        "max_pages_per_host",
+        "max_url_length",
+        "max_duration",
+    ):
+        if getattr(args, name) is not None and getattr(args, name) < 0:
+            logger.error("%s must be greater than or equal to 0", name)
+            exit(1)
+    if not args.url and not args.coordinator:
         logger.error("URL cannot be empty")
         exit(1)
+    if args.serve and args.coordinator:
+        logger.error("Cannot both serve and join a coordinator")
+        exit(1)
+    if args.shutdown_timeout < 0 or args.checkpoint_interval < 0:
+        logger.error(
+            "Shutdown timeout and checkpoint interval must be greater than or equal to 0"
+        )
+        exit(1)
+    if args.recrawl and (args.processes > 1 or args.serve or args.coordinator):
+        logger.error("Recrawl is only supported by the single process crawler")
+        exit(1)
+    if args.recrawl_budget is not None and args.recrawl_budget <= 0:
+        logger.error("Recrawl budget must be greater than 0")
+        exit(1)
+    if args.parse_workers < 1 or args.store_workers < 1:
+        logger.error("Number of parse and store workers must be greater than 0")
+        exit(1)
+    if (args.metrics_port is not None or args.metrics_file) and (
+        args.processes > 1 or args.serve
+    ):
+        logger.error("Metrics are only exported by single process crawlers and workers")
+        exit(1)
+    if args.metrics_interval <= 0:
+        logger.error("Metrics interval must be greater than 0")
+        exit(1)
+    if args.status_interval < 0:
+        logger.error("Status interval must be greater than or equal to 0")
+        exit(1)
+    if args.status_file and not args.status_interval:
+        logger.error("Status file requires a status interval")
+        exit(1)
+    if args.status_interval and (args.processes > 1 or args.serve):
+        logger.error("Status is only reported by single process crawlers and workers")
+        exit(1)
+    if not 0 <= args.trace_sample_rate <= 1:
+        logger.error("Trace sample rate must be between 0 and 1")
+        exit(1)
+    if args.trace_file and (args.processes > 1 or args.serve):
+        logger.error("Traces are only recorded by single process crawlers and workers")
+        exit(1)
+    if args.profile and args.processes > 1:
+        logger.error("Profiling is only supported in a single process")
+        exit(1)
+    if (
+        args.profile_start < 0
+        or (args.profile_duration is not None and args.profile_duration <= 0)
+        or args.profile_interval <= 0
+    ):
+        logger.error(
+            "Profile start must be greater than or equal to 0, profile duration and interval greater than 0"
+        )
+        exit(1)
+    if args.log_burst < 0 or args.log_sample_every < 0:
+        logger.error("Log burst and sampling must be greater than or equal to 0")
+        exit(1)
+    if args.lease_timeout <= 0:
+        logger.error("Lease timeout must be greater than 0")
+        exit(1)
+
+    crawl = main(
+        args.url,
+        args.workers,
+        args.retries,
+        args.backoff,
+        args.min_concurrency,
+        args.max_concurrency,
+        args.priority,
+        CrawlBudget(
+            max_depth=args.max_depth,
+            max_pages=args.max_pages,
+            max_pages_per_host=args.max_pages_per_host,
+            max_url_length=args.max_url_length,
+            max_duration=args.max_duration,
+        ),
+        args.processes,
+        args.serve,
+        args.coordinator,
+        args.lease_timeout,
+        args.event_loop,
+        args.shutdown_timeout,
+        args.checkpoint_interval or None,
+        RecrawlScheduler(budget=args.recrawl_budget) if args.recrawl else None,
+        args.parse_workers,
+        args.store_workers,
+        args.metrics_port,
+        args.metrics_file,
+        args.metrics_interval,
+        args.status_interval or None,
+        args.status_file,
+        args.trace_file,
+        args.trace_sample_rate,
+        args.proxy,
+    )
+    if args.profile:
+        # Imported only when profiling, a run without it pays nothing
+        from web_crawler.profiler import CrawlProfiler
 
-    asyncio.run(main(args.url, args.workers, args.retries, args.backoff))
+        crawl = CrawlProfiler(
+            args.profile,
+            args.profile_output,
+            start_after=args.profile_start,
+            duration=args.profile_duration,
+            interval=args.profile_interval,
+        ).profile(crawl)
+    run(crawl, args.event_loop)
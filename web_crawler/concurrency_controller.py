@@ -0,0 +1,256 @@
+import asyncio
+import math
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HostConcurrency:
+    """
+    Concurrency state of a single host.
+
+    Attributes:
+        limit (float): Current number of in-flight fetches allowed, floored when enforced.
+        window_size (int): Number of recent fetches kept to evaluate the host health.
+        in_flight (int): Number of fetches currently running against the host.
+        latencies (Deque[float]): Latencies of the most recent fetches, in seconds.
+        errors (Deque[bool]): Error flags of the most recent fetches.
+        cooldown (int): Number of completions to ignore before the next decrease.
+        increases (int): Number of additive increases applied.
+        decreases (int): Number of multiplicative decreases applied.
+        waiters (Deque[asyncio.Future]): Fetches waiting for a free slot.
+    """
+
+    limit: float
+    window_size: int
+    in_flight: int = 0
+    cooldown: int = 0
+    increases: int = 0
+    decreases: int = 0
+    latencies: Deque[float] = field(default_factory=deque)
+    errors: Deque[bool] = field(default_factory=deque)
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+
+    def __post_init__(self):
+        self.latencies = deque(maxlen=self.window_size)
+        self.errors = deque(maxlen=self.window_size)
+
+    @property
+    def p95_latency(self) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.errors:
+            return 0.0
+        return sum(self.errors) / len(self.errors)
+
+
+class AdaptiveConcurrencyController:
+    """
+    Adjusts the number of in-flight fetches per host with an AIMD policy.
+
+    The limit of a host grows additively (by `additive_increase` per window of successful
+    fetches) while its p95 latency and error rate stay healthy, and shrinks multiplicatively
+    on 429/503 responses or latency spikes. The limit always stays within
+    [min_concurrency, max_concurrency].
+
+    Attributes:
+        min_concurrency (int): Lower bound of the per-host limit, also the starting limit.
+        max_concurrency (int): Upper bound of the per-host limit.
+        additive_increase (float): Amount added to the limit per healthy window.
+        multiplicative_decrease (float): Factor applied to the limit on congestion.
+        max_latency (float): p95 latency, in seconds, above which a host is considered congested.
+        max_error_rate (float): Error rate above which a host is considered unhealthy.
+        window_size (int): Number of recent fetches used to compute p95 latency and error rate.
+        min_samples (int): Number of fetches required before latency and errors are evaluated.
+        hosts (Dict[str, HostConcurrency]): Concurrency state keyed by host.
+        on_release (Callable, optional): Function called with a host each time one of its slots is freed.
+    """
+
+    def __init__(
+        self,
+        min_concurrency: int = 1,
+        max_concurrency: int = 1,
+        additive_increase: float = 1.0,
+        multiplicative_decrease: float = 0.5,
+        max_latency: float = 2.0,
+        max_error_rate: float = 0.2,
+        window_size: int = 20,
+        min_samples: int = 5,
+    ):
+        if min_concurrency < 1 or max_concurrency < min_concurrency:
+            raise ValueError(
+                f"Invalid concurrency bounds: min {min_concurrency}, max {max_concurrency}"
+            )
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.max_latency = max_latency
+        self.max_error_rate = max_error_rate
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.hosts: Dict[str, HostConcurrency] = {}
+        self.on_release: Callable[[str], None] | None = None
+
+    def available(self, host: str) -> bool:
+        """
+        Checks whether a fetch slot is free for the host.
+
+        Args:
+            host (str): The host a request would be sent to.
+
+        Returns:
+            bool: True if a fetch can start right away.
+        """
+        state = self.hosts.get(host)
+        return state is None or state.in_flight < int(state.limit)
+
+    async def acquire(self, host: str):
+        """
+        Waits until a fetch slot is free for the host and takes it.
+
+        Args:
+            host (str): The host a request will be sent to.
+        """
+        state = self._state(host)
+        while state.in_flight >= int(state.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+        state.in_flight += 1
+
+    def release(self, host: str):
+        """
+        Frees a fetch slot of the host.
+
+        Args:
+            host (str): The host the request was sent to.
+        """
+        state = self._state(host)
+        state.in_flight -= 1
+        self._wake_up(state)
+        if self.on_release is not None:
+            self.on_release(host)
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        """
+        Async context manager holding a fetch slot of the host for the duration of the block.
+
+        Args:
+            host (str): The host a request will be sent to.
+        """
+        await self.acquire(host)
+        try:
+            yield
+        finally:
+            self.release(host)
+
+    def record(
+        self,
+        host: str,
+        latency: float,
+        congested: bool = False,
+        error: bool = False,
+    ):
+        """
+        Records the outcome of a fetch and adjusts the host limit.
+
+        Args:
+            host (str): The host the request was sent to.
+            latency (float): Duration of the fetch in seconds.
+            congested (bool): True if the host asked us to slow down (429, 503).
+            error (bool): True if the fetch failed for another reason.
+        """
+        state = self._state(host)
+        state.latencies.append(latency)
+        state.errors.append(congested or error)
+        if state.cooldown > 0:
+            state.cooldown -= 1
+
+        if congested:
+            self._decrease(state, host, "congestion signal")
+        elif len(state.latencies) >= self.min_samples and (
+            state.p95_latency > self.max_latency
+            or state.error_rate > self.max_error_rate
+        ):
+            self._decrease(state, host, "unhealthy latency or error rate")
+        elif not error:
+            self._increase(state)
+
+    def stats(self) -> Dict:
+        """
+        Returns the controller state of every host.
+
+        Returns:
+            dict: Per-host limit, in-flight fetches, p95 latency, error rate and adjustment counts.
+        """
+        return {
+            host: {
+                "limit": int(state.limit),
+                "in_flight": state.in_flight,
+                "waiting": len(state.waiters),
+                "p95_latency": round(state.p95_latency, 4),
+                "error_rate": round(state.error_rate, 4),
+                "increases": state.increases,
+                "decreases": state.decreases,
+            }
+            for host, state in self.hosts.items()
+        }
+
+    def _increase(self, state: HostConcurrency):
+        # Spread the increase over a window of `limit` completions, like TCP congestion avoidance
+        previous = int(state.limit)
+        state.limit = min(
+            self.max_concurrency,
+            state.limit + self.additive_increase / max(state.limit, 1),
+        )
+        if int(state.limit) > previous:
+            state.increases += 1
+            self._wake_up(state)
+
+    def _decrease(self, state: HostConcurrency, host: str, reason: str):
+        # Fetches already in flight when we decreased would trigger another decrease otherwise
+        if state.cooldown > 0:
+            return
+        state.limit = max(
+            self.min_concurrency, state.limit * self.multiplicative_decrease
+        )
+        state.cooldown = state.in_flight
+        state.decreases += 1
+        state.latencies.clear()
+        state.errors.clear()
+        logger.warning(
+            "Concurrency for %s decreased to %s - %s", host, int(state.limit), reason
+        )
+
+    def _wake_up(self, state: HostConcurrency):
+        free_slots = int(state.limit) - state.in_flight
+        while free_slots > 0 and state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free_slots -= 1
+
+    def _state(self, host: str) -> HostConcurrency:
+        state = self.hosts.get(host)
+        if state is None:
+            state = HostConcurrency(
+                limit=self.min_concurrency, window_size=self.window_size
+            )
+            self.hosts[host] = state
+        return state
@@ -0,0 +1,386 @@
+import asyncio
+import itertools
+import json
+import time
+import logging
+from typing import Callable, Dict, List, Set, Tuple
+
+from web_crawler.url_container import URLContainer
+from web_crawler.rate_limiter import RateLimiter, host_key
+from web_crawler.frontier import Frontier
+from web_crawler.crawl_budget import CrawlBudget, CrawlGuard
+from web_crawler.scoring import Scorer, depth_score
+
+logger = logging.getLogger(__name__)
+
+
+def parse_address(address: str) -> Tuple[str, str | None, int | None]:
+    """
+    Parses a coordinator address, either host:port or unix:/path/to/socket.
+
+    Args:
+        address (str): The address to parse.
+
+    Returns:
+        tuple: ("tcp", host, port) or ("unix", path, None).
+
+    Raises:
+        ValueError: If the address is neither a TCP nor a Unix socket address.
+    """
+    if address.startswith("unix:"):
+        return "unix", address.removeprefix("unix:"), None
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Invalid coordinator address: {address}")
+    return "tcp", host or "127.0.0.1", int(port)
+
+
+class Coordinator:
+    """
+    A standalone crawl coordinator owning the global frontier and seen-set.
+
+    Workers talk to it with batched JSON-lines RPCs over TCP or a Unix socket:
+    - hello: returns the start URL of the crawl
+    - lease: hands out up to max URLs whose host can be fetched now
+    - complete: marks leased URLs as done, along with the robots.txt rates the worker found
+    - discover: queues newly discovered URLs that were never seen, within the crawl budget
+
+    Every request of a worker renews its leases. The leases of a worker silent for more
+    than lease_timeout are re-issued to the other workers. Politeness is enforced here,
+    a host token is reserved for each leased URL, so hosts stay polite whatever the number
+    of workers. The crawl is over once the frontier is empty and no lease is outstanding.
+
+    Attributes:
+        start_url (str): The initial URL where crawling begins
+        lease_timeout (float): Number of seconds without news before the leases of a worker are re-issued
+        rate_limiter (RateLimiter): Per-host politeness budget
+        frontier (Frontier): Global queue of URLs to be leased
+        crawl_guard (CrawlGuard): Budgets and crawler-trap heuristics checked on discovery
+        seen (Set[str]): Every URL ever discovered
+        leases (Dict[int, Tuple[URLContainer, str]]): Outstanding leases and their worker, keyed by lease id
+        completed (int): Number of leases completed
+        reissued (int): Number of leases re-issued after a worker timed out
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        lease_timeout: float = 30.0,
+        scorer: Scorer | None = depth_score,
+        budget: CrawlBudget | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.start_url = start_url
+        self.lease_timeout = lease_timeout
+        self.rate_limiter = RateLimiter(clock=clock)
+        self.frontier = Frontier(
+            rate_limiter=self.rate_limiter, scorer=scorer, clock=clock
+        )
+        self.crawl_guard = CrawlGuard(budget, clock=clock)
+        self.seen: Set[str] = set()
+        self.leases: Dict[int, Tuple[URLContainer, str]] = {}
+        self.completed = 0
+        self.reissued = 0
+        self._clock = clock
+        self._ids = itertools.count()
+        self._worker_leases: Dict[str, Set[int]] = {}
+        self._last_seen: Dict[str, float] = {}
+        self._released: Set[str] = set()
+        self._all_released = asyncio.Event()
+
+        self.add(URLContainer(start_url))
+
+    @property
+    def done(self) -> bool:
+        """
+        Returns True once the frontier is empty and no lease is outstanding.
+        """
+        return self.frontier.unfinished_tasks == 0
+
+    def handle(self, request: Dict) -> Dict:
+        """
+        Handles an RPC request.
+
+        Args:
+            request (dict): The request, with its op, the worker id and the op parameters.
+
+        Returns:
+            dict: The response, with an error message for invalid requests.
+        """
+        worker = request.get("worker", "")
+        op = request.get("op")
+        try:
+            if op == "hello":
+                return self.hello(worker)
+            if op == "lease":
+                return self.lease(worker, request.get("max", 1))
+            if op == "complete":
+                return self.complete(
+                    worker, request.get("ids", []), request.get("rates", {})
+                )
+            if op == "discover":
+                return self.discover(worker, request.get("urls", []))
+        except (TypeError, ValueError, KeyError) as exc:
+            return {"error": f"Invalid {op} request: {exc}"}
+        return {"error": f"Unknown op: {op}"}
+
+    def hello(self, worker: str) -> Dict:
+        """
+        Registers a worker and returns the crawl parameters.
+        """
+        self.heartbeat(worker)
+        logger.info("Worker %s joined", worker)
+        return {"start_url": self.start_url, "lease_timeout": self.lease_timeout}
+
+    def lease(self, worker: str, max_urls: int) -> Dict:
+        """
+        Leases up to max_urls URLs whose host can be fetched now.
+
+        Args:
+            worker (str): The worker leasing the URLs.
+            max_urls (int): The maximum number of URLs to lease.
+
+        Returns:
+            dict: The leased URLs as [lease id, url, depth, parent], and whether the crawl is done.
+        """
+        self.heartbeat(worker)
+        self.reap()
+        urls = []
+        while len(urls) < max_urls:
+            try:
+                url_container = self.frontier.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            self.rate_limiter.reserve(host_key(url_container.url))
+            lease_id = next(self._ids)
+            self.leases[lease_id] = (url_container, worker)
+            self._worker_leases.setdefault(worker, set()).add(lease_id)
+            urls.append(
+                [lease_id, url_container.url, url_container.depth, url_container.parent]
+            )
+
+        if self.done:
+            self._released.add(worker)
+            if self._released >= set(self._last_seen):
+                self._all_released.set()
+        return {"urls": urls, "done": self.done}
+
+    def complete(self, worker: str, ids: List[int], rates: Dict[str, float]) -> Dict:
+        """
+        Marks leased URLs as done.
+
+        Leases already re-issued to another worker are ignored, the URL was crawled twice.
+
+        Args:
+            worker (str): The worker that crawled the URLs.
+            ids (List[int]): The lease ids of the URLs.
+            rates (Dict[str, float]): Requests per second allowed by the robots.txt of the hosts the worker fetched.
+
+        Returns:
+            dict: The number of leases completed.
+        """
+        self.heartbeat(worker)
+        for host, rate in rates.items():
+            self.rate_limiter.configure(host, request_rate=rate)
+        completed = 0
+        for lease_id in ids:
+            lease = self.leases.pop(lease_id, None)
+            if lease is None:
+                continue
+            self._worker_leases[lease[1]].discard(lease_id)
+            self.frontier.task_done()
+            completed += 1
+        self.completed += completed
+        return {"completed": completed}
+
+    def discover(self, worker: str, urls: List) -> Dict:
+        """
+        Queues newly discovered URLs, within the crawl budget.
+
+        URLs already seen are not queued again, those still queued get their priority bumped.
+
+        Args:
+            worker (str): The worker that discovered the URLs.
+            urls (List): The URLs, as [url, depth, parent].
+
+        Returns:
+            dict: The number of URLs queued.
+        """
+        self.heartbeat(worker)
+        accepted = 0
+        for url, depth, parent in urls:
+            accepted += self.add(URLContainer(url, depth=depth, parent=parent))
+        return {"accepted": accepted}
+
+    def add(self, url_container: URLContainer) -> bool:
+        """
+        Queues a URL if it was never seen and fits in the crawl budget.
+
+        Returns:
+            bool: True if the URL was queued.
+        """
+        url = url_container.url
+        if url in self.seen:
+            if url in self.frontier:
+                self.frontier.put_nowait(url_container)
+            return False
+        self.seen.add(url)
+        if not self.crawl_guard.admit(url_container):
+            return False
+        self.frontier.put_nowait(url_container)
+        return True
+
+    def heartbeat(self, worker: str):
+        """
+        Renews the leases of a worker.
+        """
+        self._last_seen[worker] = self._clock()
+
+    def reap(self):
+        """
+        Re-issues the leases of the workers silent for more than lease_timeout.
+        """
+        now = self._clock()
+        for worker, last_seen in list(self._last_seen.items()):
+            if now - last_seen <= self.lease_timeout:
+                continue
+            del self._last_seen[worker]
+            lease_ids = self._worker_leases.pop(worker, set())
+            if lease_ids:
+                logger.warning(
+                    "Worker %s timed out - re-issuing %s leases", worker, len(lease_ids)
+                )
+            for lease_id in lease_ids:
+                url_container, _ = self.leases.pop(lease_id)
+                # Queued again before being marked done, so the crawl is never seen as over
+                self.frontier.put_nowait(url_container)
+                self.frontier.task_done()
+                self.reissued += 1
+
+    def stats(self) -> Dict:
+        """
+        Returns a snapshot of the coordinator state.
+        """
+        return {
+            "queue_size": self.frontier.qsize(),
+            "leases": len(self.leases),
+            "completed": self.completed,
+            "reissued": self.reissued,
+            "workers": len(self._last_seen),
+            "budget": self.crawl_guard.stats(),
+        }
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """
+        Serves the JSON-lines requests of a worker connection until it is closed.
+        """
+        try:
+            while line := await reader.readline():
+                try:
+                    response = self.handle(json.loads(line))
+                except json.JSONDecodeError as exc:
+                    response = {"error": f"Invalid JSON: {exc}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError as exc:
+            logger.warning("Worker connection lost: %s", exc)
+        finally:
+            writer.close()
+
+    async def serve(self, address: str):
+        """
+        Serves the workers on an address until the crawl is done.
+
+        Once done, workers still polling are told so for up to lease_timeout seconds
+        before the server is closed.
+
+        Args:
+            address (str): host:port or unix:/path/to/socket, see parse_address.
+        """
+        kind, host, port = parse_address(address)
+        if kind == "unix":
+            server = await asyncio.start_unix_server(self.handle_connection, host)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        logger.info("Coordinator serving %s on %s", self.start_url, address)
+
+        reaper = asyncio.create_task(self.reap_periodically(), name="reaper")
+        async with server:
+            await self.frontier.join()
+            reaper.cancel()
+            try:
+                await asyncio.wait_for(self._all_released.wait(), self.lease_timeout)
+            except asyncio.TimeoutError:
+                pass
+        logger.info("Crawl stats: %s", self.stats())
+
+    async def reap_periodically(self):
+        """
+        Re-issues the leases of timed out workers, even when no worker is polling anymore.
+        """
+        while True:
+            await asyncio.sleep(self.lease_timeout / 2)
+            self.reap()
+
+
+class CoordinatorClient:
+    """
+    A client of the Coordinator JSON-lines RPCs.
+
+    Attributes:
+        address (str): host:port or unix:/path/to/socket of the coordinator.
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        """
+        Opens the connection to the coordinator.
+        """
+        kind, host, port = parse_address(self.address)
+        if kind == "unix":
+            self._reader, self._writer = await asyncio.open_unix_connection(host)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(host, port)
+
+    async def call(self, op: str, **params) -> Dict:
+        """
+        Sends a request and waits for its response.
+
+        Args:
+            op (str): The RPC to call.
+            **params: The RPC parameters.
+
+        Returns:
+            dict: The response.
+
+        Raises:
+            ConnectionError: If the coordinator closed the connection.
+            ValueError: If the coordinator rejected the request.
+        """
+        async with self._lock:
+            if self._writer is None:
+                await self.connect()
+            self._writer.write(json.dumps({"op": op, **params}).encode() + b"\n")
+            await self._writer.drain()
+            line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Coordinator closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    async def close(self):
+        """
+        Closes the connection to the coordinator.
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
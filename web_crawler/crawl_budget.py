@@ -0,0 +1,190 @@
+import time
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+from urllib.parse import urlparse
+
+from web_crawler.url_container import URLContainer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CrawlBudget:
+    """
+    Limits of a crawl, None disables a limit.
+
+    Attributes:
+        max_depth (int): Maximum number of links followed from the start URL.
+        max_pages (int): Maximum number of URLs queued over the whole crawl.
+        max_pages_per_host (int): Maximum number of URLs queued per host.
+        max_url_length (int): Maximum length of a URL.
+        max_duration (float): Maximum wall time of the crawl, in seconds.
+        max_segment_repeats (int): Maximum number of times a path segment can appear in a URL,
+            catches /a/b/a/b/... loops.
+        max_query_variants (int): Maximum number of URLs with a query string per path,
+            catches calendars and faceted navigation.
+        max_pages_per_prefix (int): Maximum number of URLs queued per path prefix.
+        prefix_depth (int): Number of path segments making a prefix for max_pages_per_prefix.
+    """
+
+    max_depth: int | None = None
+    max_pages: int | None = None
+    max_pages_per_host: int | None = None
+    max_url_length: int | None = 2048
+    max_duration: float | None = None
+    max_segment_repeats: int | None = 3
+    max_query_variants: int | None = 100
+    max_pages_per_prefix: int | None = None
+    prefix_depth: int = 2
+
+
+class CrawlGuard:
+    """
+    Enforces a CrawlBudget and crawler-trap heuristics when URLs are queued.
+
+    Every check only looks at the URL itself and a few counters, so admitting a URL costs
+    O(1) with respect to the size of the crawl.
+
+    Attributes:
+        budget (CrawlBudget): The limits to enforce.
+        started_at (float): Timestamp the wall time budget is counted from.
+        pages (int): Number of URLs admitted.
+        pages_per_host (Counter): Number of URLs admitted per host.
+        pages_per_prefix (Counter): Number of URLs admitted per host and path prefix.
+        query_variants (Counter): Number of URLs with a query string admitted per host and path.
+        rejections (Counter): Number of URLs rejected per reason.
+    """
+
+    def __init__(
+        self,
+        budget: CrawlBudget | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.budget = budget or CrawlBudget()
+        self._clock = clock
+        self.started_at = clock()
+        self.pages = 0
+        self.pages_per_host = Counter()
+        self.pages_per_prefix = Counter()
+        self.query_variants = Counter()
+        self.rejections = Counter()
+
+    def start(self):
+        """
+        Starts counting the wall time budget.
+        """
+        self.started_at = self._clock()
+
+    @property
+    def remaining_time(self) -> float | None:
+        """
+        Returns the number of seconds left in the wall time budget, None if unlimited.
+        """
+        if self.budget.max_duration is None:
+            return None
+        return max(0.0, self.budget.max_duration - (self._clock() - self.started_at))
+
+    def check(
+        self, url_container: URLContainer, ignore_pages: bool = False
+    ) -> str | None:
+        """
+        Checks a URL against the budget and trap heuristics, without admitting it.
+
+        Args:
+            url_container (URLContainer): The URL about to be queued.
+            ignore_pages (bool): Whether to skip the max_pages check.
+
+        Returns:
+            str or None: The reason the URL is rejected, None if it can be queued.
+        """
+        return self._check(
+            url_container, *self._split(url_container.url), ignore_pages=ignore_pages
+        )
+
+    def admit(self, url_container: URLContainer) -> bool:
+        """
+        Checks a URL and, if it passes, counts it against the budget.
+
+        Args:
+            url_container (URLContainer): The URL about to be queued.
+
+        Returns:
+            bool: True if the URL can be queued.
+        """
+        host, path, query, segments = self._split(url_container.url)
+        reason = self._check(url_container, host, path, query, segments)
+        if reason is not None:
+            self.rejections[reason] += 1
+            logger.debug("Rejected %s - %s budget", url_container.url, reason)
+            return False
+
+        self.pages += 1
+        self.pages_per_host[host] += 1
+        self.pages_per_prefix[self._prefix(host, segments)] += 1
+        if query:
+            self.query_variants[(host, path)] += 1
+        return True
+
+    def stats(self) -> dict:
+        """
+        Returns the number of URLs admitted and rejected per reason.
+        """
+        return {"admitted": self.pages, "rejected": dict(self.rejections)}
+
+    def _check(
+        self,
+        url_container: URLContainer,
+        host: str,
+        path: str,
+        query: str,
+        segments: list,
+        ignore_pages: bool = False,
+    ) -> str | None:
+        budget = self.budget
+        if (
+            budget.max_url_length is not None
+            and len(url_container.url) > budget.max_url_length
+        ):
+            return "url_length"
+        if budget.max_depth is not None and url_container.depth > budget.max_depth:
+            return "depth"
+        if (
+            budget.max_pages is not None
+            and not ignore_pages
+            and self.pages >= budget.max_pages
+        ):
+            return "pages"
+        if self.remaining_time == 0:
+            return "duration"
+        if (
+            budget.max_pages_per_host is not None
+            and self.pages_per_host[host] >= budget.max_pages_per_host
+        ):
+            return "pages_per_host"
+        if budget.max_segment_repeats is not None and segments:
+            if max(Counter(segments).values()) > budget.max_segment_repeats:
+                return "repeated_segments"
+        if (
+            budget.max_query_variants is not None
+            and query
+            and self.query_variants[(host, path)] >= budget.max_query_variants
+        ):
+            return "query_variants"
+        if (
+            budget.max_pages_per_prefix is not None
+            and self.pages_per_prefix[self._prefix(host, segments)]
+            >= budget.max_pages_per_prefix
+        ):
+            return "pages_per_prefix"
+        return None
+
+    @staticmethod
+    def _split(url: str) -> tuple:
+        url_parsed = urlparse(url)
+        segments = [segment for segment in url_parsed.path.split("/") if segment]
+        return url_parsed.hostname or "", url_parsed.path, url_parsed.query, segments
+
+    def _prefix(self, host: str, segments: list) -> tuple:
+        return (host, *segments[: self.budget.prefix_depth])
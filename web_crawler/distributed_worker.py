@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from typing import Dict, List
+
+from web_crawler.coordinator import CoordinatorClient
+from web_crawler.robot_parser import RobotParser
+from web_crawler.rate_limiter import RateLimiter
+from web_crawler.url_container import URLContainer
+from web_crawler.web_crawler import WebCrawler
+
+logger = logging.getLogger(__name__)
+
+
+class DistributedWorker(WebCrawler):
+    """
+    A web crawler taking its URLs from a Coordinator, to crawl across several machines.
+
+    URLs are leased from the coordinator into the local frontier, up to prefetch at a time,
+    and crawled as usual. Discovered URLs, completed leases and the robots.txt rates of
+    the hosts fetched are sent back in batches every sync_interval. Discoveries are always
+    sent before the completion of the lease they come from, so the coordinator never sees
+    an empty crawl while links are still on their way.
+
+    Attributes:
+        client (CoordinatorClient): Connection to the coordinator.
+        worker_id (str): Name of the worker, unique across the crawl.
+        prefetch (int): Maximum number of URLs leased at a time, defaults to twice num_workers.
+        sync_interval (float): Number of seconds between two syncs with the coordinator.
+        leases (Dict[str, int]): Lease id of each leased URL not completed yet.
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        client: CoordinatorClient,
+        worker_id: str,
+        prefetch: int | None = None,
+        sync_interval: float = 0.05,
+        **kwargs,
+    ):
+        super().__init__(start_url, **kwargs)
+        self.client = client
+        self.worker_id = worker_id
+        self.prefetch = prefetch or 2 * self.num_workers
+        self.sync_interval = sync_interval
+        self.leases: Dict[str, int] = {}
+        self.discovered: List[list] = []
+        self.completed: List[int] = []
+        self.rates: Dict[str, float] = {}
+        self.coordinator_done = False
+
+    @classmethod
+    async def connect(cls, address: str, worker_id: str, **kwargs):
+        """
+        Connects to a coordinator and returns a worker for its crawl.
+
+        Args:
+            address (str): host:port or unix:/path/to/socket of the coordinator.
+            worker_id (str): Name of the worker, unique across the crawl.
+            **kwargs: Arguments of the worker, see DistributedWorker and WebCrawler.
+
+        Returns:
+            DistributedWorker: The worker, crawl_with_workers starts it.
+        """
+        client = CoordinatorClient(address)
+        await client.connect()
+        hello = await client.call("hello", worker=worker_id)
+        return cls(hello["start_url"], client, worker_id, **kwargs)
+
+    async def seed(self):
+        """
+        The coordinator queues the start URL.
+        """
+
+    async def enqueue(self, url_container: URLContainer):
+        """
+        Buffers a discovered URL, to be sent to the coordinator.
+        """
+        self.discovered.append(
+            [url_container.url, url_container.depth, url_container.parent]
+        )
+
+    def finish(self, url_container: URLContainer):
+        """
+        Buffers the completion of a leased URL, to be sent to the coordinator.
+        """
+        super().finish(url_container)
+        lease_id = self.leases.pop(url_container.url, None)
+        if lease_id is not None:
+            self.completed.append(lease_id)
+
+    def configure_host(self, host: str, robot_parser: RobotParser):
+        """
+        Applies the robots.txt crawling parameters of a host, and shares them with the coordinator.
+        """
+        super().configure_host(host, robot_parser)
+        rate = RateLimiter.rate_from_robots(*robot_parser.rate_directives())
+        if rate is not None:
+            self.rates[host] = rate
+
+    async def sync(self):
+        """
+        Sends the buffered discoveries and completions, then leases URLs up to prefetch.
+        """
+        discovered, self.discovered = self.discovered, []
+        completed, self.completed = self.completed, []
+        rates, self.rates = self.rates, {}
+        if discovered:
+            await self.client.call("discover", worker=self.worker_id, urls=discovered)
+        if completed or rates:
+            await self.client.call(
+                "complete", worker=self.worker_id, ids=completed, rates=rates
+            )
+        response = await self.client.call(
+            "lease", worker=self.worker_id, max=max(0, self.prefetch - len(self.leases))
+        )
+        for lease_id, url, depth, parent in response["urls"]:
+            self.leases[url] = lease_id
+            self.to_visit_queue.put_nowait(
+                URLContainer(url, depth=depth, parent=parent)
+            )
+        self.coordinator_done = response["done"]
+
+    async def wait_until_done(self):
+        """
+        Syncs with the coordinator until it reports the crawl is done.
+
+        A coordinator gone away is taken as the end of the crawl.
+        """
+        try:
+            while True:
+                await self.sync()
+                if self.coordinator_done and not self.leases:
+                    return
+                await asyncio.sleep(self.sync_interval)
+        except ConnectionError as exc:
+            logger.warning("%s - stopping worker %s", exc, self.worker_id)
+        finally:
+            await self.client.close()
@@ -0,0 +1,131 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+EVENT_LOOPS = ("auto", "asyncio", "uvloop")
+
+
+def loop_factory(
+    event_loop: str = "auto",
+) -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """
+    Returns the factory of the requested event loop, to be given to asyncio.Runner.
+
+    uvloop is an optional dependency, "auto" uses it when it is installed and falls back
+    to the default asyncio event loop otherwise.
+
+    Args:
+        event_loop (str): One of "auto", "asyncio" or "uvloop".
+
+    Returns:
+        Callable or None: The event loop factory, None for the default asyncio event loop.
+
+    Raises:
+        ValueError: If the event loop is unknown.
+        ImportError: If uvloop is requested but not installed.
+    """
+    if event_loop not in EVENT_LOOPS:
+        raise ValueError(f"Unknown event loop: {event_loop}")
+    if event_loop == "asyncio":
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        if event_loop == "uvloop":
+            raise
+        logger.info("uvloop is not installed - using the asyncio event loop")
+        return None
+    return uvloop.new_event_loop
+
+
+def run(main, event_loop: str = "auto"):
+    """
+    Runs a coroutine in a new event loop of the requested kind, like asyncio.run.
+
+    Args:
+        main (Coroutine): The coroutine to run.
+        event_loop (str): One of "auto", "asyncio" or "uvloop", see loop_factory.
+
+    Returns:
+        The result of the coroutine.
+    """
+    with asyncio.Runner(loop_factory=loop_factory(event_loop)) as runner:
+        return runner.run(main)
+
+
+class LoopLagMonitor:
+    """
+    Samples the event loop scheduling delay, to catch CPU work blocking the loop.
+
+    A sampler task sleeps for interval seconds in a loop and measures how late it wakes
+    up. While the loop is free the lag stays close to zero, a callback running for 100ms
+    (parsing a huge page, serializing the storage) shows up as a 100ms sample.
+
+    Attributes:
+        interval (float): Number of seconds between two samples.
+        warn_threshold (float): Lag in seconds above which a warning is logged.
+        samples (deque): Most recent lag samples, in seconds.
+        max_lag (float): Highest lag sampled since the start.
+        count (int): Number of samples taken since the start.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        window_size: int = 1000,
+        warn_threshold: float = 0.25,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.samples: deque = deque(maxlen=window_size)
+        self.max_lag = 0.0
+        self.count = 0
+        self._clock = clock
+
+    def record(self, lag: float):
+        """
+        Records a lag sample.
+
+        Args:
+            lag (float): Number of seconds the sampler woke up late.
+        """
+        lag = max(0.0, lag)
+        self.samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        self.count += 1
+        if lag >= self.warn_threshold:
+            logger.warning("Event loop blocked for %0.0fms", lag * 1000)
+
+    async def run(self):
+        """
+        Samples the loop lag until cancelled.
+        """
+        while True:
+            expected = self._clock() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(self._clock() - expected)
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Returns a percentile of the recent lag samples, in seconds.
+        """
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+
+    def stats(self) -> Dict:
+        """
+        Returns the p50, p99 and max loop lag in milliseconds, and the number of samples.
+        """
+        return {
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(self.max_lag * 1000, 2),
+            "samples": self.count,
+        }
@@ -8,7 +8,9 @@ class WebCrawlerException(Exception):
 class RateLimitException(WebCrawlerException):
     """Raised when crawler hits rate limits."""
 
-    pass
+    def __init__(self, message, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__(message)
 
 
 class RedirectException(WebCrawlerException):
@@ -36,3 +38,9 @@ class GenericCrawlerException(WebCrawlerException):
     """Raised when an unknown error occurs."""
 
     pass
+
+
+class FrontierClosed(WebCrawlerException):
+    """Raised when getting a URL from a closed frontier."""
+
+    pass
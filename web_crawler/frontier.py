@@ -0,0 +1,346 @@
+import asyncio
+import heapq
+import itertools
+import time
+import logging
+from typing import Callable, Dict, Iterator, List, Set, Tuple
+
+from web_crawler.rate_limiter import RateLimiter, host_key
+from web_crawler.concurrency_controller import AdaptiveConcurrencyController
+from web_crawler.url_container import URLContainer
+from web_crawler.scoring import Scorer
+from web_crawler.exceptions import FrontierClosed
+
+logger = logging.getLogger(__name__)
+
+
+class IndexedHeap:
+    """
+    A binary min-heap of URLs keyed by URL, supporting in-place priority updates.
+
+    The heap holds the URL containers themselves, ordered by their priority then url_id,
+    so an entry costs a container and a position, with no wrapper per entry.
+    push, pop and update are O(log n), contains is O(1). Entries with the same priority are
+    popped in insertion order.
+    """
+
+    def __init__(self):
+        self._entries: List[URLContainer] = []
+        self._positions: Dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def __iter__(self) -> Iterator[URLContainer]:
+        return iter(self._entries)
+
+    def get(self, key: str) -> URLContainer:
+        """
+        Returns the queued URL container of a key.
+        """
+        return self._entries[self._positions[key]]
+
+    def push(self, item: URLContainer, priority: float):
+        """
+        Adds a URL, it must not be queued already.
+        """
+        item.priority = priority
+        item.url_id = next(self._counter)
+        self._entries.append(item)
+        self._positions[item.url] = len(self._entries) - 1
+        self._sift_up(len(self._entries) - 1)
+
+    def pop(self) -> URLContainer:
+        """
+        Removes and returns the URL with the lowest priority.
+        """
+        last = self._entries.pop()
+        if not self._entries:
+            del self._positions[last.url]
+            return last
+        top = self._entries[0]
+        self._entries[0] = last
+        self._positions[last.url] = 0
+        del self._positions[top.url]
+        self._sift_down(0)
+        return top
+
+    def update(self, key: str, priority: float):
+        """
+        Changes the priority of a queued key.
+        """
+        position = self._positions[key]
+        entry = self._entries[position]
+        previous = entry.priority
+        entry.priority = priority
+        if priority < previous:
+            self._sift_up(position)
+        else:
+            self._sift_down(position)
+
+    def _less(self, i: int, j: int) -> bool:
+        a, b = self._entries[i], self._entries[j]
+        return a.priority < b.priority or (
+            a.priority == b.priority and a.url_id < b.url_id
+        )
+
+    def _swap(self, i: int, j: int):
+        entries = self._entries
+        entries[i], entries[j] = entries[j], entries[i]
+        self._positions[entries[i].url] = i
+        self._positions[entries[j].url] = j
+
+    def _sift_up(self, position: int):
+        while position > 0:
+            parent = (position - 1) >> 1
+            if self._less(position, parent):
+                self._swap(position, parent)
+                position = parent
+            else:
+                break
+
+    def _sift_down(self, position: int):
+        size = len(self._entries)
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < size and self._less(child, smallest):
+                    smallest = child
+            if smallest == position:
+                return
+            self._swap(position, smallest)
+            position = smallest
+
+
+class Frontier:
+    """
+    A host-partitioned crawl frontier, after the Mercator back queues design.
+
+    URLs are split into one back queue per host, and hosts with queued URLs are kept in a
+    heap ordered by the time they may be fetched next. Each back queue is a priority queue
+    ordered by the scorer, FIFO when there is none. A URL discovered again while queued is
+    not queued twice, its priority is bumped in place if the new score is better. A get only returns a URL whose
+    host can be fetched right away, according to the rate limiter (politeness, pauses) and
+    the concurrency controller (in-flight fetches), so a busy host never stalls the workers
+    while other hosts are idle.
+
+    The interface mirrors asyncio.Queue (put, get, task_done, join, qsize) so it can be used
+    as a drop-in replacement of the crawler queue.
+
+    Attributes:
+        rate_limiter (RateLimiter, optional): Politeness budget deciding when a host is ready.
+        concurrency_controller (AdaptiveConcurrencyController, optional): In-flight limits per host.
+        scorer (Scorer, optional): Function giving the priority of a URL, lower is crawled first.
+        queues (Dict[str, IndexedHeap]): Back queues keyed by host.
+    """
+
+    def __init__(
+        self,
+        rate_limiter: RateLimiter | None = None,
+        concurrency_controller: AdaptiveConcurrencyController | None = None,
+        scorer: Scorer | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate_limiter = rate_limiter
+        self.concurrency_controller = concurrency_controller
+        self.scorer = scorer
+        self.queues: Dict[str, IndexedHeap] = {}
+        self._clock = clock
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        # Hosts with queued URLs are either scheduled in the heap or blocked on concurrency
+        self._scheduled: Set[str] = set()
+        self._blocked: Set[str] = set()
+        self._size = 0
+        self._unfinished_tasks = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+        self._changed = asyncio.Event()
+        self._closed = False
+
+    def qsize(self) -> int:
+        """
+        Returns the number of queued URLs.
+        """
+        return self._size
+
+    def empty(self) -> bool:
+        """
+        Returns True if no URL is queued.
+        """
+        return self._size == 0
+
+    @property
+    def unfinished_tasks(self) -> int:
+        """
+        Returns the number of URLs queued or being processed.
+        """
+        return self._unfinished_tasks
+
+    def __contains__(self, url: str) -> bool:
+        queue = self.queues.get(host_key(url))
+        return queue is not None and url in queue
+
+    def items(self) -> Iterator[URLContainer]:
+        """
+        Iterates over the queued URLs, host by host.
+        """
+        for queue in self.queues.values():
+            yield from queue
+
+    def put_nowait(self, item: URLContainer):
+        """
+        Queues a URL in its host back queue, or bumps its priority if it is already queued.
+
+        Args:
+            item (URLContainer): The URL to queue.
+        """
+        host = host_key(item.url)
+        priority = self.scorer(item) if self.scorer is not None else 0.0
+        queue = self.queues.get(host)
+        if queue is None:
+            queue = self.queues[host] = IndexedHeap()
+        elif item.url in queue:
+            queued = queue.get(item.url)
+            if priority < queued.priority:
+                if item.depth < queued.depth:
+                    queued.depth, queued.parent = item.depth, item.parent
+                queue.update(item.url, priority)
+            return
+        queue.push(item, priority)
+        self._size += 1
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        if host not in self._scheduled and host not in self._blocked:
+            self._schedule(host, self._clock())
+        self._changed.set()
+
+    async def put(self, item: URLContainer):
+        """
+        Queues a URL in its host back queue, see put_nowait.
+        """
+        self.put_nowait(item)
+
+    def get_nowait(self) -> URLContainer:
+        """
+        Returns a URL whose host can be fetched now.
+
+        Raises:
+            asyncio.QueueEmpty: If no host is ready.
+            FrontierClosed: If the frontier is closed.
+        """
+        if self._closed:
+            raise FrontierClosed("Frontier closed")
+        item = self._pop_ready()
+        if item is None:
+            raise asyncio.QueueEmpty()
+        return item
+
+    async def get(self) -> URLContainer:
+        """
+        Waits for a URL whose host can be fetched now and returns it.
+
+        Raises:
+            FrontierClosed: If the frontier is closed, waiting getters are woken up.
+        """
+        while True:
+            if self._closed:
+                raise FrontierClosed("Frontier closed")
+            item = self._pop_ready()
+            if item is not None:
+                return item
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - self._clock())
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def task_done(self):
+        """
+        Marks a URL returned by get as processed.
+
+        Raises:
+            ValueError: If called more times than there were URLs queued.
+        """
+        if self._unfinished_tasks <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished_tasks -= 1
+        if self._unfinished_tasks == 0:
+            self._finished.set()
+
+    async def join(self):
+        """
+        Waits until every queued URL has been processed.
+        """
+        await self._finished.wait()
+
+    @property
+    def closed(self) -> bool:
+        """
+        Returns True once the frontier is closed.
+        """
+        return self._closed
+
+    def close(self):
+        """
+        Stops handing out URLs, get raises FrontierClosed from now on.
+
+        URLs can still be queued, and the queued ones are kept so they can be saved, see items.
+        """
+        self._closed = True
+        self._changed.set()
+
+    def wake(self, host: str):
+        """
+        Reschedules a host blocked on concurrency, called when one of its fetch slots is freed.
+
+        Args:
+            host (str): The host that freed a slot.
+        """
+        if host in self._blocked:
+            self._blocked.discard(host)
+            self._schedule(host, self._clock())
+            self._changed.set()
+
+    def _pop_ready(self) -> URLContainer | None:
+        now = self._clock()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, host = heapq.heappop(self._heap)
+            self._scheduled.discard(host)
+
+            if (
+                self.concurrency_controller is not None
+                and not self.concurrency_controller.available(host)
+            ):
+                self._blocked.add(host)
+                continue
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.delay(host)
+                if delay > 0:
+                    self._schedule(host, now + delay)
+                    continue
+
+            queue = self.queues[host]
+            item = queue.pop()
+            self._size -= 1
+            if queue:
+                # The returned URL is about to take the next token of the host
+                delay = 0.0
+                if self.rate_limiter is not None:
+                    delay = self.rate_limiter.delay(host, reservations=1)
+                self._schedule(host, now + delay)
+            else:
+                del self.queues[host]
+            return item
+        return None
+
+    def _schedule(self, host: str, ready_at: float):
+        heapq.heappush(self._heap, (ready_at, next(self._counter), host))
+        self._scheduled.add(host)
@@ -0,0 +1,248 @@
+"""
+Compact binary export of the crawled link graph, read back through memory maps.
+
+The graph is a directory of flat little-endian files:
+- urls.bin: the URLs of the nodes, UTF-8, sorted and concatenated
+- url_offsets.bin: uint64, node i is urls.bin[url_offsets[i]:url_offsets[i + 1]]
+- indptr.bin: uint32, the links of node i are indices[indptr[i]:indptr[i + 1]]
+- indices.bin: uint32, the target node of each link, sorted per source node
+- graph.json: the format version, node and link counts
+
+indptr and indices are the CSR arrays of the adjacency matrix, as in scipy.sparse, and
+load with numpy.memmap or numpy.frombuffer as they are. To convert the JSON output of a crawl:
+
+    python -m web_crawler.link_graph storage.json graph/
+"""
+
+import sys
+import json
+import mmap
+import argparse
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+FORMAT_VERSION = 1
+FILES = ("urls.bin", "url_offsets.bin", "indptr.bin", "indices.bin")
+MAX_UINT32 = 2**32 - 1
+
+
+def _write_array(path: Path, values: array):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    with open(path, "wb") as f:
+        values.tofile(f)
+
+
+class LinkGraph:
+    """
+    Read-only link graph over memory-mapped CSR files, see the module docstring for the layout.
+
+    Opening the graph only maps its files, the pages are read by the OS on first access, so it
+    takes the same time whatever its size. neighbors() returns a view of the mapped indices
+    without copying them, node() looks a URL up by binary search over the sorted URL table.
+
+    Attributes:
+        directory (Path): Directory of the graph files.
+        indptr (memoryview): uint32 CSR row pointers, one per node plus one.
+        indices (memoryview): uint32 target node of each link.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / "graph.json").read_text())
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported link graph version {meta['version']} in {self.directory}"
+            )
+        self._maps: List[mmap.mmap] = []
+        self._urls = self._map("urls.bin")
+        self._offsets = self._map("url_offsets.bin", "Q")
+        self.indptr = self._map("indptr.bin", "I")
+        self.indices = self._map("indices.bin", "I")
+        if len(self.indptr) != meta["nodes"] + 1 or len(self.indices) != meta["links"]:
+            self.close()
+            raise ValueError(f"Truncated link graph files in {self.directory}")
+
+    def _map(self, name: str, typecode: str | None = None) -> memoryview | mmap.mmap:
+        """
+        Maps a file, as a typed memoryview if a typecode is given, else as bytes.
+        """
+        with open(self.directory / name, "rb") as f:
+            if f.seek(0, 2) == 0:
+                # Empty files cannot be mapped
+                return memoryview(array(typecode or "B"))
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        if typecode is None:
+            # Slices of the map are bytes, one copy per URL compared
+            return mapped
+        if sys.byteorder == "big":
+            # Swapped copy, the files are little-endian
+            values = array(typecode, mapped)
+            values.byteswap()
+            return memoryview(values)
+        return memoryview(mapped).cast(typecode)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_links(self) -> int:
+        return len(self.indices)
+
+    def _url_bytes(self, node: int) -> bytes:
+        offsets = self._offsets
+        return self._urls[offsets[node] : offsets[node + 1]]
+
+    def url(self, node: int) -> str:
+        return str(self._url_bytes(node), "utf-8")
+
+    def node(self, url: str) -> int:
+        """
+        Returns the node of a URL.
+
+        Raises:
+            KeyError: If the URL is not in the graph.
+        """
+        key = url.encode()
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._url_bytes(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self._url_bytes(low) == key:
+            return low
+        raise KeyError(url)
+
+    def neighbors(self, node: int) -> memoryview:
+        """
+        Returns the target nodes of the links of a node, a view of the mapped indices.
+        """
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+    def links(self, url: str) -> List[str]:
+        """
+        Returns the URLs a URL links to, sorted.
+        """
+        return [self.url(target) for target in self.neighbors(self.node(url))]
+
+    def numpy(self) -> Tuple["numpy.ndarray", "numpy.ndarray"]:
+        """
+        Returns the indptr and indices arrays as read-only NumPy arrays over the same memory,
+        to build a scipy.sparse.csr_matrix for instance.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        import numpy
+
+        return (
+            numpy.frombuffer(self.indptr, dtype="<u4"),
+            numpy.frombuffer(self.indices, dtype="<u4"),
+        )
+
+    def close(self):
+        """
+        Releases the views and memory maps, the arrays returned by numpy() must be released first.
+        """
+        for view in (self._offsets, self.indptr, self.indices):
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps.clear()
+
+    def __enter__(self) -> "LinkGraph":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def write(links: Mapping[str, Iterable[str]], directory: Path) -> Tuple[int, int]:
+        """
+        Writes a link graph. Its nodes are the pages and the targets of their links, duplicate
+        links are written once.
+
+        Args:
+            links (Mapping[str, Iterable[str]]): The URLs each page links to, by page URL.
+            directory (Path): Directory the files are written to, created if needed.
+
+        Returns:
+            Tuple[int, int]: The number of nodes and links written.
+
+        Raises:
+            ValueError: If the graph has more links than uint32 indices can address.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        urls = set(links)
+        for targets in links.values():
+            urls.update(targets)
+        encoded = sorted(url.encode() for url in urls)
+        ids: Dict[str, int] = {str(url, "utf-8"): i for i, url in enumerate(encoded)}
+
+        offsets = array("Q", [0])
+        position = 0
+        for url in encoded:
+            position += len(url)
+            offsets.append(position)
+        indptr = array("I", [0])
+        indices = array("I")
+        for url in ids:
+            targets = links.get(url)
+            if targets:
+                indices.extend(sorted({ids[target] for target in targets}))
+                if len(indices) > MAX_UINT32:
+                    raise ValueError(
+                        f"More than {MAX_UINT32} links, too many for uint32 indices"
+                    )
+            indptr.append(len(indices))
+
+        with open(directory / "urls.bin", "wb") as f:
+            f.write(b"".join(encoded))
+        _write_array(directory / "url_offsets.bin", offsets)
+        _write_array(directory / "indptr.bin", indptr)
+        _write_array(directory / "indices.bin", indices)
+        (directory / "graph.json").write_text(
+            json.dumps(
+                {
+                    "version": FORMAT_VERSION,
+                    "nodes": len(ids),
+                    "links": len(indices),
+                    "files": list(FILES),
+                    "byteorder": "little",
+                }
+            )
+        )
+        return len(ids), len(indices)
+
+    @classmethod
+    def from_storage(cls, path: Path, directory: Path) -> Tuple[int, int]:
+        """
+        Converts the JSON output of a crawl, as written by StorageClient, into a link graph.
+        Pages stored without content are nodes without links.
+        """
+        with open(path, "r") as f:
+            storage = json.load(f)
+        return cls.write(
+            {url: (data or {}).get("links", ()) for url, data in storage.items()},
+            directory,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("storage", type=Path, help="JSON output of a crawl")
+    parser.add_argument("output", type=Path, help="Directory of the link graph files")
+    args = parser.parse_args()
+
+    nodes, links = LinkGraph.from_storage(args.storage, args.output)
+    print(f"{nodes} nodes and {links} links written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import time
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+LOG_FORMAT = "%(asctime)s %(levelname)s:%(name)s: %(message)s"
+
+
+class LogSampler(logging.Filter):
+    """
+    Rate limits then samples the log records of each call site.
+
+    A crawl logs the same few lines for every URL, "Visiting %s", "Crawling %s", and on big
+    crawls those are most of the logging cost. Each call site, keyed by file and line, lets
+    burst records through per period, then one record in sample_every, and drops the
+    others. The next record let through tells how many were dropped. Records at or above
+    always_level always go through.
+
+    Attributes:
+        burst (int): Number of records of a call site let through per period.
+        period (float): Number of seconds of a rate limiting window.
+        sample_every (int): One record in sample_every is let through past the burst, 0 to drop them all.
+        always_level (int): Records at or above this level are never dropped.
+    """
+
+    def __init__(
+        self,
+        burst: int = 10,
+        period: float = 1.0,
+        sample_every: int = 100,
+        always_level: int = logging.ERROR,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.sample_every = sample_every
+        self.always_level = always_level
+        self._clock = clock
+        # Window start, records in the window and records dropped since the last one let through, by call site
+        self._windows: Dict[Tuple[str, int], List] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.always_level:
+            return True
+        key = (record.pathname, record.lineno)
+        now = self._clock()
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = [now, 0, 0]
+        elif now - window[0] >= self.period:
+            window[0] = now
+            window[1] = 0
+        window[1] += 1
+        excess = window[1] - self.burst
+        if excess > 0 and (not self.sample_every or excess % self.sample_every):
+            window[2] += 1
+            return False
+        if window[2]:
+            record.msg = f"{record.getMessage()} ({window[2]} similar messages dropped)"
+            record.args = ()
+            window[2] = 0
+        return True
+
+
+def configure_logging(
+    level: int | str = logging.INFO,
+    log_file: Path | None = Path("debug.log"),
+    sampler: LogSampler | None = None,
+) -> QueueListener:
+    """
+    Configures the root logger to hand records over to a listener thread, writing them to the console and a file.
+
+    Writing to the file and the console happens in the listener thread, so it does not
+    block the event loop. Records are dropped by the sampler, if given, before being
+    formatted and queued. The listener is stopped, flushing the queued records, at exit.
+
+    Args:
+        level (int | str): Level of the root logger.
+        log_file (Path, optional): File the records are written to, truncated first. None for the console only.
+        sampler (LogSampler, optional): Filter dropping records before they are queued.
+
+    Returns:
+        QueueListener: The started listener.
+    """
+    formatter = logging.Formatter(LOG_FORMAT, datefmt="%H:%M:%S")
+    handlers = [logging.StreamHandler()]
+    if log_file is not None:
+        handlers.append(logging.FileHandler(log_file, mode="w", encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # Only merges the arguments into the message, the listener handlers format the record
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    if sampler is not None:
+        queue_handler.addFilter(sampler)
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,344 @@
+import os
+import math
+import asyncio
+import logging
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from a cached page to a slow server
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    """
+    A value that only goes up, e.g. a number of pages.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Gauge:
+    """
+    A value that goes up and down, set on updates or read from a function when collected.
+    """
+
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Callable[[], float] | None = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """
+        Reads the value from the function when collected, so it costs nothing on updates.
+        """
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class Histogram:
+    """
+    Counts observations in fixed buckets, e.g. latencies.
+
+    Attributes:
+        buckets (Tuple[float]): Upper bounds of the buckets, sorted, the last bucket is unbounded.
+        counts (List[int]): Number of observations in each bucket, not cumulative.
+        sum (float): Sum of the observations.
+    """
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricFamily:
+    """
+    A metric and its children, one per combination of label values.
+
+    Attributes:
+        name (str): Name of the metric.
+        help (str): Description of the metric.
+        kind (str): counter, gauge or histogram.
+        label_names (Tuple[str]): Names of the labels, empty for a metric without labels.
+        children (Dict[Tuple[str], Counter | Gauge | Histogram]): Children keyed by label values.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        factory: Callable,
+        label_names: Tuple[str, ...] = (),
+    ):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.label_names = label_names
+        self.children: Dict[Tuple[str, ...], Counter | Gauge | Histogram] = {}
+        self._factory = factory
+
+    def labels(self, *values) -> Counter | Gauge | Histogram:
+        """
+        Returns the child of the label values, created on first use.
+
+        Hot paths should keep the child around rather than looking it up on each update.
+        """
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._factory()
+        return child
+
+    def render(self) -> List[str]:
+        """
+        Returns the lines of the metric in the Prometheus text format.
+        """
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self.children.items():
+            labels = [
+                f'{name}="{_escape(str(value))}"'
+                for name, value in zip(self.label_names, values)
+            ]
+            if self.kind == "histogram":
+                cumulative = 0
+                for bound, count in zip((*child.buckets, math.inf), child.counts):
+                    cumulative += count
+                    bucket_labels = _labels([*labels, f'le="{_number(bound)}"'])
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {_number(child.sum)}")
+                lines.append(f"{self.name}_count{_labels(labels)} {cumulative}")
+            else:
+                value = child.get() if self.kind == "gauge" else child.value
+                lines.append(f"{self.name}{_labels(labels)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics of a process and exports them in the Prometheus text format.
+
+    Updates are plain attribute updates on slotted objects, a fraction of a microsecond,
+    and formatting only happens when the metrics are collected. Metrics without labels
+    are returned directly, metrics with labels as a MetricFamily to get children from.
+
+    Exported over HTTP for Prometheus to scrape, see `serve`, or written periodically to a
+    file, e.g. for the node_exporter textfile collector, see `write_periodically`.
+    """
+
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+
+    def _register(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        factory: Callable,
+        labels: Tuple[str, ...],
+    ):
+        if name in self.families:
+            raise ValueError(f"Metric {name} already registered")
+        family = self.families[name] = MetricFamily(name, help, kind, factory, labels)
+        return family if labels else family.labels()
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        """
+        Registers a counter, returns it, or its family if it has labels.
+        """
+        return self._register(name, help, "counter", Counter, labels)
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        """
+        Registers a gauge, returns it, or its family if it has labels.
+        """
+        return self._register(name, help, "gauge", Gauge, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        """
+        Registers a histogram with the given bucket upper bounds, returns it, or its family if it has labels.
+        """
+        return self._register(
+            name, help, "histogram", lambda: Histogram(buckets), labels
+        )
+
+    def render(self) -> str:
+        """
+        Returns all the metrics in the Prometheus text format.
+        """
+        lines = []
+        for family in self.families.values():
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path):
+        """
+        Writes the metrics to a file, replacing it atomically so readers never see a partial snapshot.
+        """
+        temporary_path = path.with_name(f"{path.name}.tmp")
+        temporary_path.write_text(self.render())
+        os.replace(temporary_path, path)
+
+    async def write_periodically(self, path: Path, interval: float):
+        """
+        Writes the metrics to a file every interval seconds, until cancelled.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.write(path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Answers an HTTP request with the metrics, whatever its path.
+        """
+        try:
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            body = self.render().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                b"Connection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, port: int, host: str = "0.0.0.0") -> asyncio.Server:
+        """
+        Serves the metrics over HTTP for Prometheus to scrape.
+
+        Args:
+            port (int): Port to listen on, 0 picks a free port.
+            host (str): Address to listen on.
+
+        Returns:
+            asyncio.Server: The listening server, to be closed once done.
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info(
+            "Serving metrics on http://%s:%s/metrics",
+            host,
+            server.sockets[0].getsockname()[1],
+        )
+        return server
+
+    @asynccontextmanager
+    async def exporting(
+        self,
+        port: int | None = None,
+        path: Path | None = None,
+        interval: float = 15.0,
+    ):
+        """
+        Exports the metrics within the context, over HTTP and to a file, each one if given.
+
+        The file is written one last time on exit, so it holds the final values of the run.
+        """
+        server = await self.serve(port) if port is not None else None
+        writer = (
+            asyncio.create_task(self.write_periodically(path, interval))
+            if path is not None
+            else None
+        )
+        try:
+            yield self
+        finally:
+            if writer is not None:
+                writer.cancel()
+                self.write(path)
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+
+
+class CrawlMetrics(MetricsRegistry):
+    """
+    The metrics of a crawler.
+
+    Attributes:
+        fetch_seconds (MetricFamily): Fetch latency histogram by status code, error for network errors.
+        parse_seconds (Histogram): Parse time histogram.
+        downloaded_bytes (Counter): Bytes of content downloaded.
+        links_found (Counter): In-scope links found on the pages.
+        links_duplicate (Counter): Links found already crawled, the dedup hit rate is their ratio.
+        robots_denied (Counter): URLs skipped because of robots.txt.
+        retries (MetricFamily): Retries scheduled by reason, rate_limit or error.
+        queue_depth (MetricFamily): URLs waiting in the frontier and in each stage queue, by queue.
+        in_flight (Gauge): URLs between their fetch and their store.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.fetch_seconds = self.histogram(
+            "crawler_fetch_seconds", "Fetch latency by status code", ("status",)
+        )
+        self.parse_seconds = self.histogram(
+            "crawler_parse_seconds", "Time spent extracting the links of a page"
+        )
+        self.downloaded_bytes = self.counter(
+            "crawler_downloaded_bytes_total", "Bytes of content downloaded"
+        )
+        self.links_found = self.counter(
+            "crawler_links_found_total", "In-scope links found on the crawled pages"
+        )
+        self.links_duplicate = self.counter(
+            "crawler_links_duplicate_total", "Links found that were already crawled"
+        )
+        self.robots_denied = self.counter(
+            "crawler_robots_denied_total",
+            "URLs skipped because robots.txt disallows them",
+        )
+        self.retries = self.counter(
+            "crawler_retries_total", "Retries scheduled by reason", ("reason",)
+        )
+        self.queue_depth = self.gauge(
+            "crawler_queue_depth", "Items waiting in each queue", ("queue",)
+        )
+        self.in_flight = self.gauge(
+            "crawler_in_flight", "URLs fetched and not stored yet"
+        )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: List[str]) -> str:
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
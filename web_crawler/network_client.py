@@ -1,10 +1,54 @@
 import httpx
+import hashlib
 import uuid
+import time
 import logging
-from bs4 import BeautifulSoup
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List
+from urllib.parse import urljoin, urldefrag
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+from web_crawler.exceptions import RedirectException
 
 logger = logging.getLogger(__name__)
 
+REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of a fetch, once its redirect chain has been resolved.
+
+    Attributes:
+        url (str): The requested URL.
+        final_url (str): The URL the redirect chain ended on.
+        status_code (int): Status code of the last response, a redirect status code if the
+            last redirect was not followed.
+        html (BeautifulSoup | None): Parsed content of the final URL, None if it was not fetched or not parsed.
+        text (str | None): Raw content of the final URL, None if it was not fetched.
+        redirects (List[str]): URLs that redirected, in hop order, the requested URL first.
+        content_hash (str | None): SHA-1 digest of the final URL content, None if it was not fetched.
+        size (int): Number of bytes of the final URL content, 0 if it was not fetched.
+        elapsed (float): Number of seconds the fetch took, redirects included.
+    """
+
+    url: str
+    final_url: str
+    status_code: int
+    html: "BeautifulSoup | None" = None
+    redirects: List[str] = field(default_factory=list)
+    content_hash: str | None = None
+    text: str | None = None
+    size: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def followed(self) -> bool:
+        return self.status_code not in REDIRECT_STATUS_CODES
+
 
 class NetworkClient:
     """
@@ -13,20 +57,141 @@ class NetworkClient:
     Attributes:
         client (httpx.AsyncClient): An instance of httpx.AsyncClient used to make HTTP requests.
 
+        max_redirects (int): Maximum number of redirects followed for a single fetch.
+
+        proxy (str, optional): URL of the HTTP proxy the default client sends its requests through.
+
     Methods:
-        __init__(client=httpx.AsyncClient): Initializes the NetworkClient with an optional httpx.AsyncClient instance.
+        __init__(client=None): Initializes the NetworkClient with an optional httpx.AsyncClient instance, a pooled one with retries by default.
+        fetch(url: str) -> FetchResult: Asynchronously queries the given URL, resolving redirects.
         query_html(url: str) -> str: Asynchronously queries the given URL and returns the HTML content.
     """
 
     def __init__(
         self,
-        client: httpx.AsyncClient = httpx.AsyncClient(
+        client: httpx.AsyncClient | None = None,
+        max_redirects: int = 5,
+        proxy: str | None = None,
+    ):
+        # Created here rather than as a default argument, loading the TLS certificates at import slows down the start
+        self.client = client or httpx.AsyncClient(
             timeout=5,
             follow_redirects=False,
-            transport=httpx.AsyncHTTPTransport(retries=3),
-        ),
-    ):
-        self.client = client
+            transport=httpx.AsyncHTTPTransport(retries=3, proxy=proxy),
+        )
+        self.max_redirects = max_redirects
+
+    async def fetch(
+        self,
+        url: str,
+        follow_redirect: Callable[[str, str], Awaitable[bool]] | None = None,
+        parse: bool = True,
+        trace: Callable[[str, Dict], Awaitable] | None = None,
+    ) -> FetchResult:
+        """
+        Asynchronously queries the given URL and resolves its redirect chain.
+
+        Redirects (301, 302, 303, 307, 308) are followed right away with the same client,
+        reusing its pooled connections, instead of going back to the crawl queue.
+
+        Args:
+            url (str): The URL to query.
+            follow_redirect (Callable, optional): Coroutine function called with the source and
+                target of each redirect, the chain stops on the target if it returns False.
+                Every redirect is followed when not given.
+            parse (bool): Whether to parse the content, callers parsing it later only get its text.
+            trace (Callable, optional): Coroutine function called with the transport events of
+                each request, connection, TLS, headers and body, see the httpx trace extension.
+
+        Returns:
+            FetchResult: The final URL, status code, parsed HTML and redirect chain.
+
+        Raises:
+            RedirectException: If the chain loops or exceeds max_redirects hops.
+            httpx.HTTPStatusError: If the final response is an error.
+        """
+        headers = {
+            "User-Agent": f"local-{uuid.uuid4()}",
+        }
+        redirects = []
+        current_url = url
+        start_time = time.perf_counter()
+        while True:
+            resp = await self.client.get(
+                current_url,
+                headers=headers,
+                extensions={"trace": trace} if trace is not None else None,
+            )
+            location = resp.headers.get("Location")
+            if resp.status_code not in REDIRECT_STATUS_CODES or not location:
+                break
+
+            redirects.append(current_url)
+            target_url = urldefrag(urljoin(current_url, location)).url
+            if target_url in redirects:
+                raise RedirectException(
+                    f"Redirect loop for {url}: {' -> '.join(redirects + [target_url])}",
+                    redirect_url=target_url,
+                    status_code=resp.status_code,
+                )
+            if len(redirects) > self.max_redirects:
+                raise RedirectException(
+                    f"Too many redirects for {url}, more than {self.max_redirects} hops",
+                    redirect_url=target_url,
+                    status_code=resp.status_code,
+                )
+            if follow_redirect is not None and not await follow_redirect(
+                current_url, target_url
+            ):
+                return FetchResult(
+                    url=url,
+                    final_url=target_url,
+                    status_code=resp.status_code,
+                    redirects=redirects,
+                    elapsed=time.perf_counter() - start_time,
+                )
+            logger.debug("Following redirect %s -> %s", current_url, target_url)
+            current_url = target_url
+
+        resp.raise_for_status()
+        html = None
+        if parse:
+            # Imported on first use, the crawler parses pages later, in the parse stage
+            from bs4 import BeautifulSoup
+
+            html = BeautifulSoup(resp.text, "html.parser")
+        return FetchResult(
+            url=url,
+            final_url=current_url,
+            status_code=resp.status_code,
+            html=html,
+            redirects=redirects,
+            content_hash=hashlib.sha1(resp.content).hexdigest(),
+            text=resp.text,
+            size=len(resp.content),
+            elapsed=time.perf_counter() - start_time,
+        )
+
+    async def query_text(self, url: str) -> str:
+        """
+        Asynchronously queries the given URL, following redirects, and returns its raw content.
+
+        Args:
+            url (str): The URL to query.
+
+        Returns:
+            str: The content of the page.
+
+        Raises:
+            httpx.HTTPStatusError: If the final response is an error.
+        """
+        headers = {
+            "User-Agent": f"local-{uuid.uuid4()}",
+        }
+
+        resp = await self.client.get(url, headers=headers, follow_redirects=True)
+        resp.raise_for_status()
+        return resp.text
 
     async def query_html(self, url: str) -> str:
         """
@@ -43,12 +208,6 @@ class NetworkClient:
 
         Note:
             The function sends a GET request to the specified URL with a unique User-Agent header.
-            It does not follows redirects and raises an exception if the request fails.
+            It follows redirects up to max_redirects hops and raises an exception if the request fails.
         """
-        headers = {
-            "User-Agent": f"local-{uuid.uuid4()}",
-        }
-
-        resp = await self.client.get(url, headers=headers)
-        resp.raise_for_status()
-        return BeautifulSoup(resp.text, "html.parser")
+        return (await self.fetch(url)).html
@@ -0,0 +1,24 @@
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass(slots=True)
+class PageRecord:
+    """
+    A crawled page, as yielded by WebCrawler.stream once it is stored.
+
+    Attributes:
+        url (str): The URL crawled.
+        final_url (str): The URL its redirect chain ended on, the one stored.
+        status (int): Status code of the last response.
+        links (List[str]): In-scope links found on the page, empty for pages without content.
+        depth (int): Number of links followed from the start URL to reach the page.
+        timings (Dict[str, float]): Number of seconds spent in the fetch, parse and store stages.
+    """
+
+    url: str
+    final_url: str
+    status: int
+    links: List[str] = field(default_factory=list)
+    depth: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
@@ -0,0 +1,162 @@
+import asyncio
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineStage:
+    """
+    A stage of the crawl pipeline, with its own concurrency and bounded input queue.
+
+    Items put in the stage wait in its queue until one of its concurrency tasks handles
+    them. The queue is bounded, so a stage slower than the previous one makes the previous
+    one wait on put: the backlog builds up in the frontier instead of in memory. A stage
+    without a handler only keeps the accounting, for stages fed by another kind of queue.
+    A stage not started handles submitted items inline, in the caller task.
+
+    The queue depth and the busy share of each stage show where the crawl is bottlenecked,
+    the slowest stage has a full queue and a utilization close to 1.
+
+    Attributes:
+        name (str): Name of the stage, its tasks are named after it.
+        handler (Callable): Coroutine function called with each item, None for an accounting-only stage.
+        concurrency (int): Number of items handled at the same time.
+        queue (asyncio.Queue): Items waiting to be handled, None for an accounting-only stage.
+        busy (int): Number of items being handled.
+        processed (int): Number of items handled.
+        service_time (float): Total number of seconds spent handling items.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[None]] | None = None,
+        concurrency: int = 1,
+        queue_size: int = 1,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue | None = (
+            asyncio.Queue(maxsize=queue_size) if handler is not None else None
+        )
+        self.busy = 0
+        self.processed = 0
+        self.service_time = 0.0
+        self._clock = clock
+        self._started_at: float | None = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> List[asyncio.Task]:
+        """
+        Starts the stage clock and its concurrency tasks, if it has a handler.
+
+        Returns:
+            List[asyncio.Task]: The stage tasks, to be cancelled once the crawl is over.
+        """
+        self._started_at = self._clock()
+        if self.handler is None:
+            return []
+        self._tasks = [
+            asyncio.create_task(self.run(), name=f"{self.name}_{i}")
+            for i in range(self.concurrency)
+        ]
+        return self._tasks
+
+    @property
+    def running(self) -> bool:
+        """
+        Returns True while the stage tasks are running.
+        """
+        return any(not task.done() for task in self._tasks)
+
+    async def submit(self, item: Any):
+        """
+        Hands an item over to the stage.
+
+        The item is queued, waiting for room when the queue is full, while the stage tasks
+        are running. It is handled right away in the caller task otherwise.
+        """
+        if self.running:
+            await self.queue.put(item)
+            return
+        with self.serving():
+            await self.handler(item)
+
+    @contextmanager
+    def serving(self):
+        """
+        Accounts for the handling of an item, as busy then processed.
+        """
+        self.busy += 1
+        start_time = self._clock()
+        try:
+            yield
+        finally:
+            self.busy -= 1
+            self.processed += 1
+            self.service_time += self._clock() - start_time
+
+    async def run(self):
+        """
+        Handles queued items until cancelled.
+
+        The handler is expected to deal with its own errors, an error escaping it is
+        logged and the stage moves on to the next item.
+        """
+        while True:
+            item = await self.queue.get()
+            try:
+                with self.serving():
+                    await self.handler(item)
+            except Exception as exc:
+                logger.exception("Unexpected error in the %s stage: %s", self.name, exc)
+            finally:
+                self.queue.task_done()
+
+    async def join(self):
+        """
+        Waits until every queued item has been handled.
+        """
+        if self.queue is not None:
+            await self.queue.join()
+
+    def drain_pending(self) -> List[Any]:
+        """
+        Removes and returns the items still waiting in the queue.
+        """
+        pending = []
+        while self.queue is not None and not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+            self.queue.task_done()
+        return pending
+
+    def stats(self) -> Dict:
+        """
+        Returns the queue depth, busy and processed counts, mean service time and utilization of the stage.
+
+        Utilization is the share of the stage capacity (concurrency times elapsed time)
+        spent handling items.
+        """
+        elapsed = (
+            self._clock() - self._started_at if self._started_at is not None else 0.0
+        )
+        stats = {
+            "concurrency": self.concurrency,
+            "busy": self.busy,
+            "processed": self.processed,
+            "mean_ms": round(1000 * self.service_time / max(self.processed, 1), 2),
+            "utilization": (
+                round(self.service_time / (elapsed * self.concurrency), 2)
+                if elapsed
+                else 0.0
+            ),
+        }
+        if self.queue is not None:
+            stats["queue_size"] = self.queue.qsize()
+            stats["queue_max"] = self.queue.maxsize
+        return stats
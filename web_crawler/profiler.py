@@ -0,0 +1,265 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import cProfile
+import pstats
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Function of each crawl stage, by file name and function name. Times are inclusive,
+# filtering happens within parsing and deduplication within storing
+STAGE_FUNCTIONS = {
+    "fetch": ("web_crawler.py", "fetch"),
+    "parse": ("web_crawler.py", "parse"),
+    "filter": ("url_filter.py", "filter_links"),
+    "dedup": ("url_deduplicator.py", "dedup_url"),
+    "store": ("web_crawler.py", "store"),
+}
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all the threads of the process from a background thread.
+
+    Unlike cProfile, it does not instrument the profiled code, and it sees the pages
+    parsed in worker threads. Coroutines waiting on I/O are not on any stack, so the
+    samples of the event loop thread show where it spends its CPU time, and its idle time
+    in the selector. The sampling thread needs the GIL, which a busy thread only hands
+    over every switch interval (5 ms by default), so samples would land where threads
+    release it. The switch interval is lowered to a fifth of the sampling interval while
+    sampling, at the cost of more GIL switches.
+
+    Attributes:
+        interval (float): Number of seconds between two samples.
+        stacks (Counter): Number of samples of each stack, collapsed as thread;file:function;...
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._switch_interval = sys.getswitchinterval()
+
+    def start(self):
+        self._stopped.clear()
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 5))
+        self._thread = threading.Thread(
+            target=self.run, name="sampling_profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def run(self):
+        """
+        Samples the stacks every interval seconds until stopped.
+        """
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: Path):
+        """
+        Writes the samples in the collapsed stack format read by flamegraph.pl and speedscope.
+        """
+        path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+        )
+
+    def stage_times(self) -> Dict[str, float]:
+        """
+        Returns the number of seconds sampled within each stage function.
+        """
+        times = dict.fromkeys(STAGE_FUNCTIONS, 0.0)
+        for stack, count in self.stacks.items():
+            frames = set(stack.split(";"))
+            for stage, (file_name, function) in STAGE_FUNCTIONS.items():
+                if f"{file_name}:{function}" in frames:
+                    times[stage] += count * self.interval
+        return times
+
+
+class CrawlProfiler:
+    """
+    Profiles a crawl run, or a time window of it, with cProfile or the sampling profiler.
+
+    Nothing is installed until the window starts, so a crawl run without a profiler pays
+    nothing. Once the run is over, the profile is written next to output:
+    - cprofile: output.pstats, to be read with pstats or snakeviz. cProfile only sees the
+      event loop thread, pages parsed in worker threads are not in it
+    - sampling: output.collapsed, collapsed stacks to be turned into a flame graph
+    - both: output.stages.json, the wall and CPU time of the window and the time spent
+      in each crawl stage function, see STAGE_FUNCTIONS
+
+    Attributes:
+        mode (str): cprofile or sampling.
+        output (Path): Path of the profile files, without extension.
+        start_after (float): Number of seconds into the run the window starts at.
+        duration (float | None): Number of seconds the window lasts, None until the end of the run.
+        interval (float): Number of seconds between two samples of the sampling profiler.
+    """
+
+    modes = ("cprofile", "sampling")
+
+    def __init__(
+        self,
+        mode: str = "cprofile",
+        output: Path = Path("profile"),
+        start_after: float = 0.0,
+        duration: float | None = None,
+        interval: float = 0.005,
+    ):
+        if mode not in self.modes:
+            raise ValueError(f"Unknown profiler {mode}, expected one of {self.modes}")
+        self.mode = mode
+        self.output = output
+        self.start_after = start_after
+        self.duration = duration
+        self.interval = interval
+        self._profiler: cProfile.Profile | SamplingProfiler | None = None
+        self._running = False
+        self._wall = 0.0
+        self._cpu = 0.0
+
+    def start(self):
+        """
+        Starts profiling, the window start.
+        """
+        if self._running:
+            return
+        if self._profiler is None:
+            self._profiler = (
+                cProfile.Profile()
+                if self.mode == "cprofile"
+                else SamplingProfiler(self.interval)
+            )
+        logger.info("Starting the %s profiler", self.mode)
+        self._running = True
+        self._wall -= time.perf_counter()
+        self._cpu -= time.process_time()
+        if self.mode == "cprofile":
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+
+    def stop(self):
+        """
+        Stops profiling, the window end.
+        """
+        if not self._running:
+            return
+        if self.mode == "cprofile":
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+        self._wall += time.perf_counter()
+        self._cpu += time.process_time()
+        self._running = False
+        logger.info("Stopped the %s profiler", self.mode)
+
+    async def window(self):
+        """
+        Profiles from start_after seconds on, for duration seconds if given.
+        """
+        await asyncio.sleep(self.start_after)
+        self.start()
+        if self.duration is not None:
+            await asyncio.sleep(self.duration)
+            self.stop()
+
+    async def profile(self, run: Awaitable):
+        """
+        Awaits a run within the profiling window, then writes the profile.
+
+        Args:
+            run (Awaitable): The run to profile, e.g. the main coroutine.
+
+        Returns:
+            The result of the run.
+        """
+        window = asyncio.create_task(self.window(), name="profiler_window")
+        try:
+            return await run
+        finally:
+            window.cancel()
+            self.stop()
+            self.write()
+
+    def stage_times(self) -> Dict[str, float]:
+        """
+        Returns the number of seconds spent in each crawl stage function during the window.
+        """
+        if self.mode == "sampling":
+            return self._profiler.stage_times()
+        times = dict.fromkeys(STAGE_FUNCTIONS, 0.0)
+        stats = pstats.Stats(self._profiler).stats
+        for (file_path, _, function), (_, _, _, cumulative, _) in stats.items():
+            for stage, (file_name, stage_function) in STAGE_FUNCTIONS.items():
+                if (
+                    function == stage_function
+                    and os.path.basename(file_path) == file_name
+                ):
+                    times[stage] += cumulative
+        return times
+
+    def write(self) -> List[Path]:
+        """
+        Writes the profile files, if the window started.
+
+        Returns:
+            List[Path]: The files written.
+        """
+        if self._profiler is None:
+            logger.warning("The run ended before the profiling window started")
+            return []
+        if self.mode == "cprofile":
+            profile_path = self.output.with_suffix(".pstats")
+            self._profiler.dump_stats(profile_path)
+        else:
+            profile_path = self.output.with_suffix(".collapsed")
+            self._profiler.write_collapsed(profile_path)
+        stages = self.stage_times()
+        stages_path = self.output.with_suffix(".stages.json")
+        stages_path.write_text(
+            json.dumps(
+                {
+                    "mode": self.mode,
+                    "wall_seconds": round(self._wall, 3),
+                    "cpu_seconds": round(self._cpu, 3),
+                    "stage_seconds": {
+                        stage: round(seconds, 6) for stage, seconds in stages.items()
+                    },
+                },
+                indent=4,
+            )
+        )
+        logger.info(
+            "Profile written to %s - wall %0.2fs, cpu %0.2fs, %s",
+            profile_path,
+            self._wall,
+            self._cpu,
+            ", ".join(f"{stage} {seconds:0.2f}s" for stage, seconds in stages.items()),
+        )
+        return [profile_path, stages_path]
@@ -0,0 +1,180 @@
+"""
+Splits host names into subdomain, registrable domain and public suffix, offline.
+
+The rules come from the ICANN section of the Public Suffix List, precompiled into the
+public_suffix.dat snapshot next to this module, so nothing is downloaded or cached
+under the home directory at run time. To update the snapshot from a newer list:
+
+    curl -O https://publicsuffix.org/list/public_suffix_list.dat
+    python -m web_crawler.public_suffix public_suffix_list.dat
+"""
+
+import re
+import argparse
+import functools
+from pathlib import Path
+from typing import Iterable, List, NamedTuple
+
+SNAPSHOT = Path(__file__).parent / "public_suffix.dat"
+
+SNAPSHOT_HEADER = """\
+// ICANN section of the Public Suffix List, https://publicsuffix.org/list/public_suffix_list.dat
+// Internationalized rules are also listed in their punycode form. Rebuilt with
+// python -m web_crawler.public_suffix public_suffix_list.dat
+// This Source Code Form is subject to the terms of the Mozilla Public License, v. 2.0.
+// If a copy of the MPL was not distributed with this file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+
+_SCHEME = re.compile(r"^([a-z0-9+.-]+:)?//", re.IGNORECASE)
+_NETLOC_END = re.compile(r"[/?#]")
+# Full stops of the IDNA specification
+_DOTS = re.compile("[.。．｡]")
+_IPV4 = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+
+class ExtractResult(NamedTuple):
+    """
+    Parts of a host name, the registrable domain is domain.suffix.
+
+    Attributes:
+        subdomain (str): Labels left of the domain, empty if none.
+        domain (str): Label left of the public suffix, the last label if there is none, or the whole IP address.
+        suffix (str): Public suffix, empty for IP addresses and unknown top level domains.
+    """
+
+    subdomain: str
+    domain: str
+    suffix: str
+
+
+class PublicSuffixList:
+    """
+    The rules of the Public Suffix List, in the list syntax: "co.uk" suffixes, "*.ck"
+    wildcards and "!www.ck" exceptions.
+
+    Unlike the list algorithm, unknown top level domains have no suffix, as with tldextract,
+    so "localhost" or "example.invalid" are not valid crawl targets.
+
+    Attributes:
+        rules (FrozenSet[str]): The rules.
+    """
+
+    def __init__(self, rules: Iterable[str]):
+        self.rules = frozenset(rules)
+
+    @classmethod
+    def load(cls, path: Path = SNAPSHOT) -> "PublicSuffixList":
+        """
+        Loads a snapshot, one rule per line.
+        """
+        lines = path.read_text(encoding="utf-8").splitlines()
+        return cls(line for line in lines if line and not line.startswith("//"))
+
+    @classmethod
+    def parse(cls, text: str) -> "PublicSuffixList":
+        """
+        Compiles the ICANN section of the Public Suffix List file, adding the punycode form of the internationalized rules.
+        """
+        icann = text.split("===BEGIN ICANN DOMAINS===")[1].split(
+            "===END ICANN DOMAINS==="
+        )[0]
+        rules = set()
+        for line in icann.splitlines():
+            rule = line.strip().split(" ")[0].lower()
+            if not rule or rule.startswith("//"):
+                continue
+            rules.add(rule)
+            if not rule.isascii():
+                exception = "!" if rule.startswith("!") else ""
+                try:
+                    rules.add(exception + rule.lstrip("!").encode("idna").decode())
+                except UnicodeError:
+                    pass
+        return cls(rules)
+
+    def write(self, path: Path = SNAPSHOT):
+        """
+        Writes the rules as a snapshot, sorted.
+        """
+        path.write_text(
+            SNAPSHOT_HEADER + "\n".join(sorted(self.rules)) + "\n", encoding="utf-8"
+        )
+
+    def suffix_start(self, labels: List[str]) -> int:
+        """
+        Returns the index of the first label of the public suffix, len(labels) if there is none.
+        """
+        rules = self.rules
+        for i in range(len(labels)):
+            candidate = ".".join(labels[i:])
+            if "!" + candidate in rules:
+                return i + 1
+            if candidate in rules:
+                return i
+            if i + 1 < len(labels) and "*." + ".".join(labels[i + 1 :]) in rules:
+                return i
+        return len(labels)
+
+    def extract(self, url: str) -> ExtractResult:
+        """
+        Splits the host of a URL, or of a link without scheme like "example.com/about".
+
+        Args:
+            url (str): The URL or host.
+
+        Returns:
+            ExtractResult: The subdomain, domain and public suffix of the host.
+        """
+        url = url.strip()
+        if "//" in url:
+            url = _SCHEME.sub("", url)
+        netloc = _NETLOC_END.split(url, 1)[0]
+        host = netloc.rpartition("@")[2]
+        if host.startswith("["):
+            # IPv6 address
+            return ExtractResult("", host.partition("]")[0] + "]", "")
+        host = host.partition(":")[0]
+        labels = host.split(".") if host.isascii() else _DOTS.split(host)
+        if labels[-1] == "":
+            labels.pop()
+        if labels and labels[-1].isdigit() and _IPV4.match(host):
+            return ExtractResult("", host, "")
+        # Rules are lower case, the parts keep the case of the host
+        start = self.suffix_start([label.lower() for label in labels])
+        return ExtractResult(
+            ".".join(labels[: max(start - 1, 0)]),
+            labels[start - 1] if start else "",
+            ".".join(labels[start:]),
+        )
+
+
+@functools.cache
+def default_list() -> PublicSuffixList:
+    """
+    Returns the rules of the bundled snapshot, loaded on first use.
+    """
+    return PublicSuffixList.load()
+
+
+def extract(url: str) -> ExtractResult:
+    """
+    Splits the host of a URL with the bundled snapshot, see PublicSuffixList.extract.
+    """
+    return default_list().extract(url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "source", type=Path, help="Public Suffix List file, public_suffix_list.dat"
+    )
+    parser.add_argument("--output", type=Path, default=SNAPSHOT)
+    args = parser.parse_args()
+
+    suffix_list = PublicSuffixList.parse(args.source.read_text(encoding="utf-8"))
+    suffix_list.write(args.output)
+    print(f"{len(suffix_list.rules)} rules written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import asyncio
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def host_key(url: str) -> str:
+    """
+    Returns the key used to group URLs by host for politeness purposes.
+
+    Args:
+        url (str): The URL to extract the host from.
+
+    Returns:
+        str: The lowercased hostname of the URL, or an empty string if it has none.
+    """
+    return urlparse(url).hostname or ""
+
+
+@dataclass
+class TokenBucket:
+    """
+    A token bucket refilled at a constant rate.
+
+    Tokens are reserved rather than polled: a reservation always succeeds and may drive
+    the token count negative, the caller then has to wait until the debt is paid back.
+    This keeps concurrent callers in FIFO order without any lock.
+
+    Attributes:
+        rate (float): Number of tokens added to the bucket per second.
+        capacity (float): Maximum number of tokens the bucket can hold (burst size).
+        tokens (float): Number of tokens currently available.
+        updated_at (float): Timestamp of the last refill.
+    """
+
+    rate: float
+    capacity: float = 1.0
+    tokens: float = 1.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def refill(self, now: float):
+        """
+        Adds the tokens accumulated since the last refill, up to the bucket capacity.
+
+        Args:
+            now (float): Current timestamp.
+        """
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    def delay(self, now: float, reservations: int = 0) -> float:
+        """
+        Computes how long to wait for a token, without reserving it.
+
+        Args:
+            now (float): Current timestamp.
+            reservations (int): Number of tokens about to be reserved by other callers.
+
+        Returns:
+            float: Number of seconds before a token is available.
+        """
+        self.refill(now)
+        missing = reservations + 1 - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def reserve(self, now: float) -> float:
+        """
+        Reserves one token.
+
+        Args:
+            now (float): Current timestamp.
+
+        Returns:
+            float: Number of seconds to wait before the reserved token can be used.
+        """
+        self.refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class RateLimiter:
+    """
+    A central, per-host rate limiter shared by all the crawler workers.
+
+    Each host gets its own token bucket whose rate is derived from the robots.txt
+    `Crawl-delay` and `Request-rate` directives. The budget is enforced per host and not
+    per worker, adding workers therefore does not increase the request rate against a host.
+
+    Attributes:
+        default_rate (float): Requests per second allowed for hosts that were not configured.
+        burst (float): Number of requests that can be sent back to back to a host.
+        buckets (Dict[str, TokenBucket]): Token buckets keyed by host.
+        paused_until (Dict[str, float]): Timestamps before which hosts must not be contacted.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.paused_until: Dict[str, float] = {}
+        self._clock = clock
+
+    @staticmethod
+    def rate_from_robots(crawl_delay=None, request_rate=None) -> float | None:
+        """
+        Computes the allowed number of requests per second from robots.txt directives.
+
+        Args:
+            crawl_delay (float, optional): Minimum number of seconds between two requests.
+            request_rate (RequestRate | float, optional): Either a `RequestRate` named tuple
+                (requests, seconds) or a plain number of requests per second.
+
+        Returns:
+            float or None: The most restrictive rate of the two directives, None if neither is usable.
+        """
+        rates = []
+        if crawl_delay:
+            rates.append(1 / float(crawl_delay))
+        if request_rate:
+            if hasattr(request_rate, "requests"):
+                if request_rate.requests and request_rate.seconds:
+                    rates.append(request_rate.requests / request_rate.seconds)
+            else:
+                rates.append(float(request_rate))
+        return min(rates) if rates else None
+
+    def configure(self, host: str, crawl_delay=None, request_rate=None):
+        """
+        Sets the rate of a host from its robots.txt directives.
+
+        Tokens already available for the host are kept, so reconfiguring a host does not
+        allow a burst of requests.
+
+        Args:
+            host (str): The host to configure.
+            crawl_delay (float, optional): robots.txt `Crawl-delay` value.
+            request_rate (RequestRate | float, optional): robots.txt `Request-rate` value.
+        """
+        rate = self.rate_from_robots(crawl_delay, request_rate) or self.default_rate
+        bucket = self._bucket(host)
+        bucket.refill(self._clock())
+        bucket.rate = rate
+        logger.info("Rate limit for %s: %0.2f requests per second", host, rate)
+
+    def reserve(self, host: str) -> float:
+        """
+        Reserves a request slot for a host.
+
+        Args:
+            host (str): The host a request will be sent to.
+
+        Returns:
+            float: Number of seconds to wait before sending the request.
+        """
+        bucket = self._bucket(host)
+        now = self._clock()
+        return max(bucket.reserve(now), self.paused_until.get(host, now) - now)
+
+    def delay(self, host: str, reservations: int = 0) -> float:
+        """
+        Computes how long a request to a host would have to wait, without reserving a slot.
+
+        Args:
+            host (str): The host a request would be sent to.
+            reservations (int): Number of requests about to be sent to the host.
+
+        Returns:
+            float: Number of seconds before a request can be sent, 0 if it can be sent now.
+        """
+        bucket = self._bucket(host)
+        now = self._clock()
+        return max(
+            bucket.delay(now, reservations), self.paused_until.get(host, now) - now
+        )
+
+    def pause(self, host: str, seconds: float):
+        """
+        Stops sending requests to a host for a while, e.g. after a 429 with `Retry-After`.
+
+        Args:
+            host (str): The host to pause.
+            seconds (float): Number of seconds to leave the host alone.
+        """
+        until = self._clock() + seconds
+        if until > self.paused_until.get(host, 0):
+            self.paused_until[host] = until
+            logger.info("Pausing requests to %s for %0.2f seconds", host, seconds)
+
+    def paused_for(self, host: str) -> float:
+        """
+        Returns the remaining pause of a host.
+
+        Args:
+            host (str): The host to check.
+
+        Returns:
+            float: Number of seconds before the host can be contacted again, 0 if not paused.
+        """
+        until = self.paused_until.get(host)
+        if until is None:
+            return 0.0
+        remaining = until - self._clock()
+        if remaining <= 0:
+            del self.paused_until[host]
+            return 0.0
+        return remaining
+
+    async def acquire(self, host: str) -> float:
+        """
+        Waits until a request can be sent to the host.
+
+        Args:
+            host (str): The host a request will be sent to.
+
+        Returns:
+            float: Number of seconds waited.
+        """
+        delay = self.reserve(host)
+        if delay > 0:
+            logger.debug("Politeness wait of %0.2f seconds for %s", delay, host)
+            await asyncio.sleep(delay)
+        return delay
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(
+                rate=self.default_rate,
+                capacity=self.burst,
+                tokens=self.burst,
+                updated_at=self._clock(),
+            )
+            self.buckets[host] = bucket
+        return bucket
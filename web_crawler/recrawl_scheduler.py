@@ -0,0 +1,217 @@
+import math
+import time
+import logging
+from collections import Counter
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_change_rate(fetches: int, changes: int, elapsed: float) -> float | None:
+    """
+    Estimates the change rate of a page from its fetch history, assuming its changes follow a Poisson process.
+
+    Counting the fetches that saw a change underestimates the rate, several changes between
+    two fetches are seen as one. This is the bias-reduced estimator of Cho and Garcia-Molina,
+    log((n + 0.5) / (n - X + 0.5)) / I for n fetch intervals of mean length I and X changes seen.
+
+    Args:
+        fetches (int): Number of times the page was fetched.
+        changes (int): Number of fetches that saw a different content than the previous one.
+        elapsed (float): Number of seconds between the first and the last fetch.
+
+    Returns:
+        float or None: The estimated number of changes per second, None if the page was fetched only once.
+    """
+    intervals = fetches - 1
+    if intervals < 1 or elapsed <= 0:
+        return None
+    changes = min(changes, intervals)
+    return (
+        math.log((intervals + 0.5) / (intervals - changes + 0.5)) * intervals / elapsed
+    )
+
+
+def expected_freshness(change_rate: float, frequency: float) -> float:
+    """
+    Returns the expected fraction of time a page is fresh, when revisited at a fixed frequency.
+
+    Args:
+        change_rate (float): Number of changes of the page per unit of time.
+        frequency (float): Number of revisits of the page per unit of time.
+
+    Returns:
+        float: The expected freshness, between 0 and 1.
+    """
+    if frequency <= 0:
+        return 0.0
+    if change_rate <= 0:
+        return 1.0
+    ratio = change_rate / frequency
+    return (1 - math.exp(-ratio)) / ratio
+
+
+def _marginal_gain_inverse(target: float) -> float:
+    # Solves 1 - (1 + x) * exp(-x) = target for x, by Newton's method
+    x = max(math.sqrt(2 * target), -math.log(1 - target))
+    for _ in range(50):
+        gain = 1 - (1 + x) * math.exp(-x)
+        step = (gain - target) / (x * math.exp(-x))
+        x = max(x - step, x / 2)
+        if abs(step) < 1e-9 * x:
+            break
+    return x
+
+
+def optimal_frequencies(change_rates: List[float], budget: float) -> List[float]:
+    """
+    Splits a revisit budget across pages to maximize their average expected freshness.
+
+    With the Lagrange multiplier mu of the budget, the optimal frequency f of a page
+    changing at rate r satisfies 1 - (1 + r/f) * exp(-r/f) = mu * r. Pages changing so
+    often that mu * r >= 1 are not worth revisiting and get no budget, they would be stale
+    again right after a revisit. mu is found by bisection so the frequencies add up to the budget.
+
+    Args:
+        change_rates (List[float]): Number of changes of each page per unit of time.
+        budget (float): Total number of revisits per unit of time.
+
+    Returns:
+        List[float]: The revisit frequency of each page, in revisits per unit of time.
+    """
+
+    # Pages sharing a change rate share a frequency, pages fetched once all do
+    counts = Counter(rate for rate in change_rates if rate > 0)
+
+    def frequencies(mu: float) -> Dict[float, float]:
+        return {
+            rate: rate / _marginal_gain_inverse(mu * rate) if mu * rate < 1 else 0.0
+            for rate in counts
+        }
+
+    if budget <= 0 or not counts:
+        return [0.0] * len(change_rates)
+    # The total frequency decreases with mu, bisect in log space
+    low, high = math.log(1e-12 / max(counts)), math.log(1 / min(counts))
+    for _ in range(50):
+        middle = (low + high) / 2
+        total = sum(
+            frequency * counts[rate]
+            for rate, frequency in frequencies(math.exp(middle)).items()
+        )
+        if total > budget:
+            low = middle
+        else:
+            high = middle
+    by_rate = frequencies(math.exp(high))
+    return [by_rate.get(rate, 0.0) for rate in change_rates]
+
+
+class RecrawlScheduler:
+    """
+    Schedules the revisits of crawled pages from their fetch history.
+
+    The change rate of each page is estimated from the changes of its content hash across
+    fetches, see estimate_change_rate. Pages fetched only once get default_rate. Without a
+    budget, each page is revisited once per estimated change. With a budget, the revisit
+    frequencies maximizing the average freshness of the pages are used instead, see
+    optimal_frequencies. Intervals are clamped between min_interval and max_interval, so
+    even pages never seen changing, or changing too often, are refreshed once in a while.
+
+    Attributes:
+        budget (float | None): Number of fetches allowed per period, None for no limit.
+        period (float): Number of seconds the budget applies to.
+        default_rate (float): Changes per second assumed for pages fetched only once.
+        min_interval (float): Minimum number of seconds between two fetches of a page.
+        max_interval (float): Maximum number of seconds between two fetches of a page.
+    """
+
+    def __init__(
+        self,
+        budget: float | None = None,
+        period: float = 86400.0,
+        default_rate: float = 1 / 86400,
+        min_interval: float = 3600.0,
+        max_interval: float = 30 * 86400.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.budget = budget
+        self.period = period
+        self.default_rate = default_rate
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._clock = clock
+
+    def change_rate(self, entry: Dict) -> float:
+        """
+        Returns the estimated changes per second of a page, from its fetch history entry.
+        """
+        rate = estimate_change_rate(
+            entry["fetches"],
+            entry["changes"],
+            entry["last_fetch"] - entry["first_fetch"],
+        )
+        return self.default_rate if rate is None else rate
+
+    def intervals(self, history: Dict[str, Dict]) -> Dict[str, float]:
+        """
+        Computes the revisit interval of each page.
+
+        Args:
+            history (Dict[str, Dict]): Fetch history keyed by URL, see StorageClient.record_fetch.
+
+        Returns:
+            Dict[str, float]: Number of seconds between two fetches of each page.
+        """
+        urls = list(history)
+        rates = [self.change_rate(history[url]) for url in urls]
+        if self.budget is None:
+            frequencies = rates
+        else:
+            frequencies = [
+                frequency / self.period
+                for frequency in optimal_frequencies(
+                    [rate * self.period for rate in rates], self.budget
+                )
+            ]
+        return {
+            url: min(
+                self.max_interval,
+                max(
+                    self.min_interval,
+                    1 / frequency if frequency > 0 else self.max_interval,
+                ),
+            )
+            for url, frequency in zip(urls, frequencies)
+        }
+
+    def due(self, history: Dict[str, Dict]) -> List[str]:
+        """
+        Returns the pages due for a revisit, the most overdue relative to their interval first.
+
+        Args:
+            history (Dict[str, Dict]): Fetch history keyed by URL, see StorageClient.record_fetch.
+
+        Returns:
+            List[str]: The URLs to revisit now.
+        """
+        now = self._clock()
+        intervals = self.intervals(history)
+        overdue = {
+            url: (now - history[url]["last_fetch"]) / interval
+            for url, interval in intervals.items()
+        }
+        due = [url for url, ratio in overdue.items() if ratio >= 1]
+        due.sort(key=overdue.get, reverse=True)
+        if intervals:
+            freshness = sum(
+                expected_freshness(self.change_rate(history[url]), 1 / interval)
+                for url, interval in intervals.items()
+            ) / len(intervals)
+            logger.info(
+                "Recrawl schedule - %s of %s pages due, expected freshness %0.2f",
+                len(due),
+                len(intervals),
+                freshness,
+            )
+        return due
@@ -0,0 +1,171 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """
+    Parses a `Retry-After` header value.
+
+    Args:
+        value (str): The header value, either a number of seconds or an HTTP date.
+        now (float, optional): Current UNIX timestamp, used to convert an HTTP date into a delay.
+
+    Returns:
+        float or None: The number of seconds to wait, None if the value is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, retry_at.timestamp() - now)
+
+
+class RetryScheduler:
+    """
+    A delay queue holding URLs to retry outside of the worker pool.
+
+    Items are kept in a heap ordered by ready time and released to the crawl queue by a
+    single background task once their delay expired, so rate limited or failing URLs never
+    park a worker. Delays follow a jittered exponential backoff per URL and per host.
+
+    Attributes:
+        release (Callable): Function called with an item once it is ready to be retried.
+        backoff (float): Base backoff time in seconds.
+        max_backoff (float): Upper bound of any computed backoff, in seconds.
+        host_strikes (Dict[str, int]): Number of consecutive rate limits per host.
+    """
+
+    def __init__(
+        self,
+        release: Callable[[Any], None],
+        backoff: float = 5,
+        max_backoff: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.release = release
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.host_strikes: Dict[str, int] = {}
+        self._clock = clock
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+        self._changed = asyncio.Event()
+        self._empty = asyncio.Event()
+        self._empty.set()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> Iterator[Any]:
+        """
+        Iterates over the scheduled items, in no particular order.
+        """
+        return (item for _, _, item in self._heap)
+
+    def retry_delay(self, tries: int) -> float:
+        """
+        Computes the jittered exponential backoff of a URL.
+
+        Args:
+            tries (int): Number of times the URL has been tried.
+
+        Returns:
+            float: A delay between half and the full exponential backoff, in seconds.
+        """
+        return self._jitter(self.backoff * 2 ** max(tries - 1, 0))
+
+    def host_delay(self, host: str, retry_after: float | None = None) -> float:
+        """
+        Records a rate limit for a host and computes how long the host should be left alone.
+
+        Args:
+            host (str): The host that rate limited us.
+            retry_after (float, optional): Delay requested by the server through `Retry-After`.
+
+        Returns:
+            float: The `Retry-After` delay when given, the host jittered exponential backoff otherwise.
+        """
+        strikes = self.host_strikes.get(host, 0) + 1
+        self.host_strikes[host] = strikes
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return self._jitter(self.backoff * 2 ** (strikes - 1))
+
+    def reset_host(self, host: str):
+        """
+        Forgets the rate limits of a host after a successful fetch.
+
+        Args:
+            host (str): The host that answered successfully.
+        """
+        self.host_strikes.pop(host, None)
+
+    def schedule(self, item: Any, delay: float):
+        """
+        Schedules an item to be released after a delay.
+
+        Args:
+            item: The item to retry.
+            delay (float): Number of seconds to wait before releasing the item.
+        """
+        heapq.heappush(self._heap, (self._clock() + delay, next(self._counter), item))
+        self._empty.clear()
+        self._changed.set()
+
+    async def run(self):
+        """
+        Releases items as they become ready, until cancelled.
+        """
+        while True:
+            self.release_ready()
+            timeout = None
+            if self._heap:
+                timeout = max(0.0, self._heap[0][0] - self._clock())
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def release_ready(self) -> int:
+        """
+        Releases every item whose delay expired.
+
+        Returns:
+            int: The number of items released.
+        """
+        released = 0
+        now = self._clock()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, item = heapq.heappop(self._heap)
+            self.release(item)
+            released += 1
+        if not self._heap:
+            self._empty.set()
+        return released
+
+    async def join(self):
+        """
+        Waits until every scheduled item has been released.
+        """
+        await self._empty.wait()
+
+    def _jitter(self, delay: float) -> float:
+        delay = min(delay, self.max_backoff)
+        return random.uniform(delay / 2, delay)
@@ -9,8 +9,9 @@ class RobotParser:
     """
     A class for parsing and interpreting robots.txt files from websites.
 
-    This class handles the fetching and parsing of robots.txt files, and provides methods
-    to check crawling permissions and retrieve crawling parameters like delays and request rates.
+    This class handles the parsing of robots.txt files, and provides methods to check crawling
+    permissions and retrieve crawling parameters like delays and request rates. Fetching the
+    file is left to the caller (see RobotsCache) so that it never blocks the event loop.
 
         base_url (str): The base URL of the website to crawl.
         default_crawl_delay (int, optional): Default delay between crawls in seconds if not specified
@@ -32,20 +33,30 @@ class RobotParser:
         self.robot_parser = RobotFileParser()
         self._default_crawl_delay = default_crawl_delay
         self._default_request_rate = default_request_rate
-        self.parse()
+        self.robot_parser.set_url(self.robot_url)
 
-    def parse(self):
+    def parse(self, content: str):
         """
-        Parses the robots.txt file from the specified URL.
+        Parses the content of a robots.txt file to determine the rules for web crawling.
 
-        This method sets the URL for the robot parser and reads the robots.txt file
-        to determine the rules for web crawling.
+        Args:
+            content (str): The robots.txt file content.
+        """
+        self.robot_parser.parse(content.splitlines())
 
-        Raises:
-            URLError: If there is an issue with accessing the robots.txt file.
+    def allow_all(self):
         """
-        self.robot_parser.set_url(self.robot_url)
-        self.robot_parser.read()
+        Allows every URL, used when the site has no robots.txt file (4xx responses).
+        """
+        self.robot_parser.allow_all = True
+        self.robot_parser.modified()
+
+    def disallow_all(self):
+        """
+        Disallows every URL, used when the robots.txt file is protected (401, 403) or unreachable.
+        """
+        self.robot_parser.disallow_all = True
+        self.robot_parser.modified()
 
     def can_fetch(self, user_agent: str, url: str) -> bool:
         """
@@ -85,3 +96,20 @@ class RobotParser:
             RequestRate: The request rate for the web crawler.
         """
         return self.robot_parser.request_rate("*") or self._default_request_rate
+
+    def rate_directives(self) -> tuple:
+        """
+        Returns the crawl delay and request rate directives to pace the crawler with.
+
+        Unlike the crawl_delay and request_rate properties, a directive missing from the
+        robots.txt file is not replaced by its default as long as the other one is set, so a
+        `Request-rate` alone is not capped by the default crawl delay.
+
+        Returns:
+            tuple: The crawl delay in seconds and the request rate, either can be None.
+        """
+        crawl_delay = self.robot_parser.crawl_delay("*")
+        request_rate = self.robot_parser.request_rate("*")
+        if crawl_delay is None and request_rate is None:
+            return self.crawl_delay, self.request_rate
+        return crawl_delay, request_rate
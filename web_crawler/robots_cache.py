@@ -0,0 +1,178 @@
+import asyncio
+import time
+import logging
+import httpx
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+from web_crawler.network_client import NetworkClient
+from web_crawler.robot_parser import RobotParser
+
+logger = logging.getLogger(__name__)
+
+
+class RobotsCache:
+    """
+    An asynchronous, multi-host cache of parsed robots.txt rules.
+
+    Rules are fetched through the shared NetworkClient and cached per scheme and host, with
+    a TTL and a bounded size (least recently used entries are evicted first). URLs whose
+    host rules are not known yet are parked while the robots.txt file is being fetched,
+    and released once it is parsed, so workers never wait on it.
+
+    Attributes:
+        network_client (NetworkClient): Client used to fetch the robots.txt files.
+        release (Callable): Function called with each parked item once its host rules are known.
+        on_load (Callable, optional): Function called with the host and its RobotParser after each fetch.
+        ttl (float): Number of seconds a robots.txt file is cached for.
+        error_ttl (float): Number of seconds an unreachable robots.txt file is cached for.
+        max_size (int): Maximum number of hosts kept in the cache.
+        entries (OrderedDict): RobotParser and expiry timestamp keyed by scheme and host.
+        parked (Dict[str, List]): Items waiting for the rules of their host.
+    """
+
+    def __init__(
+        self,
+        network_client: NetworkClient,
+        release: Callable[[Any], None],
+        on_load: Callable[[str, RobotParser], None] | None = None,
+        ttl: float = 3600,
+        error_ttl: float = 60,
+        max_size: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.network_client = network_client
+        self.release = release
+        self.on_load = on_load
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.max_size = max_size
+        self.entries: OrderedDict[str, Tuple[RobotParser, float]] = OrderedDict()
+        self.parked: Dict[str, List[Any]] = {}
+        self._clock = clock
+        self._fetches: Dict[str, asyncio.Task] = {}
+        self._empty = asyncio.Event()
+        self._empty.set()
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self.parked.values())
+
+    @staticmethod
+    def key(url: str) -> str:
+        """
+        Returns the cache key of a URL, robots.txt rules apply per scheme and host.
+
+        Args:
+            url (str): The URL to get the key of.
+
+        Returns:
+            str: The scheme and network location of the URL, e.g. https://example.com
+        """
+        url_parsed = urlparse(url)
+        return f"{url_parsed.scheme}://{url_parsed.netloc.lower()}"
+
+    def get(self, url: str) -> RobotParser | None:
+        """
+        Returns the cached robots.txt rules of a URL host.
+
+        Args:
+            url (str): The URL to get the rules of.
+
+        Returns:
+            RobotParser or None: The host rules, None if they are not cached or expired.
+        """
+        key = self.key(url)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        robot_parser, expires_at = entry
+        if expires_at <= self._clock():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return robot_parser
+
+    def park(self, url: str, item: Any):
+        """
+        Parks an item until the robots.txt rules of its URL host are fetched.
+
+        Args:
+            url (str): The URL whose host rules are needed.
+            item: The item to release once the rules are known.
+        """
+        key = self.key(url)
+        self.parked.setdefault(key, []).append(item)
+        self._empty.clear()
+        if key not in self._fetches:
+            logger.info("Fetching robots.txt for %s", key)
+            self._fetches[key] = asyncio.create_task(
+                self.load(key), name=f"robots_{key}"
+            )
+
+    async def load(self, key: str) -> RobotParser:
+        """
+        Fetches and parses the robots.txt file of a host, then releases its parked items.
+
+        Follows urllib.robotparser semantics: a 401 or 403 disallows everything, any other
+        4xx allows everything, and a 5xx or network error disallows everything for error_ttl seconds.
+
+        Args:
+            key (str): The scheme and host to fetch the rules of.
+
+        Returns:
+            RobotParser: The parsed rules.
+        """
+        robot_parser = RobotParser(key)
+        ttl = self.ttl
+        try:
+            content = await self.network_client.query_text(robot_parser.robot_url)
+            robot_parser.parse(content)
+        except httpx.HTTPStatusError as exc:
+            status_code = exc.response.status_code
+            if status_code in (401, 403):
+                robot_parser.disallow_all()
+            elif 400 <= status_code < 500:
+                robot_parser.allow_all()
+            else:
+                logger.warning("robots.txt unavailable for %s: %s", key, exc)
+                robot_parser.disallow_all()
+                ttl = self.error_ttl
+        except Exception as exc:
+            logger.warning("robots.txt unreachable for %s: %s", key, exc)
+            robot_parser.disallow_all()
+            ttl = self.error_ttl
+
+        self.put(key, robot_parser, ttl)
+        if self.on_load is not None:
+            self.on_load(urlparse(key).hostname or "", robot_parser)
+
+        self._fetches.pop(key, None)
+        for item in self.parked.pop(key, []):
+            self.release(item)
+        if not self.parked:
+            self._empty.set()
+        return robot_parser
+
+    def put(self, key: str, robot_parser: RobotParser, ttl: float | None = None):
+        """
+        Caches the rules of a host, evicting the least recently used hosts above max_size.
+
+        Args:
+            key (str): The scheme and host the rules apply to.
+            robot_parser (RobotParser): The parsed rules.
+            ttl (float, optional): Number of seconds to cache the rules for, defaults to ttl.
+        """
+        self.entries[key] = (
+            robot_parser,
+            self._clock() + (self.ttl if ttl is None else ttl),
+        )
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def join(self):
+        """
+        Waits until every parked item has been released.
+        """
+        await self._empty.wait()
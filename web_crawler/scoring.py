@@ -0,0 +1,73 @@
+import re
+from collections import Counter
+from typing import Callable, List, Tuple
+
+from web_crawler.url_container import URLContainer
+
+# A scorer returns the priority of a URL, lower scores are crawled first.
+# It is called once each time the URL is discovered.
+Scorer = Callable[[URLContainer], float]
+
+
+def depth_score(url_container: URLContainer) -> float:
+    """
+    Scores a URL by its depth, giving a breadth-first (BFS level by level) crawl order.
+
+    Args:
+        url_container (URLContainer): The URL to score.
+
+    Returns:
+        float: The depth of the URL.
+    """
+    return float(url_container.depth)
+
+
+class InLinkScorer:
+    """
+    Scores a URL by the number of in-links seen so far, most linked pages first.
+
+    Attributes:
+        in_links (Counter): Number of times each URL has been discovered.
+    """
+
+    def __init__(self):
+        self.in_links = Counter()
+
+    def __call__(self, url_container: URLContainer) -> float:
+        self.in_links[url_container.url] += 1
+        return -float(self.in_links[url_container.url])
+
+
+class PatternScorer:
+    """
+    Scores a URL with the weight of the first regular expression it matches.
+
+    Attributes:
+        patterns (List[Tuple[re.Pattern, float]]): Compiled patterns and their weights.
+        default (float): Score of URLs matching no pattern.
+    """
+
+    def __init__(self, weights: List[Tuple[str, float]], default: float = 0.0):
+        self.patterns = [(re.compile(pattern), weight) for pattern, weight in weights]
+        self.default = default
+
+    def __call__(self, url_container: URLContainer) -> float:
+        for pattern, weight in self.patterns:
+            if pattern.search(url_container.url):
+                return weight
+        return self.default
+
+
+class WeightedScorer:
+    """
+    Combines several scorers into a weighted sum.
+
+    Attributes:
+        scorers (List[Tuple[Scorer, float]]): Scorers and their weights.
+    """
+
+    def __init__(self, scorers: List[Tuple[Scorer, float]]):
+        self.scorers = scorers
+
+    def __call__(self, url_container: URLContainer) -> float:
+        return sum(weight * scorer(url_container) for scorer, weight in self.scorers)
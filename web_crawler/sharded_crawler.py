@@ -0,0 +1,644 @@
+import asyncio
+import json
+import queue
+import zlib
+import signal
+import dataclasses
+import time
+import logging
+import multiprocessing
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from web_crawler.network_client import NetworkClient
+from web_crawler.storage_client import StorageClient
+from web_crawler.url_container import URLContainer
+from web_crawler.rate_limiter import host_key
+from web_crawler.web_crawler import WebCrawler
+from web_crawler.event_loop import run
+from web_crawler.exceptions import GenericCrawlerException
+
+logger = logging.getLogger(__name__)
+
+# A routed URL, (url, depth, parent)
+RoutedURL = Tuple[str, int, str | None]
+
+
+def shard_of(url: str, num_shards: int) -> int:
+    """
+    Returns the shard owning a URL.
+
+    URLs are partitioned by host with a stable hash, so all the URLs of a host, and with
+    them its politeness budget, robots.txt rules and redirects, live in the same shard.
+
+    Args:
+        url (str): The URL to route.
+        num_shards (int): The number of shards.
+
+    Returns:
+        int: The index of the shard owning the URL host.
+    """
+    return zlib.crc32(host_key(url).encode()) % num_shards
+
+
+class ShardCrawler(WebCrawler):
+    """
+    A web crawler owning the hosts of one shard of a multi-process crawl.
+
+    Discovered URLs of hosts owned by other shards are buffered and sent to the
+    coordinating process in batches, and URLs routed to this shard are read from its inbox.
+    Whenever the shard runs out of work it reports how many batches it has processed, so
+    the coordinator can tell when the whole crawl is done.
+
+    With a page_quota, the max_pages budget is held by the coordinating process and granted
+    to the shards as they need it. URLs over the quota of the shard wait for a grant, the
+    requests are sent along with the URL batches, and the quota left unused is handed back
+    whenever the shard runs out of work.
+
+    Attributes:
+        shard (int): The index of the shard.
+        num_shards (int): The number of shards.
+        inbox (multiprocessing.Queue): Batches of URLs routed to this shard, pages granted, None to stop.
+        control (multiprocessing.Queue): Messages sent to the coordinating process.
+        batch_size (int): Number of URLs buffered for a shard before they are sent.
+        flush_interval (float): Maximum number of seconds a URL stays buffered.
+        outbox (Dict[int, List[RoutedURL]]): URLs buffered per destination shard.
+        routed (Set[str]): URLs already sent to other shards, they are not sent twice.
+        received (int): Number of batches read from the inbox, grants included.
+        page_quota (int | None): Pages granted and not handed back, None if max_pages is enforced locally.
+        awaiting_quota (Dict[str, URLContainer]): URLs over the quota, waiting for a grant.
+        quota_requested (int): Number of pages asked for and not granted yet.
+    """
+
+    # Ctrl-C reaches every process of the group, shards are only stopped by the parent
+    stop_signals = (signal.SIGTERM,)
+
+    def __init__(
+        self,
+        start_url: str,
+        shard: int,
+        num_shards: int,
+        inbox: Any,
+        control: Any,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        page_quota: int | None = None,
+        **kwargs,
+    ):
+        super().__init__(start_url, **kwargs)
+        if page_quota is not None:
+            self.crawl_guard.budget = dataclasses.replace(
+                self.crawl_guard.budget, max_pages=page_quota
+            )
+        self.page_quota = page_quota
+        self.awaiting_quota: Dict[str, URLContainer] = {}
+        self.quota_requested = 0
+        self._quota_denied = False
+        self.shard = shard
+        self.num_shards = num_shards
+        self.inbox = inbox
+        self.control = control
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.outbox: Dict[int, List[RoutedURL]] = {}
+        self.routed: Set[str] = set()
+        self.received = 0
+        self.stopped = False
+        self._reader: asyncio.Task | None = None
+        self._marker_sent = False
+        self._inbound = asyncio.Event()
+
+    async def seed(self):
+        """
+        Queues the start URL, only in the shard owning it.
+        """
+        if shard_of(self.start_url, self.num_shards) == self.shard:
+            await super().seed()
+
+    async def enqueue(self, url_container: URLContainer):
+        """
+        Queues a discovered URL, or buffers it for the shard owning its host.
+
+        Args:
+            url_container (URLContainer): The URL to queue.
+        """
+        url = url_container.url
+        shard = shard_of(url, self.num_shards)
+        if shard == self.shard:
+            await self.enqueue_local(url_container)
+            return
+        if url in self.routed:
+            return
+        self.routed.add(url)
+        batch = self.outbox.setdefault(shard, [])
+        batch.append((url, url_container.depth, url_container.parent))
+        if len(batch) >= self.batch_size:
+            self.control.put(("urls", shard, self.outbox.pop(shard)))
+
+    async def enqueue_local(self, url_container: URLContainer):
+        """
+        Queues a URL owned by this shard, unless it waits for a page grant.
+        """
+        if not self.await_quota(url_container):
+            await super().enqueue(url_container)
+
+    def await_quota(self, url_container: URLContainer) -> bool:
+        """
+        Holds a URL back until more pages are granted, if it only exceeds the page quota.
+
+        Returns:
+            bool: True if the URL waits for a grant.
+        """
+        if self.page_quota is None or self._quota_denied:
+            return False
+        url = url_container.url
+        if url in self.in_flight or url in self.to_visit_queue:
+            return False
+        if (
+            self.crawl_guard.check(url_container) != "pages"
+            or self.crawl_guard.check(url_container, ignore_pages=True) is not None
+        ):
+            return False
+        self.awaiting_quota.setdefault(url, url_container)
+        return True
+
+    async def grant(self, pages: int):
+        """
+        Raises the page quota by the pages granted, and queues the URLs waiting for them.
+
+        Fewer pages than requested means the crawl budget is spent, the URLs still over
+        the quota are then rejected.
+        """
+        self.page_quota += pages
+        self.crawl_guard.budget.max_pages = self.page_quota
+        self._quota_denied = pages < self.quota_requested
+        self.quota_requested = 0
+        waiting = list(self.awaiting_quota.values())
+        self.awaiting_quota.clear()
+        try:
+            for url_container in waiting:
+                await self.enqueue_local(url_container)
+        finally:
+            self._quota_denied = False
+
+    def return_quota(self):
+        """
+        Hands the pages granted and not used back to the coordinating process.
+        """
+        unused = self.page_quota - self.crawl_guard.pages
+        if self.quota_requested or self.awaiting_quota or unused <= 0:
+            return
+        self.page_quota -= unused
+        self.crawl_guard.budget.max_pages = self.page_quota
+        self.control.put(("quota", self.shard, -unused))
+
+    def flush(self):
+        """
+        Sends every buffered URL to the coordinating process, and a page request for the
+        URLs waiting for a grant if none is pending.
+        """
+        for shard, batch in self.outbox.items():
+            self.control.put(("urls", shard, batch))
+        self.outbox.clear()
+        if self.awaiting_quota and not self.quota_requested:
+            self.quota_requested = len(self.awaiting_quota)
+            self.control.put(("quota", self.shard, self.quota_requested))
+
+    async def wait_until_done(self):
+        """
+        Waits until the coordinating process stops the shard.
+
+        Each time the shard runs out of work, its buffered URLs are flushed and it reports
+        the number of batches processed so far. The coordinator stops the shards once
+        every one of them has processed all the batches routed to it.
+        """
+        self._reader = asyncio.create_task(
+            self.read_inbox(), name=f"inbox_{self.shard}"
+        )
+        flusher = asyncio.create_task(self.flush_periodically(), name="flusher")
+        try:
+            while True:
+                await super().wait_until_done()
+                self.flush()
+                if self.page_quota is not None:
+                    self.return_quota()
+                reported = self.received
+                self.control.put(("idle", self.shard, reported))
+                while self.received == reported and not self.stopped:
+                    self._inbound.clear()
+                    await self._inbound.wait()
+                if self.stopped:
+                    return
+        finally:
+            flusher.cancel()
+            await self.stop_reading()
+
+    async def stop_reading(self):
+        """
+        Reads the inbox up to a stop marker, so the URLs routed so far are queued.
+        """
+        if self._reader is not None and not self._reader.done():
+            if not self._marker_sent:
+                # Unblocks the thread waiting on the inbox
+                self._marker_sent = True
+                self.inbox.put(None)
+            await self._reader
+
+    async def drain(self):
+        """
+        Drains the crawl, then queues the URLs routed to the shard before it stopped, so
+        they are saved with the URLs left to crawl.
+        """
+        await super().drain()
+        await self.stop_reading()
+
+    def left_to_crawl(self) -> List[URLContainer]:
+        """
+        Returns the URLs left to crawl, the ones waiting for a page grant included.
+        """
+        return [*super().left_to_crawl(), *self.awaiting_quota.values()]
+
+    def write_frontier(self) -> int:
+        """
+        Sends the buffered URLs of the other shards to the coordinating process, which saves
+        them with the merged frontier, then writes the URLs left to crawl by this shard.
+        """
+        self.flush()
+        return super().write_frontier()
+
+    async def read_inbox(self):
+        """
+        Queues the URLs routed to this shard, and applies the page grants, until it is stopped.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await loop.run_in_executor(None, self.inbox.get)
+            if batch is None:
+                self.stopped = True
+                self._inbound.set()
+                return
+            if isinstance(batch, int):
+                await self.grant(batch)
+            else:
+                for url, depth, parent in batch:
+                    if not self.storage_client.contains(url):
+                        await self.enqueue_local(
+                            URLContainer(url, depth=depth, parent=parent)
+                        )
+            self.received += 1
+            self._inbound.set()
+
+    async def flush_periodically(self):
+        """
+        Flushes the buffered URLs every flush_interval, so a busy shard does not hold them back.
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+
+def run_shard(
+    start_url: str,
+    shard: int,
+    num_shards: int,
+    inbox: Any,
+    control: Any,
+    storage_client: StorageClient,
+    network_client_factory: Callable[[], NetworkClient] | None,
+    log_level: int,
+    event_loop: str,
+    crawler_kwargs: Dict,
+):
+    """
+    Entry point of a shard process, crawls its shard in its own event loop.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(
+        format=f"%(asctime)s %(levelname)s:shard_{shard}:%(name)s: %(message)s",
+        level=log_level,
+        datefmt="%H:%M:%S",
+    )
+    try:
+        network_client = (
+            network_client_factory() if network_client_factory else NetworkClient()
+        )
+        crawler = ShardCrawler(
+            start_url,
+            shard=shard,
+            num_shards=num_shards,
+            inbox=inbox,
+            control=control,
+            network_client=network_client,
+            storage_client=storage_client,
+            **crawler_kwargs,
+        )
+        run(crawler.crawl_with_workers(), event_loop)
+        control.put(("done", shard, crawler.stats()))
+    except Exception as exc:
+        control.put(("error", shard, repr(exc)))
+        raise
+
+
+class ShardedCrawler:
+    """
+    A multi-process web crawler, sharding the crawl by host across CPU cores.
+
+    Each process runs a ShardCrawler with its own event loop, NetworkClient and storage
+    shard. URLs are partitioned by a stable hash of their host, so each host is crawled by
+    a single process and its politeness budget stays correct. This process routes the
+    batches of URLs discovered for other shards, detects the end of the crawl, then merges
+    the storage shards into a single output file matching a single-process crawl.
+
+    Attributes:
+        start_url (str): The initial URL where crawling begins
+        num_processes (int): Number of crawler processes
+        storage_client (StorageClient): Client the merged results are written with
+        network_client_factory (Callable, optional): Function building the NetworkClient of each
+            process, it must be picklable - a default NetworkClient otherwise
+        batch_size (int): Number of URLs routed to another shard per message
+        event_loop (str): Event loop of the shard processes, "auto", "asyncio" or "uvloop"
+        crawler_kwargs (Dict): Arguments of each WebCrawler, e.g. num_workers
+        shard_stats (Dict[int, Dict]): Stats of each shard once the crawl is done
+        pages_left (int | None): Pages of the max_pages budget not granted to a shard yet
+        stopping (bool): Whether a stop was requested, batches are then kept instead of routed
+        undelivered (List[RoutedURL]): URLs routed to shards that stopped before reading them,
+            saved with the merged frontier
+    """
+
+    def __init__(
+        self,
+        start_url: str,
+        num_processes: int,
+        storage_client: StorageClient = StorageClient(
+            output_file_path=Path(__file__).parent.parent,
+            output_file_name="storage.json",
+        ),
+        network_client_factory: Callable[[], NetworkClient] | None = None,
+        batch_size: int = 100,
+        event_loop: str = "auto",
+        **crawler_kwargs,
+    ):
+        if num_processes < 1:
+            raise ValueError("num_processes must be greater than 0")
+        self.start_url = start_url
+        self.num_processes = num_processes
+        self.storage_client = storage_client
+        self.network_client_factory = network_client_factory
+        self.batch_size = batch_size
+        self.event_loop = event_loop
+        self.crawler_kwargs = crawler_kwargs
+        self.shard_stats: Dict[int, Dict] = {}
+        self.pages_left = (
+            self.max_pages - min(1, self.max_pages)
+            if self.max_pages is not None
+            else None
+        )
+        self.stopping = False
+        self.undelivered: List[RoutedURL] = []
+
+        logger.info(
+            "Sharded crawler configuration - url: %s, processes: %s",
+            self.start_url,
+            self.num_processes,
+        )
+
+    @property
+    def max_pages(self) -> int | None:
+        budget = self.crawler_kwargs.get("budget")
+        return budget.max_pages if budget is not None else None
+
+    def shard_crawler_kwargs(self, shard: int) -> Dict:
+        """
+        Returns the ShardCrawler arguments of a shard.
+
+        Hosts are owned by a single shard, so the host and prefix budgets hold as they are,
+        but each shard only sees its own pages. The max_pages budget is kept by this
+        process and granted to the shards on request, see `route`, the shard owning the
+        start URL starts with one page for it.
+        """
+        kwargs = {**self.crawler_kwargs, "batch_size": self.batch_size}
+        if self.max_pages is not None:
+            owns_start = shard == shard_of(self.start_url, self.num_processes)
+            kwargs["page_quota"] = min(1, self.max_pages) if owns_start else 0
+        return kwargs
+
+    def shard_storage_client(self, shard: int) -> StorageClient:
+        """
+        Returns the storage client of a shard, writing next to the merged output file.
+        """
+        output_file_name = Path(self.storage_client.output_file_name)
+        return StorageClient(
+            output_file_path=self.storage_client.output_file_path,
+            output_file_name=f"{output_file_name.stem}.shard{shard}{output_file_name.suffix}",
+        )
+
+    async def crawl_with_workers(self):
+        """
+        Crawls with one process per shard and writes the merged results to a file.
+
+        Raises:
+            GenericCrawlerException: If a shard process fails.
+        """
+        context = multiprocessing.get_context("spawn")
+        control = context.Queue()
+        inboxes = [context.Queue() for _ in range(self.num_processes)]
+        processes = [
+            context.Process(
+                target=run_shard,
+                args=(
+                    self.start_url,
+                    shard,
+                    self.num_processes,
+                    inboxes[shard],
+                    control,
+                    self.shard_storage_client(shard),
+                    self.network_client_factory,
+                    logging.getLogger().getEffectiveLevel(),
+                    self.event_loop,
+                    self.shard_crawler_kwargs(shard),
+                ),
+                name=f"shard_{shard}",
+            )
+            for shard in range(self.num_processes)
+        ]
+        for process in processes:
+            process.start()
+
+        loop = asyncio.get_running_loop()
+        try:
+            for stop_signal in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(stop_signal, self.stop, processes)
+        except (NotImplementedError, RuntimeError):
+            # Not supported on Windows, nor outside of the main thread
+            pass
+        try:
+            await self.route(control, inboxes, processes)
+        finally:
+            for stop_signal in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.remove_signal_handler(stop_signal)
+                except (NotImplementedError, RuntimeError):
+                    pass
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            self.collect_inboxes(inboxes)
+
+        self.merge()
+
+    async def route(self, control: Any, inboxes: List[Any], processes: List):
+        """
+        Routes the URL batches between shards until all of them are done.
+
+        The crawl is over once every shard has reported being idle after processing every
+        batch routed to it, the shards are then stopped.
+
+        Page requests of the shards are granted from pages_left, up to what is left, and
+        sent through their inbox like the URL batches. Shards hand back the pages they do
+        not use when idle, so the budget goes to the shards that still have URLs to queue.
+
+        Args:
+            control (multiprocessing.Queue): Messages sent by the shards.
+            inboxes (List[multiprocessing.Queue]): Inbox of each shard.
+            processes (List[multiprocessing.Process]): The shard processes.
+
+        Raises:
+            GenericCrawlerException: If a shard process fails.
+        """
+        loop = asyncio.get_running_loop()
+        delivered = [0] * self.num_processes
+        idle: List[int | None] = [None] * self.num_processes
+        done: Set[int] = set()
+        stopping = False
+        while len(done) < self.num_processes:
+            try:
+                kind, shard, payload = await loop.run_in_executor(
+                    None, control.get, True, 1.0
+                )
+            except queue.Empty:
+                for process in processes:
+                    if process.exitcode not in (None, 0):
+                        raise GenericCrawlerException(
+                            f"{process.name} exited with code {process.exitcode}"
+                        )
+                continue
+
+            if kind == "urls":
+                if self.stopping or shard in done:
+                    self.undelivered.extend(payload)
+                else:
+                    inboxes[shard].put(payload)
+                    delivered[shard] += 1
+            elif kind == "quota":
+                if payload < 0:
+                    self.pages_left -= payload
+                elif not self.stopping and shard not in done:
+                    granted = min(payload, self.pages_left)
+                    self.pages_left -= granted
+                    inboxes[shard].put(granted)
+                    delivered[shard] += 1
+            elif kind == "idle":
+                idle[shard] = payload
+            elif kind == "done":
+                done.add(shard)
+                self.shard_stats[shard] = payload
+            elif kind == "error":
+                raise GenericCrawlerException(f"shard_{shard} failed: {payload}")
+
+            if not stopping and all(
+                shard in done or idle[shard] == delivered[shard]
+                for shard in range(self.num_processes)
+            ):
+                stopping = True
+                logger.info(
+                    "All shards idle - stopping, %s batches routed", sum(delivered)
+                )
+                for shard in range(self.num_processes):
+                    if shard not in done:
+                        inboxes[shard].put(None)
+
+        logger.info("Crawl stats: %s", self.shard_stats)
+
+    def stop(self, processes: List):
+        """
+        Forwards a stop request to the shard processes, each of them drains its crawl.
+
+        Args:
+            processes (List[multiprocessing.Process]): The shard processes.
+        """
+        logger.warning("Stop requested - stopping the shards")
+        self.stopping = True
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def collect_inboxes(self, inboxes: List[Any]):
+        """
+        Keeps the URL batches left unread in the inboxes of the stopped shards.
+
+        Args:
+            inboxes (List[multiprocessing.Queue]): Inbox of each shard.
+        """
+        for inbox in inboxes:
+            while True:
+                try:
+                    batch = inbox.get(timeout=0.1)
+                except queue.Empty:
+                    break
+                if isinstance(batch, list):
+                    self.undelivered.extend(batch)
+        if self.undelivered:
+            logger.warning(
+                "%s URLs routed to stopped shards saved with the frontier",
+                len(self.undelivered),
+            )
+
+    def merge(self):
+        """
+        Merges the storage shards and their fetch history into the storage client and writes it to a file.
+
+        The URLs left to crawl by stopped shards are merged into a single file as well, with
+        the URLs routed to them and never read.
+        """
+        start_time = time.perf_counter()
+        frontier = []
+        for shard in range(self.num_processes):
+            shard_storage_client = self.shard_storage_client(shard)
+            shard_file = (
+                shard_storage_client.output_file_path
+                / shard_storage_client.output_file_name
+            )
+            with open(shard_file) as f:
+                self.storage_client.storage.update(json.load(f))
+            shard_file.unlink()
+            if shard_storage_client.history_path.exists():
+                with open(shard_storage_client.history_path) as f:
+                    self.storage_client.history.update(json.load(f))
+                shard_storage_client.history_path.unlink()
+            shard_frontier_file = shard_file.with_suffix(".frontier.json")
+            if shard_frontier_file.exists():
+                with open(shard_frontier_file) as f:
+                    frontier.extend(json.load(f))
+                shard_frontier_file.unlink()
+        self.storage_client.write_to_file()
+        seen = {entry["url"] for entry in frontier}
+        for url, depth, parent in self.undelivered:
+            if url not in seen and not self.storage_client.contains(url):
+                seen.add(url)
+                frontier.append(
+                    {"url": url, "depth": depth, "parent": parent, "tries": 0}
+                )
+        if frontier:
+            output_file_name = Path(self.storage_client.output_file_name)
+            with open(
+                self.storage_client.output_file_path
+                / f"{output_file_name.stem}.frontier.json",
+                "w",
+            ) as f:
+                json.dump(frontier, f, indent=4)
+        logger.info(
+            "Merged %s storage shards in %0.2f seconds",
+            self.num_processes,
+            time.perf_counter() - start_time,
+        )
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class StatusReporter:
+    """
+    Reports the progress of a running crawl every interval seconds, to the log and to a JSON file.
+
+    It runs as a single background task reading the counters the crawler already keeps,
+    the pipeline stages and the metrics, so crawling a URL costs nothing more. Rates are
+    computed over the last interval, the instant rate, and smoothed with an exponentially
+    weighted moving average. When the crawl has a page budget, the ETA is the pages left
+    in it at the smoothed rate, capped by the wall time left in the duration budget.
+
+    Attributes:
+        crawler (WebCrawler): The crawler reported on.
+        interval (float): Number of seconds between two reports.
+        path (Path | None): JSON file the last report is written to, None to only log it.
+        smoothing (float): Weight of the last interval in the moving average, between 0 and 1.
+    """
+
+    def __init__(
+        self,
+        crawler,
+        interval: float = 10.0,
+        path: Path | None = None,
+        smoothing: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.crawler = crawler
+        self.interval = interval
+        self.path = path
+        self.smoothing = smoothing
+        self._clock = clock
+        self._started_at = clock()
+        self._last_time = self._started_at
+        self._last_pages = 0
+        self._last_bytes = 0.0
+        self._pages_per_second: float | None = None
+
+    def start(self):
+        """
+        Starts measuring from now, the crawl start.
+        """
+        self._started_at = self._last_time = self._clock()
+        self._last_pages = 0
+        self._last_bytes = 0.0
+        self._pages_per_second = None
+
+    def snapshot(self) -> Dict:
+        """
+        Returns the status of the crawl since the last snapshot.
+
+        Returns:
+            dict: The pages done, the instant and smoothed pages per second, the frontier size,
+                the in-flight fetches, the pending retries, the errors and retries so far,
+                the bytes per second and the ETA in seconds, None without a budget.
+        """
+        now = self._clock()
+        elapsed = now - self._last_time
+        metrics = self.crawler.metrics
+        pages = self.crawler.store_stage.processed
+        downloaded = metrics.downloaded_bytes.value
+        pages_per_second = bytes_per_second = 0.0
+        if elapsed > 0:
+            pages_per_second = (pages - self._last_pages) / elapsed
+            bytes_per_second = (downloaded - self._last_bytes) / elapsed
+            if self._pages_per_second is None:
+                self._pages_per_second = pages_per_second
+            else:
+                self._pages_per_second += self.smoothing * (
+                    pages_per_second - self._pages_per_second
+                )
+            self._last_time = now
+            self._last_pages = pages
+            self._last_bytes = downloaded
+
+        errors = sum(
+            sum(histogram.counts)
+            for (status,), histogram in metrics.fetch_seconds.children.items()
+            if status == "error" or int(status) >= 400
+        )
+        retries = sum(counter.value for counter in metrics.retries.children.values())
+        return {
+            "elapsed": round(now - self._started_at, 3),
+            "pages": pages,
+            "pages_per_second": round(pages_per_second, 2),
+            "pages_per_second_ewma": round(self._pages_per_second or 0.0, 2),
+            "frontier": self.crawler.to_visit_queue.qsize(),
+            "in_flight": self.crawler.fetch_stage.busy,
+            "pending_retries": len(self.crawler.retry_scheduler),
+            "errors": errors,
+            "retries": int(retries),
+            "bytes_per_second": round(bytes_per_second),
+            "eta": self.eta(pages),
+        }
+
+    def eta(self, pages: int) -> float | None:
+        """
+        Returns the number of seconds left before the crawl budget runs out, None without a budget.
+        """
+        guard = self.crawler.crawl_guard
+        eta = None
+        if guard.budget.max_pages is not None and self._pages_per_second:
+            eta = max(0, guard.budget.max_pages - pages) / self._pages_per_second
+        remaining_time = guard.remaining_time
+        if remaining_time is not None:
+            eta = remaining_time if eta is None else min(eta, remaining_time)
+        return round(eta, 1) if eta is not None else None
+
+    def report(self) -> Dict:
+        """
+        Takes a snapshot, logs it and writes it to the JSON file if any.
+        """
+        status = self.snapshot()
+        logger.info(
+            "Status - %s pages, %0.1f pages/s (%0.1f avg), frontier %s, in flight %s, errors %s, retries %s, %0.1f KB/s, ETA %s",
+            status["pages"],
+            status["pages_per_second"],
+            status["pages_per_second_ewma"],
+            status["frontier"],
+            status["in_flight"],
+            status["errors"],
+            status["retries"],
+            status["bytes_per_second"] / 1e3,
+            f"{status['eta']:0.0f}s" if status["eta"] is not None else "unknown",
+        )
+        if self.path is not None:
+            self.write(status)
+        return status
+
+    def write(self, status: Dict):
+        """
+        Writes a status to the JSON file, replacing it atomically so readers never see a partial one.
+        """
+        temporary_path = self.path.with_name(f"{self.path.name}.tmp")
+        temporary_path.write_text(json.dumps(status, indent=4))
+        os.replace(temporary_path, self.path)
+
+    async def run(self):
+        """
+        Reports the status every interval seconds, until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            self.report()
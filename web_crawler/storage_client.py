@@ -1,4 +1,5 @@
 import json
+import time
 import logging
 from pathlib import Path
 from typing import List, Dict
@@ -11,8 +12,13 @@ class StorageClient:
     A class that provides storage functionality for URLs and their associated data.
     This class implements a simple key-value storage system where URLs serve as keys
     and can be associated with arbitrary data. The storage can be persisted to a JSON file.
+    New entries can be flushed incrementally to a JSON-lines journal next to it, so a crawl
+    killed before the end still leaves its data on disk. The fetch history of each URL
+    (fetch times, content hash and number of changes seen) is kept in a second file next
+    to it, for the recrawl scheduler.
     Attributes:
         storage (dict): Dictionary storing URL-data pairs
+        history (dict): Fetch history of each fetched URL
         output_file_path (Path): Directory path where storage file will be saved
         output_file_name (str): Name of the storage file
 
@@ -22,6 +28,8 @@ class StorageClient:
         self.storage = {}
         self.output_file_path = output_file_path
         self.output_file_name = output_file_name
+        self.history: Dict[str, Dict] = {}
+        self._unflushed: List[str] = []
 
     def add(self, url: str, data: List | None = None):
         """
@@ -31,20 +39,18 @@ class StorageClient:
             url (str): The URL to be added to the storage.
             data (optional): The data associated with the URL. Defaults to None.
         """
-        logger.info(f"Adding URL: {url} and data: {data}")
+        logger.debug("Adding URL: %s", url)
         self.storage[url] = data
+        self._unflushed.append(url)
 
     def remove(self, url: str):
         """
-        Remove a URL from the storage.
+        Remove a URL from the storage, if stored.
 
         Args:
             url (str): The URL to be removed from the storage.
-
-        Raises:
-            KeyError: If the URL is not found in the storage.
         """
-        self.storage.pop(url)
+        self.storage.pop(url, None)
 
     def get(self, url: str):
         """
@@ -74,12 +80,121 @@ class StorageClient:
         Returns:
             list: A list containing all keys in the storage.
         """
-        logger.info(f"Retrieving all keys from storage{self.storage.keys()}")
+        logger.debug("Retrieving %s keys from storage", len(self.storage))
         return self.storage.keys()
 
+    def record_fetch(
+        self, url: str, content_hash: str, fetched_at: float | None = None
+    ):
+        """
+        Records a fetch of a URL in its history, counting a change when its content hash differs from the previous fetch.
+
+        Args:
+            url (str): The fetched URL.
+            content_hash (str): Digest of the fetched content.
+            fetched_at (float, optional): UNIX timestamp of the fetch, defaults to now.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        entry = self.history.get(url)
+        if entry is None:
+            self.history[url] = {
+                "fetches": 1,
+                "changes": 0,
+                "first_fetch": fetched_at,
+                "last_fetch": fetched_at,
+                "last_change": fetched_at,
+                "hash": content_hash,
+            }
+            return
+        entry["fetches"] += 1
+        entry["last_fetch"] = fetched_at
+        if content_hash != entry["hash"]:
+            entry["changes"] += 1
+            entry["last_change"] = fetched_at
+            entry["hash"] = content_hash
+
+    @property
+    def history_path(self) -> Path:
+        """
+        Returns the path of the file the fetch history is written to.
+        """
+        return (
+            self.output_file_path / f"{Path(self.output_file_name).stem}.history.json"
+        )
+
+    def load(self) -> int:
+        """
+        Loads the storage and the fetch history written by a previous crawl, if any.
+
+        The journal left by a crawl killed before writing the storage file is replayed on top
+        of it, in order. A line cut short by the kill is skipped.
+
+        Returns:
+            int: The number of entries loaded.
+
+        Raises:
+            IOError: If a file exists but cannot be read.
+        """
+        output_file_path = self.output_file_path / self.output_file_name
+        if output_file_path.exists():
+            with open(output_file_path) as f:
+                self.storage.update(json.load(f))
+        if self.history_path.exists():
+            with open(self.history_path) as f:
+                self.history.update(json.load(f))
+        if self.journal_path.exists():
+            replayed = 0
+            with open(self.journal_path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning("Skipping a truncated journal entry: %r", line)
+                        continue
+                    self.storage[entry["url"]] = entry["data"]
+                    if "history" in entry:
+                        self.history[entry["url"]] = entry["history"]
+                    replayed += 1
+            logger.info("Replayed %s entries of %s", replayed, self.journal_path)
+        return len(self.storage)
+
+    @property
+    def journal_path(self) -> Path:
+        """
+        Returns the path of the JSON-lines journal the new entries are flushed to.
+        """
+        return (
+            self.output_file_path / f"{Path(self.output_file_name).stem}.journal.jsonl"
+        )
+
+    def flush(self) -> int:
+        """
+        Appends the entries added since the last flush to the journal, one JSON object per line,
+        with their fetch history if any.
+
+        Only the new entries are written, so flushing costs O(new entries) whatever the size of the storage.
+
+        Returns:
+            int: The number of entries flushed.
+
+        Raises:
+            IOError: If the journal cannot be opened or written to.
+        """
+        if not self._unflushed:
+            return 0
+        with open(self.journal_path, "a") as f:
+            for url in self._unflushed:
+                entry = {"url": url, "data": self.storage.get(url)}
+                if url in self.history:
+                    entry["history"] = self.history[url]
+                f.write(json.dumps(entry) + "\n")
+        flushed = len(self._unflushed)
+        self._unflushed.clear()
+        return flushed
+
     def write_to_file(self):
         """
-        Writes the contents of the storage to a file in JSON format.
+        Writes the contents of the storage, and the fetch history if any, to files in JSON format, the journal is then removed.
 
         Raises:
             IOError: If the file cannot be opened or written to.
@@ -87,6 +202,11 @@ class StorageClient:
         output_file_path = self.output_file_path / self.output_file_name
         with open(output_file_path, "w") as f:
             f.write(json.dumps(self.storage, indent=4))
+        if self.history:
+            with open(self.history_path, "w") as f:
+                json.dump(self.history, f)
+        self._unflushed.clear()
+        self.journal_path.unlink(missing_ok=True)
 
     def contains(self, url: str) -> bool:
         """
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from web_crawler.concurrency_controller import AdaptiveConcurrencyController
+
+
+def test_invalid_bounds():
+    with pytest.raises(ValueError):
+        AdaptiveConcurrencyController(min_concurrency=4, max_concurrency=2)
+
+
+def test_additive_increase_up_to_max():
+    controller = AdaptiveConcurrencyController(min_concurrency=1, max_concurrency=3)
+
+    for _ in range(50):
+        controller.record("example.com", 0.1)
+
+    assert controller.stats()["example.com"]["limit"] == 3
+
+
+def test_multiplicative_decrease_on_congestion():
+    controller = AdaptiveConcurrencyController(min_concurrency=1, max_concurrency=8)
+    controller._state("example.com").limit = 8
+
+    controller.record("example.com", 0.1, congested=True)
+
+    stats = controller.stats()["example.com"]
+    assert stats["limit"] == 4
+    assert stats["decreases"] == 1
+
+
+def test_decrease_on_latency_spike_bounded_by_min():
+    controller = AdaptiveConcurrencyController(
+        min_concurrency=2, max_concurrency=8, max_latency=1, min_samples=3
+    )
+
+    for _ in range(3):
+        controller.record("example.com", 5)
+
+    assert controller.stats()["example.com"]["limit"] == 2
+    assert controller.stats()["example.com"]["decreases"] == 1
+
+
+def test_decrease_cooldown_while_in_flight():
+    controller = AdaptiveConcurrencyController(min_concurrency=1, max_concurrency=8)
+    state = controller._state("example.com")
+    state.limit = 8
+    state.in_flight = 4
+
+    controller.record("example.com", 0.1, congested=True)
+    controller.record("example.com", 0.1, congested=True)
+
+    assert controller.stats()["example.com"]["limit"] == 4
+
+
+@pytest.mark.asyncio
+async def test_slot_limits_in_flight():
+    controller = AdaptiveConcurrencyController(min_concurrency=1, max_concurrency=1)
+    running = []
+
+    async def fetch(i):
+        async with controller.slot("example.com"):
+            running.append(controller.stats()["example.com"]["in_flight"])
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(fetch(i) for i in range(5)))
+
+    assert running == [1, 1, 1, 1, 1]
+    assert controller.stats()["example.com"]["in_flight"] == 0
@@ -0,0 +1,128 @@
+import asyncio
+import pytest
+from web_crawler.coordinator import Coordinator, CoordinatorClient, parse_address
+from web_crawler.crawl_budget import CrawlBudget
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_coordinator(**kwargs):
+    coordinator = Coordinator("https://example.com", clock=FakeClock(), **kwargs)
+    # No politeness, every URL can be leased right away
+    coordinator.rate_limiter.default_rate = float("inf")
+    coordinator.rate_limiter.buckets.clear()
+    return coordinator
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        ("127.0.0.1:8765", ("tcp", "127.0.0.1", 8765)),
+        (":8765", ("tcp", "127.0.0.1", 8765)),
+        ("unix:/tmp/crawl.sock", ("unix", "/tmp/crawl.sock", None)),
+    ],
+)
+def test_parse_address(address, expected):
+    assert parse_address(address) == expected
+
+
+def test_parse_address_invalid():
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+def test_lease_complete_discover():
+    coordinator = make_coordinator()
+
+    response = coordinator.handle({"op": "lease", "worker": "w1", "max": 10})
+    assert response["done"] is False
+    [[lease_id, url, depth, parent]] = response["urls"]
+    assert (url, depth, parent) == ("https://example.com", 0, None)
+
+    coordinator.handle(
+        {
+            "op": "discover",
+            "worker": "w1",
+            "urls": [
+                ["https://example.com/a", 1, url],
+                ["https://example.com", 1, url],
+            ],
+        }
+    )
+    coordinator.handle({"op": "complete", "worker": "w1", "ids": [lease_id]})
+
+    assert coordinator.frontier.qsize() == 1
+    assert coordinator.done is False
+    [[lease_id, url, _, _]] = coordinator.lease("w2", 10)["urls"]
+    assert url == "https://example.com/a"
+    coordinator.complete("w2", [lease_id], {})
+    assert coordinator.lease("w2", 10) == {"urls": [], "done": True}
+
+
+def test_discover_within_budget():
+    coordinator = make_coordinator(budget=CrawlBudget(max_depth=1))
+
+    response = coordinator.discover(
+        "w1", [["https://example.com/a", 1, None], ["https://example.com/b", 2, None]]
+    )
+
+    assert response == {"accepted": 1}
+    assert coordinator.crawl_guard.stats()["rejected"] == {"depth": 1}
+
+
+def test_dead_worker_leases_reissued():
+    coordinator = make_coordinator(lease_timeout=10)
+    [[lease_id, url, _, _]] = coordinator.lease("w1", 10)["urls"]
+
+    coordinator._clock.now = 5
+    assert coordinator.lease("w2", 10)["urls"] == []
+    coordinator._clock.now = 11
+    [[_, reissued_url, _, _]] = coordinator.lease("w2", 10)["urls"]
+
+    assert reissued_url == url
+    assert coordinator.reissued == 1
+    # The late completion of the dead worker is ignored
+    assert coordinator.complete("w1", [lease_id], {}) == {"completed": 0}
+    assert coordinator.done is False
+
+
+def test_complete_configures_host_rate():
+    coordinator = Coordinator("https://example.com")
+
+    coordinator.complete("w1", [], {"example.com": 10.0})
+
+    assert coordinator.rate_limiter.buckets["example.com"].rate == 10.0
+
+
+def test_invalid_requests():
+    coordinator = make_coordinator()
+
+    assert "error" in coordinator.handle({"op": "unknown"})
+    assert "error" in coordinator.handle({"op": "discover", "urls": [["a"]]})
+
+
+@pytest.mark.asyncio
+async def test_client_round_trip(tmp_path):
+    coordinator = make_coordinator()
+    address = f"unix:{tmp_path}/coordinator.sock"
+    server = asyncio.create_task(coordinator.serve(address))
+    await asyncio.sleep(0.05)
+    client = CoordinatorClient(address)
+
+    hello = await client.call("hello", worker="w1")
+    leased = await client.call("lease", worker="w1", max=1)
+    await client.call("complete", worker="w1", ids=[leased["urls"][0][0]])
+    with pytest.raises(ValueError):
+        await client.call("unknown")
+    done = await client.call("lease", worker="w1", max=1)
+    await client.close()
+    await asyncio.wait_for(server, 1)
+
+    assert hello["start_url"] == "https://example.com"
+    assert done == {"urls": [], "done": True}
@@ -0,0 +1,91 @@
+import pytest
+from web_crawler.crawl_budget import CrawlBudget, CrawlGuard
+from web_crawler.url_container import URLContainer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_max_depth():
+    crawl_guard = CrawlGuard(CrawlBudget(max_depth=2))
+
+    assert crawl_guard.admit(URLContainer("https://example.com/a", depth=2)) is True
+    assert crawl_guard.admit(URLContainer("https://example.com/b", depth=3)) is False
+    assert crawl_guard.stats() == {"admitted": 1, "rejected": {"depth": 1}}
+
+
+def test_max_pages():
+    crawl_guard = CrawlGuard(CrawlBudget(max_pages=2, max_pages_per_host=1))
+
+    assert crawl_guard.admit(URLContainer("https://example.com/a")) is True
+    assert crawl_guard.check(URLContainer("https://example.com/b")) == "pages_per_host"
+    assert crawl_guard.admit(URLContainer("https://blog.example.com/a")) is True
+    assert crawl_guard.check(URLContainer("https://docs.example.com/a")) == "pages"
+
+
+def test_max_url_length():
+    crawl_guard = CrawlGuard(CrawlBudget(max_url_length=30))
+
+    assert crawl_guard.check(URLContainer("https://example.com/a")) is None
+    assert (
+        crawl_guard.check(URLContainer("https://example.com/" + "a" * 20))
+        == "url_length"
+    )
+
+
+def test_max_duration():
+    clock = FakeClock()
+    crawl_guard = CrawlGuard(CrawlBudget(max_duration=10), clock=clock)
+    crawl_guard.start()
+
+    clock.now = 4
+    assert crawl_guard.remaining_time == 6
+    assert crawl_guard.check(URLContainer("https://example.com/a")) is None
+    clock.now = 10
+    assert crawl_guard.check(URLContainer("https://example.com/a")) == "duration"
+
+
+@pytest.mark.parametrize(
+    "url, reason",
+    [
+        ("https://example.com/a/b/a/b/a/b", None),
+        ("https://example.com/a/b/a/b/a/b/a/b", "repeated_segments"),
+        ("https://example.com/a/a/a/a", "repeated_segments"),
+    ],
+)
+def test_repeated_segments(url, reason):
+    crawl_guard = CrawlGuard()
+
+    assert crawl_guard.check(URLContainer(url)) == reason
+
+
+def test_query_variants():
+    crawl_guard = CrawlGuard(CrawlBudget(max_query_variants=3))
+    for day in range(3):
+        assert crawl_guard.admit(
+            URLContainer(f"https://example.com/calendar?day={day}")
+        )
+
+    assert (
+        crawl_guard.check(URLContainer("https://example.com/calendar?day=4"))
+        == "query_variants"
+    )
+    assert crawl_guard.check(URLContainer("https://example.com/calendar")) is None
+    assert crawl_guard.check(URLContainer("https://example.com/events?day=4")) is None
+
+
+def test_pages_per_prefix():
+    crawl_guard = CrawlGuard(CrawlBudget(max_pages_per_prefix=2, prefix_depth=1))
+    crawl_guard.admit(URLContainer("https://example.com/tags/a"))
+    crawl_guard.admit(URLContainer("https://example.com/tags/b"))
+
+    assert (
+        crawl_guard.check(URLContainer("https://example.com/tags/c"))
+        == "pages_per_prefix"
+    )
+    assert crawl_guard.check(URLContainer("https://example.com/posts/c")) is None
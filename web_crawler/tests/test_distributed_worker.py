@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from benchmarks.synthetic_site import SyntheticSite
+from web_crawler.coordinator import Coordinator
+from web_crawler.distributed_worker import DistributedWorker
+from web_crawler.web_crawler import WebCrawler
+from web_crawler.storage_client import StorageClient
+from web_crawler.url_container import URLContainer
+
+
+@pytest.mark.asyncio
+async def test_sync_sends_discoveries_before_completions():
+    client = MagicMock()
+    client.call = AsyncMock(
+        return_value={"urls": [[7, "https://example.com/a", 1, None]], "done": False}
+    )
+    worker = DistributedWorker(
+        "https://example.com",
+        client,
+        "w1",
+        network_client=MagicMock(),
+        storage_client=MagicMock(),
+    )
+    await worker.sync()
+    item = worker.to_visit_queue.get_nowait()
+
+    await worker.enqueue(URLContainer("https://example.com/b", depth=2))
+    worker.finish(item)
+    await worker.sync()
+
+    ops = [(call.args[0], call.kwargs) for call in client.call.await_args_list]
+    assert ops[1] == (
+        "discover",
+        {"worker": "w1", "urls": [["https://example.com/b", 2, None]]},
+    )
+    assert ops[2] == ("complete", {"worker": "w1", "ids": [7], "rates": {}})
+    assert ops[3][0] == "lease"
+
+
+@pytest.mark.asyncio
+async def test_distributed_crawl_matches_single_process(tmp_path):
+    site = SyntheticSite(pages=60, hosts=6, fan_out=4)
+    single = WebCrawler(
+        site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(
+            output_file_path=tmp_path, output_file_name="single.json"
+        ),
+        num_workers=4,
+    )
+    await single.crawl_with_workers()
+
+    address = f"unix:{tmp_path}/coordinator.sock"
+    coordinator = Coordinator(site.start_url, lease_timeout=5)
+    server = asyncio.create_task(coordinator.serve(address))
+    await asyncio.sleep(0.05)
+    workers = [
+        await DistributedWorker.connect(
+            address,
+            f"w{i}",
+            network_client=site.network_client(),
+            storage_client=StorageClient(
+                output_file_path=tmp_path, output_file_name=f"w{i}.json"
+            ),
+            num_workers=2,
+        )
+        for i in range(2)
+    ]
+    await asyncio.gather(*(worker.crawl_with_workers() for worker in workers))
+    await asyncio.wait_for(server, 5)
+
+    merged = {}
+    for worker in workers:
+        merged.update(worker.storage_client.get_all())
+    assert coordinator.completed == 60
+    assert merged.keys() == single.storage_client.get_all().keys()
@@ -0,0 +1,67 @@
+import sys
+import time
+import types
+import asyncio
+import pytest
+from web_crawler.event_loop import LoopLagMonitor, loop_factory, run
+
+
+def test_loop_factory_asyncio():
+    assert loop_factory("asyncio") is None
+
+
+def test_loop_factory_auto_falls_back(monkeypatch):
+    monkeypatch.setitem(sys.modules, "uvloop", None)
+
+    assert loop_factory("auto") is None
+    with pytest.raises(ImportError):
+        loop_factory("uvloop")
+
+
+def test_loop_factory_uvloop(monkeypatch):
+    uvloop = types.ModuleType("uvloop")
+    uvloop.new_event_loop = asyncio.new_event_loop
+    monkeypatch.setitem(sys.modules, "uvloop", uvloop)
+
+    assert loop_factory("auto") is asyncio.new_event_loop
+    assert loop_factory("uvloop") is asyncio.new_event_loop
+
+
+def test_loop_factory_unknown():
+    with pytest.raises(ValueError):
+        loop_factory("trio")
+
+
+def test_run():
+    async def main():
+        return 42
+
+    assert run(main(), "asyncio") == 42
+
+
+def test_stats():
+    monitor = LoopLagMonitor()
+    for lag in range(100):
+        monitor.record(lag / 1000)
+    monitor.record(-0.001)
+
+    assert monitor.stats() == {
+        "p50_ms": 49.0,
+        "p99_ms": 98.0,
+        "max_ms": 99.0,
+        "samples": 101,
+    }
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_detected():
+    monitor = LoopLagMonitor(interval=0.01)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.02)
+
+    time.sleep(0.1)
+    await asyncio.sleep(0.02)
+    task.cancel()
+
+    assert monitor.max_lag >= 0.08
+    assert monitor.percentile(50) < 0.08
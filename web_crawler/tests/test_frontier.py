@@ -0,0 +1,156 @@
+import asyncio
+import pytest
+import random
+from web_crawler.frontier import Frontier, IndexedHeap
+from web_crawler.scoring import InLinkScorer, depth_score
+from web_crawler.rate_limiter import RateLimiter, host_key
+from web_crawler.concurrency_controller import AdaptiveConcurrencyController
+from web_crawler.url_container import URLContainer
+from web_crawler.exceptions import FrontierClosed
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fifo_per_host():
+    frontier = Frontier()
+    for path in ("a", "b", "c"):
+        frontier.put_nowait(URLContainer(f"https://example.com/{path}"))
+
+    assert frontier.qsize() == 3
+    assert [frontier.get_nowait().url for _ in range(3)] == [
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://example.com/c",
+    ]
+    assert frontier.empty()
+
+
+def test_busy_host_does_not_block_other_hosts():
+    clock = FakeClock()
+    rate_limiter = RateLimiter(default_rate=1, clock=clock)
+    frontier = Frontier(rate_limiter=rate_limiter, clock=clock)
+    frontier.put_nowait(URLContainer("https://example.com/a"))
+    frontier.put_nowait(URLContainer("https://example.com/b"))
+    frontier.put_nowait(URLContainer("https://blog.example.com/a"))
+
+    item = frontier.get_nowait()
+    rate_limiter.reserve(host_key(item.url))
+
+    assert frontier.get_nowait().url == "https://blog.example.com/a"
+    with pytest.raises(asyncio.QueueEmpty):
+        frontier.get_nowait()
+
+    clock.now = 1
+    assert frontier.get_nowait().url == "https://example.com/b"
+
+
+def test_host_blocked_on_concurrency_until_released():
+    controller = AdaptiveConcurrencyController(min_concurrency=1, max_concurrency=1)
+    frontier = Frontier(concurrency_controller=controller)
+    controller.on_release = frontier.wake
+    frontier.put_nowait(URLContainer("https://example.com/a"))
+    frontier.put_nowait(URLContainer("https://example.com/b"))
+
+    frontier.get_nowait()
+    controller._state("example.com").in_flight = 1
+    with pytest.raises(asyncio.QueueEmpty):
+        frontier.get_nowait()
+
+    controller.release("example.com")
+    assert frontier.get_nowait().url == "https://example.com/b"
+
+
+@pytest.mark.asyncio
+async def test_get_waits_for_ready_host():
+    rate_limiter = RateLimiter(default_rate=50)
+    frontier = Frontier(rate_limiter=rate_limiter)
+    frontier.put_nowait(URLContainer("https://example.com/a"))
+    frontier.put_nowait(URLContainer("https://example.com/b"))
+
+    await frontier.get()
+    rate_limiter.reserve("example.com")
+    item = await asyncio.wait_for(frontier.get(), 1)
+
+    assert item.url == "https://example.com/b"
+
+
+@pytest.mark.asyncio
+async def test_join():
+    frontier = Frontier()
+    frontier.put_nowait(URLContainer("https://example.com"))
+
+    frontier.get_nowait()
+    frontier.task_done()
+
+    await asyncio.wait_for(frontier.join(), 1)
+    with pytest.raises(ValueError):
+        frontier.task_done()
+
+
+def test_indexed_heap_matches_sorted_order():
+    heap = IndexedHeap()
+    priorities = {f"url{i}": random.random() for i in range(200)}
+    for key, priority in priorities.items():
+        heap.push(URLContainer(key), priority)
+    for key in random.sample(list(priorities), 50):
+        priorities[key] = random.random()
+        heap.update(key, priorities[key])
+
+    popped = [heap.pop().url for _ in range(len(heap))]
+
+    assert popped == sorted(priorities, key=priorities.get)
+
+
+def test_priority_by_depth():
+    frontier = Frontier(scorer=depth_score)
+    frontier.put_nowait(URLContainer("https://example.com/deep", depth=5))
+    frontier.put_nowait(URLContainer("https://example.com/shallow", depth=1))
+
+    assert frontier.get_nowait().url == "https://example.com/shallow"
+
+
+def test_rediscovered_url_bumped_in_place():
+    frontier = Frontier(scorer=depth_score)
+    frontier.put_nowait(URLContainer("https://example.com/a", depth=3))
+    frontier.put_nowait(URLContainer("https://example.com/b", depth=2))
+    frontier.put_nowait(
+        URLContainer("https://example.com/a", depth=1, parent="https://example.com")
+    )
+
+    assert frontier.qsize() == 2
+    item = frontier.get_nowait()
+    assert item.url == "https://example.com/a"
+    assert item.depth == 1
+    assert item.parent == "https://example.com"
+
+
+def test_priority_by_in_links():
+    frontier = Frontier(scorer=InLinkScorer())
+    frontier.put_nowait(URLContainer("https://example.com/a"))
+    frontier.put_nowait(URLContainer("https://example.com/b"))
+    frontier.put_nowait(URLContainer("https://example.com/b"))
+
+    assert frontier.get_nowait().url == "https://example.com/b"
+    assert frontier.unfinished_tasks == 2
+
+
+@pytest.mark.asyncio
+async def test_close_wakes_up_getters():
+    frontier = Frontier()
+    getter = asyncio.create_task(frontier.get())
+    await asyncio.sleep(0)
+
+    frontier.close()
+    frontier.put_nowait(URLContainer("https://example.com"))
+
+    with pytest.raises(FrontierClosed):
+        await asyncio.wait_for(getter, 1)
+    with pytest.raises(FrontierClosed):
+        frontier.get_nowait()
+    assert [item.url for item in frontier.items()] == ["https://example.com"]
@@ -0,0 +1,95 @@
+import json
+import pytest
+
+from web_crawler.link_graph import LinkGraph
+from web_crawler.storage_client import StorageClient
+
+LINKS = {
+    "https://example.com": [
+        "https://example.com/b",
+        "https://example.com/a",
+        "https://example.com/b",
+    ],
+    "https://example.com/a": ["https://example.com", "https://пример.рф"],
+    "https://example.com/b": [],
+}
+
+
+@pytest.fixture
+def graph(tmp_path):
+    LinkGraph.write(LINKS, tmp_path)
+    with LinkGraph(tmp_path) as graph:
+        yield graph
+
+
+def test_write_counts_nodes_and_unique_links(tmp_path):
+    assert LinkGraph.write(LINKS, tmp_path) == (4, 4)
+    assert json.loads((tmp_path / "graph.json").read_text())["links"] == 4
+
+
+def test_urls_are_sorted(graph):
+    assert [graph.url(node) for node in range(len(graph))] == [
+        "https://example.com",
+        "https://example.com/a",
+        "https://example.com/b",
+        "https://пример.рф",
+    ]
+
+
+def test_csr_arrays(graph):
+    assert list(graph.indptr) == [0, 2, 4, 4, 4]
+    assert list(graph.indices) == [1, 2, 0, 3]
+    assert list(graph.neighbors(1)) == [0, 3]
+    assert graph.num_links == 4
+
+
+def test_lookup_by_url(graph):
+    assert graph.node("https://пример.рф") == 3
+    assert graph.links("https://example.com") == [
+        "https://example.com/a",
+        "https://example.com/b",
+    ]
+    assert graph.links("https://пример.рф") == []
+    with pytest.raises(KeyError):
+        graph.node("https://example.com/c")
+
+
+def test_empty_graph(tmp_path):
+    LinkGraph.write({}, tmp_path)
+
+    with LinkGraph(tmp_path) as graph:
+        assert len(graph) == 0
+        with pytest.raises(KeyError):
+            graph.node("https://example.com")
+
+
+def test_truncated_files(tmp_path):
+    LinkGraph.write(LINKS, tmp_path)
+    (tmp_path / "indices.bin").write_bytes(b"\0" * 4)
+
+    with pytest.raises(ValueError):
+        LinkGraph(tmp_path)
+
+
+def test_from_storage(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+    storage_client.add("https://example.com", {"links": ["https://example.com/a"]})
+    storage_client.add("https://example.com/a")
+    storage_client.write_to_file()
+
+    assert LinkGraph.from_storage(tmp_path / "storage.json", tmp_path / "graph") == (
+        2,
+        1,
+    )
+    with LinkGraph(tmp_path / "graph") as graph:
+        assert graph.links("https://example.com") == ["https://example.com/a"]
+
+
+def test_numpy_views(graph):
+    numpy = pytest.importorskip("numpy")
+
+    indptr, indices = graph.numpy()
+
+    assert indptr.dtype == numpy.dtype("<u4")
+    assert indices.tolist() == [1, 2, 0, 3]
+    del indptr, indices
@@ -0,0 +1,51 @@
+import logging
+from web_crawler.log_sampler import LogSampler
+
+
+def record(message="Visiting %s", args=("https://example.com",), lineno=1):
+    return logging.LogRecord(
+        "web_crawler", logging.INFO, "web_crawler.py", lineno, message, args, None
+    )
+
+
+def test_burst_then_sample():
+    sampler = LogSampler(burst=3, sample_every=5, clock=lambda: 0.0)
+
+    passed = [sampler.filter(record()) for _ in range(13)]
+
+    # 3 in the burst, then the 5th and 10th past it
+    assert passed == [True] * 3 + [False] * 4 + [True] + [False] * 4 + [True]
+
+
+def test_call_sites_are_limited_separately():
+    sampler = LogSampler(burst=1, sample_every=0, clock=lambda: 0.0)
+
+    assert sampler.filter(record(lineno=1))
+    assert sampler.filter(record(lineno=2))
+    assert not sampler.filter(record(lineno=1))
+
+
+def test_window_reset_reports_dropped():
+    now = [0.0]
+    sampler = LogSampler(burst=1, period=1.0, sample_every=0, clock=lambda: now[0])
+    sampler.filter(record())
+    sampler.filter(record())
+    sampler.filter(record())
+
+    now[0] = 1.0
+    reported = record()
+
+    assert sampler.filter(reported)
+    assert (
+        reported.getMessage()
+        == "Visiting https://example.com (2 similar messages dropped)"
+    )
+
+
+def test_errors_always_pass():
+    sampler = LogSampler(burst=0, sample_every=0, clock=lambda: 0.0)
+    error = record()
+    error.levelno = logging.ERROR
+
+    assert sampler.filter(error)
+    assert not sampler.filter(record())
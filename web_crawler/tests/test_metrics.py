@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from web_crawler.metrics import MetricsRegistry
+
+
+def test_render_counter_and_gauge():
+    registry = MetricsRegistry()
+    pages = registry.counter("pages_total", "Pages crawled")
+    retries = registry.counter("retries_total", "Retries", ("reason",))
+    queue = registry.gauge("queue_depth", "Queued URLs")
+    pages.inc()
+    pages.inc(2)
+    retries.labels("rate_limit").inc()
+    queue.set_function(lambda: 7)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE pages_total counter" in lines
+    assert "pages_total 3" in lines
+    assert 'retries_total{reason="rate_limit"} 1' in lines
+    assert "queue_depth 7" in lines
+
+
+def test_render_histogram_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram(
+        "fetch_seconds", "Fetch latency", ("status",), buckets=(0.1, 1.0)
+    )
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.labels("200").observe(value)
+
+    lines = registry.render().splitlines()
+
+    assert 'fetch_seconds_bucket{status="200",le="0.1"} 2' in lines
+    assert 'fetch_seconds_bucket{status="200",le="1"} 3' in lines
+    assert 'fetch_seconds_bucket{status="200",le="+Inf"} 4' in lines
+    assert 'fetch_seconds_count{status="200"} 4' in lines
+    assert 'fetch_seconds_sum{status="200"} 3.65' in lines
+
+
+def test_register_twice_raises():
+    registry = MetricsRegistry()
+    registry.counter("pages_total", "Pages crawled")
+
+    with pytest.raises(ValueError):
+        registry.gauge("pages_total", "Pages crawled")
+
+
+@pytest.mark.asyncio
+async def test_exporting_writes_snapshots(tmp_path):
+    registry = MetricsRegistry()
+    pages = registry.counter("pages_total", "Pages crawled")
+    path = tmp_path / "metrics.prom"
+
+    async with registry.exporting(path=path, interval=0.01):
+        pages.inc(5)
+        await asyncio.sleep(0.05)
+        assert "pages_total 5" in path.read_text().splitlines()
+        pages.inc()
+
+    # Written one last time on exit
+    assert "pages_total 6" in path.read_text().splitlines()
+
+
+@pytest.mark.asyncio
+async def test_serve_metrics_over_http():
+    registry = MetricsRegistry()
+    registry.counter("pages_total", "Pages crawled").inc(5)
+    server = await registry.serve(0, host="127.0.0.1")
+    port = server.sockets[0].getsockname()[1]
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    response = await reader.read()
+    writer.close()
+    server.close()
+    await server.wait_closed()
+
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert response.endswith(b"pages_total 5\n")
@@ -1,5 +1,6 @@
 import pytest
 from web_crawler.network_client import NetworkClient
+from web_crawler.exceptions import RedirectException
 import httpx
 
 
@@ -37,17 +38,98 @@ async def test_query_html_429():
 
 
 @pytest.mark.asyncio
-async def test_query_html_302():
+@pytest.mark.parametrize("status_code", [301, 302, 303, 307, 308])
+async def test_fetch_follows_redirect(status_code):
+    # Arrange
+    def handler(request):
+        if request.url.path == "/old":
+            return httpx.Response(status_code, headers={"Location": "/new"})
+        return httpx.Response(
+            200, headers={"Content-type": "text/html"}, text="<html></html>"
+        )
+
+    transport = httpx.MockTransport(handler=handler)
+    network_client = NetworkClient(client=httpx.AsyncClient(transport=transport))
+    url = "https://example.com/old"
+
+    result = await network_client.fetch(url)
+
+    assert result.final_url == "https://example.com/new"
+    assert result.status_code == 200
+    assert result.redirects == ["https://example.com/old"]
+    assert str(result.html) == "<html></html>"
+
+
+@pytest.mark.asyncio
+async def test_fetch_redirect_not_followed():
     # Arrange
     transport = httpx.MockTransport(
         handler=lambda request: httpx.Response(
-            302, headers={"Content-type": "text/html"}, text="<html></html>"
+            302, headers={"Location": "https://other.com/"}
         )
     )
     network_client = NetworkClient(client=httpx.AsyncClient(transport=transport))
     url = "https://example.com"
 
-    with pytest.raises(httpx.HTTPStatusError) as exc:
-        await network_client.query_html(url)
+    async def follow_redirect(source_url, target_url):
+        return False
+
+    result = await network_client.fetch(url, follow_redirect=follow_redirect)
+
+    assert result.final_url == "https://other.com/"
+    assert result.followed is False
+    assert result.html is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_redirect_loop():
+    # Arrange
+    def handler(request):
+        target = "/b" if request.url.path == "/a" else "/a"
+        return httpx.Response(301, headers={"Location": target})
+
+    transport = httpx.MockTransport(handler=handler)
+    network_client = NetworkClient(client=httpx.AsyncClient(transport=transport))
+    url = "https://example.com/a"
+
+    with pytest.raises(RedirectException) as exc:
+        await network_client.fetch(url)
+
+    assert exc.value.redirect_url == "https://example.com/a"
+
+
+@pytest.mark.asyncio
+async def test_fetch_too_many_redirects():
+    # Arrange
+    def handler(request):
+        hop = int(request.url.path.strip("/") or 0)
+        return httpx.Response(302, headers={"Location": f"/{hop + 1}"})
+
+    transport = httpx.MockTransport(handler=handler)
+    network_client = NetworkClient(
+        client=httpx.AsyncClient(transport=transport), max_redirects=3
+    )
+    url = "https://example.com/"
+
+    with pytest.raises(RedirectException) as exc:
+        await network_client.fetch(url)
+
+    assert exc.value.status_code == 302
+
+
+@pytest.mark.asyncio
+async def test_fetch_content_hash():
+    # Arrange
+    transport = httpx.MockTransport(
+        handler=lambda request: httpx.Response(
+            200, headers={"Content-type": "text/html"}, text=request.url.path
+        )
+    )
+    network_client = NetworkClient(client=httpx.AsyncClient(transport=transport))
+
+    first = await network_client.fetch("https://example.com/a")
+    second = await network_client.fetch("https://example.com/a")
+    other = await network_client.fetch("https://example.com/b")
 
-    assert exc.value.response.status_code == 302
+    assert first.content_hash == second.content_hash
+    assert first.content_hash != other.content_hash
@@ -0,0 +1,111 @@
+import asyncio
+import pytest
+from web_crawler.pipeline import PipelineStage
+
+
+@pytest.mark.asyncio
+async def test_stage_handles_queued_items():
+    handled = []
+
+    async def handler(item):
+        handled.append(item)
+
+    stage = PipelineStage("store", handler, concurrency=2, queue_size=4)
+    tasks = stage.start()
+    for item in range(10):
+        await stage.submit(item)
+    await stage.join()
+    for task in tasks:
+        task.cancel()
+
+    assert sorted(handled) == list(range(10))
+    assert stage.stats()["processed"] == 10
+    assert stage.stats()["queue_size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_blocks_submit():
+    release = asyncio.Event()
+
+    async def handler(item):
+        await release.wait()
+
+    stage = PipelineStage("parse", handler, queue_size=1)
+    tasks = stage.start()
+    # One item being handled, one waiting in the queue
+    await stage.submit(1)
+    await stage.submit(2)
+    blocked = asyncio.create_task(stage.submit(3))
+    await asyncio.sleep(0.01)
+
+    assert not blocked.done()
+    assert stage.stats()["busy"] == 1
+    assert stage.stats()["queue_size"] == 1
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await stage.join()
+    for task in tasks:
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_stage_not_started_handles_inline():
+    handled = []
+
+    async def handler(item):
+        handled.append(item)
+
+    stage = PipelineStage("store", handler)
+    await stage.submit(1)
+
+    assert handled == [1]
+    assert stage.stats()["processed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_handler_error_does_not_stop_stage():
+    handled = []
+
+    async def handler(item):
+        if item == 1:
+            raise ValueError("bad item")
+        handled.append(item)
+
+    stage = PipelineStage("store", handler, queue_size=2)
+    tasks = stage.start()
+    await stage.submit(1)
+    await stage.submit(2)
+    await stage.join()
+    for task in tasks:
+        task.cancel()
+
+    assert handled == [2]
+
+
+@pytest.mark.asyncio
+async def test_drain_pending():
+    async def handler(item):
+        pass
+
+    stage = PipelineStage("parse", handler, queue_size=3)
+    await stage.queue.put(1)
+    await stage.queue.put(2)
+
+    assert stage.drain_pending() == [1, 2]
+    await asyncio.wait_for(stage.join(), 1)
+
+
+def test_utilization():
+    now = [0.0]
+    stage = PipelineStage("fetch", concurrency=2, clock=lambda: now[0])
+    stage.start()
+    with stage.serving():
+        now[0] = 1.0
+
+    assert stage.stats() == {
+        "concurrency": 2,
+        "busy": 0,
+        "processed": 1,
+        "mean_ms": 1000.0,
+        "utilization": 0.5,
+    }
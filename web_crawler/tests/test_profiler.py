@@ -0,0 +1,73 @@
+import json
+import pstats
+import asyncio
+import pytest
+from benchmarks.synthetic_site import SyntheticSite
+from web_crawler.profiler import CrawlProfiler
+from web_crawler.storage_client import StorageClient
+from web_crawler.web_crawler import WebCrawler
+
+
+def crawler(site, tmp_path):
+    return WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+    )
+
+
+@pytest.mark.asyncio
+async def test_cprofile_writes_pstats_and_stages(tmp_path):
+    site = SyntheticSite(pages=30, hosts=2)
+    profiler = CrawlProfiler("cprofile", tmp_path / "profile")
+
+    await profiler.profile(crawler(site, tmp_path).crawl_with_workers())
+
+    assert pstats.Stats(str(tmp_path / "profile.pstats")).total_calls > 0
+    stages = json.loads((tmp_path / "profile.stages.json").read_text())
+    assert stages["mode"] == "cprofile"
+    assert stages["stage_seconds"]["fetch"] > 0
+    assert stages["stage_seconds"]["store"] > 0
+
+
+@pytest.mark.asyncio
+async def test_sampling_writes_collapsed_stacks(tmp_path):
+    site = SyntheticSite(pages=100, hosts=2, page_size=20000)
+    profiler = CrawlProfiler("sampling", tmp_path / "profile", interval=0.001)
+
+    await profiler.profile(crawler(site, tmp_path).crawl_with_workers())
+
+    lines = (tmp_path / "profile.collapsed").read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert ";" in stack
+    stages = json.loads((tmp_path / "profile.stages.json").read_text())
+    assert stages["stage_seconds"]["parse"] > 0
+
+
+@pytest.mark.asyncio
+async def test_window_not_started(tmp_path):
+    profiler = CrawlProfiler("cprofile", tmp_path / "profile", start_after=10)
+
+    await profiler.profile(asyncio.sleep(0.01))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_window_duration(tmp_path):
+    profiler = CrawlProfiler(
+        "sampling", tmp_path / "profile", start_after=0.01, duration=0.05
+    )
+
+    await profiler.profile(asyncio.sleep(0.2))
+
+    stages = json.loads((tmp_path / "profile.stages.json").read_text())
+    assert 0.04 < stages["wall_seconds"] < 0.15
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        CrawlProfiler("perf")
@@ -0,0 +1,63 @@
+import pytest
+from urllib.robotparser import RequestRate
+from web_crawler.rate_limiter import RateLimiter, TokenBucket, host_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_host_key():
+    assert host_key("https://www.Example.com:8080/about") == "www.example.com"
+    assert host_key("/about") == ""
+
+
+def test_token_bucket_reserve():
+    bucket = TokenBucket(rate=2, capacity=1, tokens=1, updated_at=0)
+
+    assert bucket.reserve(0) == 0
+    assert bucket.reserve(0) == 0.5
+    assert bucket.reserve(0) == 1.0
+
+
+def test_token_bucket_refill_capped():
+    bucket = TokenBucket(rate=1, capacity=2, tokens=0, updated_at=0)
+
+    bucket.refill(10)
+
+    assert bucket.tokens == 2
+
+
+def test_rate_from_robots():
+    assert RateLimiter.rate_from_robots(crawl_delay=2) == 0.5
+    assert RateLimiter.rate_from_robots(request_rate=RequestRate(3, 1)) == 3
+    assert (
+        RateLimiter.rate_from_robots(crawl_delay=2, request_rate=RequestRate(3, 1))
+        == 0.5
+    )
+    assert RateLimiter.rate_from_robots() is None
+
+
+def test_rate_limiter_is_per_host():
+    clock = FakeClock()
+    rate_limiter = RateLimiter(default_rate=1, clock=clock)
+    rate_limiter.configure("slow.example.com", crawl_delay=10)
+
+    assert rate_limiter.reserve("slow.example.com") == 0
+    assert rate_limiter.reserve("slow.example.com") == 10
+    assert rate_limiter.reserve("fast.example.com") == 0
+    assert rate_limiter.reserve("fast.example.com") == 1
+
+    clock.now = 20
+    assert rate_limiter.reserve("slow.example.com") == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_no_wait():
+    rate_limiter = RateLimiter(default_rate=1)
+
+    assert await rate_limiter.acquire("example.com") == 0
@@ -0,0 +1,101 @@
+import math
+import pytest
+from web_crawler.recrawl_scheduler import (
+    RecrawlScheduler,
+    estimate_change_rate,
+    expected_freshness,
+    optimal_frequencies,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def history_entry(fetches, changes, first_fetch, last_fetch):
+    return {
+        "fetches": fetches,
+        "changes": changes,
+        "first_fetch": first_fetch,
+        "last_fetch": last_fetch,
+        "last_change": last_fetch,
+        "hash": "hash",
+    }
+
+
+def test_estimate_change_rate():
+    assert estimate_change_rate(1, 0, 0) is None
+    assert estimate_change_rate(11, 0, 10) == 0
+    # Half of the fetches saw a change, some changes were missed
+    assert estimate_change_rate(11, 5, 10) > 0.5
+    # Every fetch saw a change, the rate is bounded
+    assert math.isfinite(estimate_change_rate(11, 10, 10))
+
+
+def test_expected_freshness():
+    assert expected_freshness(0, 1) == 1
+    assert expected_freshness(1, 0) == 0
+    assert expected_freshness(1, 1) == pytest.approx(1 - math.exp(-1))
+    assert expected_freshness(1, 10) > expected_freshness(1, 1)
+
+
+def test_optimal_frequencies_spend_the_budget():
+    change_rates = [0.1, 1, 5, 20, 0]
+
+    frequencies = optimal_frequencies(change_rates, 10)
+
+    assert sum(frequencies) == pytest.approx(10)
+    # Unchanged pages get no budget, the page changing every 3 minutes gets less than slower ones
+    assert frequencies[4] == 0
+    assert frequencies[3] < frequencies[2]
+    assert frequencies[0] < frequencies[1] < frequencies[2]
+
+
+def test_optimal_frequencies_beat_uniform():
+    change_rates = [0.1, 1, 5, 20]
+
+    frequencies = optimal_frequencies(change_rates, 8)
+
+    optimal = sum(map(expected_freshness, change_rates, frequencies))
+    uniform = sum(expected_freshness(rate, 2) for rate in change_rates)
+    assert optimal > uniform
+
+
+def test_due_most_overdue_first():
+    clock = FakeClock()
+    recrawl_scheduler = RecrawlScheduler(min_interval=1, max_interval=1000, clock=clock)
+    history = {
+        # Changed at every fetch, every 10 seconds
+        "https://example.com/news": history_entry(11, 10, 0, 100),
+        # Never changed
+        "https://example.com/about": history_entry(11, 0, 0, 100),
+        # Fetched once, default rate of one change a day
+        "https://example.com/new": history_entry(1, 0, 100, 100),
+    }
+    clock.now = 150
+
+    assert recrawl_scheduler.due(history) == ["https://example.com/news"]
+    clock.now = 1100
+    assert recrawl_scheduler.due(history) == [
+        "https://example.com/news",
+        "https://example.com/about",
+        "https://example.com/new",
+    ]
+
+
+def test_intervals_within_budget():
+    recrawl_scheduler = RecrawlScheduler(
+        budget=10, period=100, min_interval=0, clock=FakeClock()
+    )
+    history = {
+        f"https://example.com/{page}": history_entry(11, changes, 0, 1000)
+        for page, changes in enumerate([1, 3, 5, 10])
+    }
+
+    intervals = recrawl_scheduler.intervals(history)
+
+    assert sum(100 / interval for interval in intervals.values()) == pytest.approx(10)
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from web_crawler.retry_scheduler import RetryScheduler, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120
+
+
+def test_parse_retry_after_http_date():
+    # Wed, 21 Oct 2015 07:28:00 GMT
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412450) == 30
+
+
+def test_parse_retry_after_invalid():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_retry_delay_exponential_with_jitter():
+    scheduler = RetryScheduler(release=lambda item: None, backoff=2, max_backoff=100)
+
+    assert 1 <= scheduler.retry_delay(1) <= 2
+    assert 4 <= scheduler.retry_delay(3) <= 8
+    assert 50 <= scheduler.retry_delay(20) <= 100
+
+
+def test_host_delay_honors_retry_after():
+    scheduler = RetryScheduler(release=lambda item: None, backoff=2)
+
+    assert scheduler.host_delay("example.com", retry_after=42) == 42
+    assert 2 <= scheduler.host_delay("example.com") <= 4
+
+    scheduler.reset_host("example.com")
+    assert 1 <= scheduler.host_delay("example.com") <= 2
+
+
+def test_release_ready_in_ready_time_order():
+    clock = FakeClock()
+    released = []
+    scheduler = RetryScheduler(release=released.append, clock=clock)
+    scheduler.schedule("late", 10)
+    scheduler.schedule("early", 1)
+
+    assert scheduler.release_ready() == 0
+    clock.now = 5
+    assert scheduler.release_ready() == 1
+    clock.now = 10
+    scheduler.release_ready()
+
+    assert released == ["early", "late"]
+    assert len(scheduler) == 0
+
+
+@pytest.mark.asyncio
+async def test_run_releases_and_join():
+    released = []
+    scheduler = RetryScheduler(release=released.append)
+    task = asyncio.create_task(scheduler.run())
+    scheduler.schedule("url", 0.01)
+
+    await asyncio.wait_for(scheduler.join(), 1)
+    task.cancel()
+
+    assert released == ["url"]
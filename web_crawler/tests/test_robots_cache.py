@@ -0,0 +1,114 @@
+import pytest
+import httpx
+from unittest.mock import MagicMock
+from web_crawler.network_client import NetworkClient
+from web_crawler.robots_cache import RobotsCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_network_client(status_code=200, text=""):
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        return httpx.Response(status_code, text=text)
+
+    transport = httpx.MockTransport(handler=handler)
+    return NetworkClient(client=httpx.AsyncClient(transport=transport)), requests
+
+
+def test_key():
+    assert (
+        RobotsCache.key("https://Blog.Example.com/a?b=c") == "https://blog.example.com"
+    )
+    assert RobotsCache.key("http://example.com/") != RobotsCache.key(
+        "https://example.com/"
+    )
+
+
+@pytest.mark.asyncio
+async def test_park_fetches_once_and_releases():
+    network_client, requests = make_network_client(
+        text="User-agent: *\nDisallow: /private\nCrawl-delay: 3"
+    )
+    released, loaded = [], []
+    robots_cache = RobotsCache(
+        network_client,
+        release=released.append,
+        on_load=lambda host, robot_parser: loaded.append((host, robot_parser)),
+    )
+
+    robots_cache.park("https://example.com/a", "a")
+    robots_cache.park("https://example.com/b", "b")
+    assert len(robots_cache) == 2
+    await robots_cache.join()
+
+    assert requests == ["https://example.com/robots.txt"]
+    assert released == ["a", "b"]
+    assert loaded[0][0] == "example.com"
+    assert loaded[0][1].crawl_delay == 3
+    robot_parser = robots_cache.get("https://example.com/private")
+    assert robot_parser.can_fetch("*", "https://example.com/private") is False
+    assert robot_parser.can_fetch("*", "https://example.com/public") is True
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "status_code, allowed", [(404, True), (403, False), (500, False)]
+)
+async def test_load_error_status(status_code, allowed):
+    network_client, _ = make_network_client(status_code=status_code)
+    robots_cache = RobotsCache(network_client, release=lambda item: None)
+
+    robot_parser = await robots_cache.load("https://example.com")
+
+    assert robot_parser.can_fetch("*", "https://example.com/page") is allowed
+
+
+@pytest.mark.asyncio
+async def test_get_expired():
+    clock = FakeClock()
+    network_client, _ = make_network_client()
+    robots_cache = RobotsCache(
+        network_client, release=lambda item: None, ttl=10, clock=clock
+    )
+    await robots_cache.load("https://example.com")
+
+    assert robots_cache.get("https://example.com/page") is not None
+    clock.now = 10
+    assert robots_cache.get("https://example.com/page") is None
+
+
+def test_put_zero_ttl_expires_at_once():
+    clock = FakeClock()
+    network_client, _ = make_network_client()
+    robots_cache = RobotsCache(
+        network_client, release=lambda item: None, ttl=10, clock=clock
+    )
+
+    robots_cache.put("https://example.com", MagicMock(), ttl=0)
+
+    assert robots_cache.get("https://example.com/page") is None
+
+
+@pytest.mark.asyncio
+async def test_put_evicts_least_recently_used():
+    network_client, _ = make_network_client()
+    robots_cache = RobotsCache(network_client, release=lambda item: None, max_size=2)
+    await robots_cache.load("https://a.example.com")
+    await robots_cache.load("https://b.example.com")
+
+    robots_cache.get("https://a.example.com/")
+    await robots_cache.load("https://c.example.com")
+
+    assert list(robots_cache.entries) == [
+        "https://a.example.com",
+        "https://c.example.com",
+    ]
@@ -0,0 +1,35 @@
+from web_crawler.scoring import (
+    InLinkScorer,
+    PatternScorer,
+    WeightedScorer,
+    depth_score,
+)
+from web_crawler.url_container import URLContainer
+
+
+def test_depth_score():
+    assert depth_score(URLContainer("https://example.com", depth=3)) == 3
+
+
+def test_in_link_scorer():
+    scorer = InLinkScorer()
+
+    scorer(URLContainer("https://example.com/a"))
+    score = scorer(URLContainer("https://example.com/a"))
+
+    assert score == -2
+    assert scorer(URLContainer("https://example.com/b")) == -1
+
+
+def test_pattern_scorer():
+    scorer = PatternScorer([(r"/page/\d+", 10), (r"/docs/", -5)], default=1)
+
+    assert scorer(URLContainer("https://example.com/blog/page/42")) == 10
+    assert scorer(URLContainer("https://example.com/docs/intro")) == -5
+    assert scorer(URLContainer("https://example.com/about")) == 1
+
+
+def test_weighted_scorer():
+    scorer = WeightedScorer([(depth_score, 1), (PatternScorer([(r"/docs/", -5)]), 2)])
+
+    assert scorer(URLContainer("https://example.com/docs/intro", depth=2)) == -8
@@ -0,0 +1,335 @@
+import json
+import queue
+import asyncio
+import pytest
+from collections import Counter
+from unittest.mock import MagicMock
+
+from benchmarks.synthetic_site import SyntheticSite
+from web_crawler.sharded_crawler import ShardCrawler, ShardedCrawler, shard_of
+from web_crawler.web_crawler import WebCrawler
+from web_crawler.storage_client import StorageClient
+from web_crawler.url_container import URLContainer
+from web_crawler.crawl_budget import CrawlBudget
+from web_crawler.rate_limiter import host_key
+
+
+def make_shard_crawler(shard=0, num_shards=2, batch_size=100, **kwargs):
+    return ShardCrawler(
+        "https://example.com",
+        shard=shard,
+        num_shards=num_shards,
+        inbox=queue.Queue(),
+        control=queue.Queue(),
+        batch_size=batch_size,
+        network_client=MagicMock(),
+        storage_client=MagicMock(contains=MagicMock(return_value=False)),
+        **kwargs,
+    )
+
+
+def foreign_url(num_shards=2, shard=0):
+    return next(
+        url
+        for url in (f"https://h{i}.example.com/" for i in range(100))
+        if shard_of(url, num_shards) != shard
+    )
+
+
+def test_shard_of_by_host():
+    assert shard_of("https://example.com/a", 8) == shard_of(
+        "https://example.com/b?c=d", 8
+    )
+    shards = {shard_of(f"https://h{i}.example.com/", 8) for i in range(100)}
+    assert shards == set(range(8))
+
+
+@pytest.mark.asyncio
+async def test_enqueue_routes_foreign_urls_in_batches():
+    crawler = make_shard_crawler(batch_size=2)
+    url = foreign_url()
+    local_url = next(
+        f"https://h{i}.example.com/"
+        for i in range(100)
+        if shard_of(f"https://h{i}.example.com/", 2) == 0
+    )
+
+    await crawler.enqueue(URLContainer(local_url))
+    await crawler.enqueue(URLContainer(url, depth=1, parent=local_url))
+    await crawler.enqueue(URLContainer(url, depth=1, parent=local_url))
+
+    assert [item.url for item in crawler.to_visit_queue.items()] == [local_url]
+    assert crawler.control.empty()
+    await crawler.enqueue(URLContainer(url + "page"))
+
+    assert crawler.control.get_nowait() == (
+        "urls",
+        shard_of(url, 2),
+        [(url, 1, local_url), (url + "page", 0, None)],
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_inbox_queues_routed_urls():
+    crawler = make_shard_crawler()
+    crawler.inbox.put([("https://example.com/a", 2, "https://example.com")])
+    crawler.inbox.put(None)
+
+    await crawler.read_inbox()
+
+    assert crawler.received == 1
+    assert crawler.stopped is True
+    queued = list(crawler.to_visit_queue.items())
+    assert [(item.url, item.depth) for item in queued] == [("https://example.com/a", 2)]
+
+
+@pytest.mark.asyncio
+async def test_sharded_crawl_matches_single_process(tmp_path):
+    site = SyntheticSite(pages=60, hosts=6, fan_out=4)
+    single = WebCrawler(
+        site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(
+            output_file_path=tmp_path, output_file_name="single.json"
+        ),
+        num_workers=4,
+    )
+    await single.crawl_with_workers()
+
+    sharded = ShardedCrawler(
+        site.start_url,
+        3,
+        storage_client=StorageClient(
+            output_file_path=tmp_path, output_file_name="sharded.json"
+        ),
+        network_client_factory=site.network_client,
+        batch_size=5,
+        num_workers=4,
+    )
+    await sharded.crawl_with_workers()
+
+    def links(storage):
+        return {url: set(data["links"]) for url, data in storage.items()}
+
+    assert len(single.storage_client.get_all()) == 60
+    assert links(sharded.storage_client.get_all()) == links(
+        single.storage_client.get_all()
+    )
+    assert set(sharded.storage_client.history) == set(single.storage_client.history)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "sharded.history.json",
+        "sharded.json",
+        "single.history.json",
+        "single.json",
+    ]
+
+
+def test_page_quota_granted_by_the_router():
+    sharded = ShardedCrawler(
+        "https://example.com",
+        3,
+        budget=CrawlBudget(max_pages=7, max_pages_per_host=2),
+        num_workers=4,
+    )
+    start_shard = shard_of("https://example.com", 3)
+
+    quotas = [sharded.shard_crawler_kwargs(shard)["page_quota"] for shard in range(3)]
+
+    assert quotas[start_shard] == 1
+    assert sum(quotas) == 1
+    assert sharded.pages_left == 6
+    assert sharded.shard_crawler_kwargs(0)["budget"].max_pages == 7
+    assert sharded.shard_crawler_kwargs(0)["num_workers"] == 4
+
+
+def local_urls(count, num_shards=2, shard=0):
+    urls = (f"https://h{i}.example.com/" for i in range(1000))
+    return [url for url in urls if shard_of(url, num_shards) == shard][:count]
+
+
+@pytest.mark.asyncio
+async def test_urls_over_quota_wait_for_a_grant():
+    crawler = make_shard_crawler(budget=CrawlBudget(max_pages=100), page_quota=1)
+    first, second, third = local_urls(3)
+
+    for url in (first, second, third, third):
+        await crawler.enqueue(URLContainer(url))
+    crawler.flush()
+
+    assert [item.url for item in crawler.to_visit_queue.items()] == [first]
+    assert list(crawler.awaiting_quota) == [second, third]
+    assert crawler.control.get_nowait() == ("quota", 0, 2)
+    crawler.flush()
+    assert crawler.control.empty()
+
+    await crawler.grant(2)
+
+    assert [item.url for item in crawler.to_visit_queue.items()] == [
+        first,
+        second,
+        third,
+    ]
+    assert not crawler.awaiting_quota
+    assert crawler.quota_requested == 0
+
+
+@pytest.mark.asyncio
+async def test_urls_over_a_spent_budget_are_rejected():
+    crawler = make_shard_crawler(budget=CrawlBudget(max_pages=100), page_quota=0)
+    first, second = local_urls(2)
+    await crawler.enqueue(URLContainer(first))
+    await crawler.enqueue(URLContainer(second))
+    crawler.flush()
+
+    await crawler.grant(1)
+
+    assert [item.url for item in crawler.to_visit_queue.items()] == [first]
+    assert not crawler.awaiting_quota
+    assert crawler.crawl_guard.rejections["pages"] == 1
+
+
+def test_unused_quota_is_returned():
+    crawler = make_shard_crawler(budget=CrawlBudget(max_pages=100), page_quota=3)
+
+    crawler.return_quota()
+
+    assert crawler.control.get_nowait() == ("quota", 0, -3)
+    assert crawler.page_quota == 0
+    assert crawler.crawl_guard.budget.max_pages == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("hosts, max_pages_per_host", [(6, 6), (2, None), (1, None)])
+async def test_sharded_crawl_enforces_global_budgets(
+    tmp_path, hosts, max_pages_per_host
+):
+    site = SyntheticSite(pages=60, hosts=hosts, fan_out=4)
+
+    def budget():
+        return CrawlBudget(max_pages=20, max_pages_per_host=max_pages_per_host)
+
+    single = WebCrawler(
+        site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(
+            output_file_path=tmp_path, output_file_name="single.json"
+        ),
+        num_workers=4,
+        budget=budget(),
+    )
+    await single.crawl_with_workers()
+    sharded = ShardedCrawler(
+        site.start_url,
+        3,
+        storage_client=StorageClient(output_file_path=tmp_path),
+        network_client_factory=site.network_client,
+        batch_size=5,
+        num_workers=4,
+        budget=budget(),
+    )
+    await sharded.crawl_with_workers()
+
+    stored = sharded.storage_client.get_all()
+    assert len(single.storage_client.get_all()) == 20
+    assert len(stored) == 20
+    if max_pages_per_host is not None:
+        assert max(Counter(host_key(url) for url in stored).values()) <= 6
+
+
+@pytest.mark.asyncio
+async def test_route_keeps_batches_once_stopping():
+    sharded = ShardedCrawler("https://example.com", 2)
+    control = queue.Queue()
+    inboxes = [queue.Queue(), queue.Queue()]
+    sharded.stop([])
+    for message in (
+        ("urls", 1, [("https://a.example.com/", 1, "https://example.com")]),
+        ("quota", 1, 5),
+        ("done", 0, {}),
+        ("urls", 0, [("https://b.example.com/", 2, None)]),
+        ("done", 1, {}),
+    ):
+        control.put(message)
+
+    await sharded.route(control, inboxes, [])
+
+    assert sharded.undelivered == [
+        ("https://a.example.com/", 1, "https://example.com"),
+        ("https://b.example.com/", 2, None),
+    ]
+    assert inboxes[0].empty() and inboxes[1].empty()
+
+
+def test_collect_inboxes_keeps_unread_batches():
+    sharded = ShardedCrawler("https://example.com", 2)
+    inboxes = [queue.Queue(), queue.Queue()]
+    inboxes[0].put([("https://a.example.com/", 1, None)])
+    inboxes[0].put(None)
+    inboxes[1].put(3)
+
+    sharded.collect_inboxes(inboxes)
+
+    assert sharded.undelivered == [("https://a.example.com/", 1, None)]
+
+
+def test_merge_saves_undelivered_urls_with_the_frontier(tmp_path):
+    sharded = ShardedCrawler(
+        "https://example.com",
+        2,
+        storage_client=StorageClient(output_file_path=tmp_path),
+    )
+    for shard in range(2):
+        shard_storage_client = sharded.shard_storage_client(shard)
+        shard_storage_client.add(f"https://h{shard}.example.com/", {"links": []})
+        shard_storage_client.write_to_file()
+    (tmp_path / "storage.shard0.frontier.json").write_text(
+        json.dumps(
+            [{"url": "https://a.example.com/", "depth": 1, "parent": None, "tries": 1}]
+        )
+    )
+    sharded.undelivered = [
+        ("https://a.example.com/", 1, None),
+        ("https://h1.example.com/", 1, None),
+        ("https://b.example.com/", 2, "https://h0.example.com/"),
+        ("https://b.example.com/", 2, "https://h1.example.com/"),
+    ]
+
+    sharded.merge()
+
+    assert json.loads((tmp_path / "storage.frontier.json").read_text()) == [
+        {"url": "https://a.example.com/", "depth": 1, "parent": None, "tries": 1},
+        {
+            "url": "https://b.example.com/",
+            "depth": 2,
+            "parent": "https://h0.example.com/",
+            "tries": 0,
+        },
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stopped_shard_saves_routed_buffered_and_waiting_urls(tmp_path):
+    crawler = ShardCrawler(
+        "https://example.com",
+        shard=0,
+        num_shards=2,
+        inbox=queue.Queue(),
+        control=queue.Queue(),
+        network_client=MagicMock(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        budget=CrawlBudget(max_pages=100),
+        page_quota=0,
+    )
+    routed, waiting = local_urls(2)
+    await crawler.enqueue(URLContainer(waiting))
+    await crawler.enqueue(URLContainer(foreign_url(), depth=1))
+    crawler.inbox.put([(routed, 1, None)])
+    crawler.crawl_guard.budget.max_pages = crawler.page_quota = 1
+    crawler._reader = asyncio.create_task(crawler.read_inbox())
+
+    await crawler.stop_reading()
+    crawler.write_frontier()
+
+    assert crawler.control.get_nowait() == ("urls", 1, [(foreign_url(), 1, None)])
+    frontier = json.loads((tmp_path / "storage.frontier.json").read_text())
+    assert [entry["url"] for entry in frontier] == [routed, waiting]
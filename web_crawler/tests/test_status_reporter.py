@@ -0,0 +1,120 @@
+import json
+import pytest
+
+from benchmarks.synthetic_site import SyntheticSite
+from web_crawler.crawl_budget import CrawlBudget
+from web_crawler.status_reporter import StatusReporter
+from web_crawler.storage_client import StorageClient
+from web_crawler.web_crawler import WebCrawler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def crawler(tmp_path):
+    return WebCrawler(
+        start_url="https://example.com",
+        storage_client=StorageClient(output_file_path=tmp_path),
+        budget=CrawlBudget(max_pages=100),
+    )
+
+
+def test_rates(crawler):
+    clock = FakeClock()
+    reporter = StatusReporter(crawler, smoothing=0.5, clock=clock)
+
+    clock.now = 10.0
+    crawler.store_stage.processed = 20
+    crawler.metrics.downloaded_bytes.inc(50000)
+    status = reporter.snapshot()
+    assert status["pages"] == 20
+    assert status["pages_per_second"] == 2.0
+    assert status["pages_per_second_ewma"] == 2.0
+    assert status["bytes_per_second"] == 5000
+
+    clock.now = 20.0
+    crawler.store_stage.processed = 60
+    status = reporter.snapshot()
+    assert status["pages_per_second"] == 4.0
+    assert status["pages_per_second_ewma"] == 3.0
+    assert status["bytes_per_second"] == 0
+    assert status["elapsed"] == 20.0
+
+
+def test_eta_from_page_budget(crawler):
+    clock = FakeClock()
+    reporter = StatusReporter(crawler, clock=clock)
+
+    assert reporter.snapshot()["eta"] is None
+
+    clock.now = 10.0
+    crawler.store_stage.processed = 20
+    # 80 pages left at 2 pages per second
+    assert reporter.snapshot()["eta"] == 40.0
+
+
+def test_eta_without_budget(tmp_path):
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        storage_client=StorageClient(output_file_path=tmp_path),
+    )
+    clock = FakeClock()
+    reporter = StatusReporter(crawler, clock=clock)
+    clock.now = 10.0
+    crawler.store_stage.processed = 20
+
+    assert reporter.snapshot()["eta"] is None
+
+
+def test_errors_and_retries(crawler):
+    reporter = StatusReporter(crawler, clock=FakeClock())
+    fetch_seconds = crawler.metrics.fetch_seconds
+    fetch_seconds.labels("200").observe(0.1)
+    fetch_seconds.labels("404").observe(0.1)
+    fetch_seconds.labels("429").observe(0.1)
+    fetch_seconds.labels("error").observe(0.1)
+    crawler.metrics.retries.labels("rate_limit").inc()
+    crawler.metrics.retries.labels("error").inc(2)
+
+    status = reporter.snapshot()
+
+    assert status["errors"] == 3
+    assert status["retries"] == 3
+
+
+def test_report_writes_file(crawler, tmp_path):
+    path = tmp_path / "status.json"
+    reporter = StatusReporter(crawler, path=path, clock=FakeClock())
+
+    status = reporter.report()
+
+    assert json.loads(path.read_text()) == status
+    assert not path.with_name("status.json.tmp").exists()
+
+
+@pytest.mark.asyncio
+async def test_crawl_reports_final_status(tmp_path):
+    site = SyntheticSite(pages=30, hosts=2, fan_out=5)
+    path = tmp_path / "status.json"
+    crawler = WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+        status_interval=0.01,
+        status_file=path,
+    )
+
+    await crawler.crawl_with_workers()
+
+    status = json.loads(path.read_text())
+    assert status["pages"] == 30
+    assert status["frontier"] == 0
+    assert status["in_flight"] == 0
+    assert status["errors"] == 0
@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from web_crawler.storage_client import StorageClient
 
@@ -46,3 +47,90 @@ def test_contains():
 
     assert storage_client.contains("https://www.example.com") is True
     assert storage_client.contains("https://www.test.com") is False
+
+
+def test_flush_appends_new_entries_to_journal(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+    storage_client.add("https://www.example.com", {"links": []})
+
+    assert storage_client.flush() == 1
+    assert storage_client.flush() == 0
+    storage_client.add("https://www.test.com")
+    assert storage_client.flush() == 1
+
+    lines = storage_client.journal_path.read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"url": "https://www.example.com", "data": {"links": []}},
+        {"url": "https://www.test.com", "data": None},
+    ]
+
+
+def test_write_to_file_removes_journal(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+    storage_client.add("https://www.example.com")
+    storage_client.flush()
+
+    storage_client.write_to_file()
+
+    assert not storage_client.journal_path.exists()
+    assert json.loads((tmp_path / "storage.json").read_text()) == {
+        "https://www.example.com": None
+    }
+
+
+def test_record_fetch_counts_changes():
+    storage_client = StorageClient(output_file_path=Path(__file__).parent)
+    storage_client.record_fetch("https://www.example.com", "a", fetched_at=10)
+    storage_client.record_fetch("https://www.example.com", "a", fetched_at=20)
+    storage_client.record_fetch("https://www.example.com", "b", fetched_at=30)
+
+    assert storage_client.history["https://www.example.com"] == {
+        "fetches": 3,
+        "changes": 1,
+        "first_fetch": 10,
+        "last_fetch": 30,
+        "last_change": 30,
+        "hash": "b",
+    }
+
+
+def test_load_previous_crawl(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+    storage_client.add("https://www.example.com", {"links": []})
+    storage_client.record_fetch("https://www.example.com", "a", fetched_at=10)
+    storage_client.write_to_file()
+
+    loaded_storage_client = StorageClient(output_file_path=tmp_path)
+
+    assert loaded_storage_client.load() == 1
+    assert loaded_storage_client.get_all() == storage_client.get_all()
+    assert loaded_storage_client.history == storage_client.history
+
+
+def test_load_nothing(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+
+    assert storage_client.load() == 0
+    assert storage_client.history == {}
+
+
+def test_load_replays_journal_of_killed_crawl(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+    storage_client.add("https://www.example.com", {"links": []})
+    storage_client.write_to_file()
+    storage_client.add("https://www.example.com", {"links": ["https://www.test.com"]})
+    storage_client.record_fetch("https://www.test.com", "a", fetched_at=10)
+    storage_client.add("https://www.test.com")
+    storage_client.flush()
+    # Killed while appending an entry
+    with open(storage_client.journal_path, "a") as f:
+        f.write('{"url": "https://www.cut')
+
+    loaded_storage_client = StorageClient(output_file_path=tmp_path)
+
+    assert loaded_storage_client.load() == 2
+    assert loaded_storage_client.get_all() == {
+        "https://www.example.com": {"links": ["https://www.test.com"]},
+        "https://www.test.com": None,
+    }
+    assert loaded_storage_client.history == storage_client.history
@@ -0,0 +1,146 @@
+import json
+import time
+import pytest
+from collections import defaultdict
+
+from benchmarks.synthetic_site import SyntheticSite, SyntheticSiteServer
+from web_crawler.storage_client import StorageClient
+from web_crawler.tracing import Tracer
+from web_crawler.web_crawler import WebCrawler
+
+
+def spans_by_url(path):
+    spans = defaultdict(list)
+    for event in json.loads(path.read_text()):
+        if event["ph"] == "X":
+            spans[event["args"]["url"]].append(event)
+    return spans
+
+
+def test_sampling_is_stable(tmp_path):
+    tracer = Tracer(tmp_path / "trace.json", sample_rate=0.5)
+    urls = [f"https://example.com/{i}" for i in range(1000)]
+
+    sampled = [url for url in urls if tracer.sampled(url)]
+
+    assert 400 < len(sampled) < 600
+    assert sampled == [url for url in urls if tracer.sampled(url)]
+
+
+def test_disabled_without_path():
+    tracer = Tracer(sample_rate=1.0)
+
+    tracer.queued("https://example.com")
+    tracer.dequeued("https://example.com")
+    tracer.finish("https://example.com")
+    tracer.close()
+
+    assert not tracer.active
+
+
+def test_not_sampled(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(path, sample_rate=0.0)
+
+    tracer.queued("https://example.com")
+    tracer.dequeued("https://example.com")
+
+    assert not tracer.active
+
+
+def test_spans_and_ids(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(path)
+
+    tracer.queued("https://example.com")
+    tracer.dequeued("https://example.com")
+    start = time.perf_counter()
+    tracer.span("https://example.com", "fetch", start, status="200")
+    tracer.finish("https://example.com")
+    tracer.close()
+
+    events = json.loads(path.read_text())
+    assert events[0] == {
+        "name": "thread_name",
+        "ph": "M",
+        "pid": events[0]["pid"],
+        "tid": 1,
+        "args": {"name": "https://example.com"},
+    }
+    root, queue_wait, fetch = events[1:]
+    assert [root["name"], queue_wait["name"], fetch["name"]] == [
+        "url",
+        "queue_wait",
+        "fetch",
+    ]
+    assert fetch["args"]["status"] == "200"
+    assert len(root["args"]["trace_id"]) == 32
+    assert fetch["args"]["trace_id"] == root["args"]["trace_id"]
+    assert fetch["args"]["parent_id"] == root["args"]["span_id"]
+    assert root["ts"] <= queue_wait["ts"] <= fetch["ts"]
+    assert fetch["ts"] + fetch["dur"] <= root["ts"] + root["dur"]
+
+
+def test_buffered_events_are_loadable_before_close(tmp_path):
+    path = tmp_path / "trace.json"
+    tracer = Tracer(path, buffer_size=2)
+
+    tracer.dequeued("https://example.com")
+    assert not path.exists()
+    tracer.finish("https://example.com")
+
+    # The array is not closed yet, as in a killed crawl
+    assert len(json.loads(path.read_text() + "]")) == 2
+
+
+@pytest.mark.asyncio
+async def test_crawl_traces_every_stage(tmp_path):
+    site = SyntheticSite(pages=30, hosts=2, fan_out=5)
+    path = tmp_path / "trace.json"
+    crawler = WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+        tracer=Tracer(path),
+    )
+
+    await crawler.crawl_with_workers()
+
+    spans = spans_by_url(path)
+    assert set(spans) == {site.url(page) for page in range(30)}
+    for url_spans in spans.values():
+        names = {span["name"] for span in url_spans}
+        assert {
+            "url",
+            "queue_wait",
+            "politeness_wait",
+            "fetch",
+            "parse",
+            "store",
+        } <= names
+
+
+@pytest.mark.asyncio
+async def test_crawl_traces_transport_events(tmp_path):
+    site = SyntheticSite(pages=10, hosts=1, scheme="http")
+    path = tmp_path / "trace.json"
+
+    async with SyntheticSiteServer(site) as server:
+        network_client = server.network_client()
+        crawler = WebCrawler(
+            start_url=site.start_url,
+            network_client=network_client,
+            storage_client=StorageClient(output_file_path=tmp_path),
+            num_workers=2,
+            tracer=Tracer(path),
+        )
+        await crawler.crawl_with_workers()
+        await network_client.client.aclose()
+
+    spans = spans_by_url(path)
+    assert len(spans) == 10
+    names = {span["name"] for url_spans in spans.values() for span in url_spans}
+    assert {"connect", "ttfb", "download"} <= names
+    for url_spans in spans.values():
+        assert {"ttfb", "download"} <= {span["name"] for span in url_spans}
@@ -1,10 +1,20 @@
+import os
+import json
+import signal
+import asyncio
 import pytest
+from pathlib import Path
+from bs4 import BeautifulSoup
 
 from unittest.mock import AsyncMock, patch, MagicMock
 from web_crawler.web_crawler import WebCrawler
 from web_crawler.url_container import URLContainer
 from web_crawler.html_parser import HTMLParser
 from web_crawler.url_deduplicator import URLDeDuplicator
+from web_crawler.network_client import FetchResult
+from web_crawler.storage_client import StorageClient
+from web_crawler.crawl_budget import CrawlBudget
+from benchmarks.synthetic_site import SyntheticSite, SyntheticSiteServer
 
 from web_crawler.exceptions import (
     RateLimitException,
@@ -12,10 +22,13 @@ from web_crawler.exceptions import (
     NotFoundException,
 )
 
-
 # ----------- Scheduling logic ------------
 
 
+def fetched(url):
+    return FetchResult(url=url, final_url=url, status_code=200, text="<html></html>")
+
+
 @pytest.mark.asyncio
 async def test_process_crawling_unit_success():
     network_client = MagicMock()
@@ -29,8 +42,9 @@ async def test_process_crawling_unit_success():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(return_value=["https://example.com/page1"])
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(return_value=fetched("https://example.com"))
+    crawler.parse = MagicMock(return_value={"https://example.com/page1"})
 
     url_container = URLContainer("https://example.com")
     await crawler.to_visit_queue.put(url_container)
@@ -38,8 +52,43 @@ async def test_process_crawling_unit_success():
     await crawler.process()
 
     assert crawler.to_visit_queue.qsize() == 1
-    assert crawler.to_visit_queue.get_nowait().base_url == "https://example.com/page1"
-    crawler.crawling.assert_awaited_once_with("https://example.com")
+    queued = list(crawler.to_visit_queue.items())
+    assert [item.url for item in queued] == ["https://example.com/page1"]
+    assert queued[0].depth == 1
+    assert queued[0].parent == "https://example.com"
+    crawler.fetch.assert_awaited_once_with("https://example.com")
+
+
+@pytest.mark.asyncio
+async def test_process_crawling_unit_budget_rejects_traps():
+    network_client = MagicMock()
+    storage_client = MagicMock()
+    storage_client.contains = MagicMock(return_value=False)
+    robot_parser = MagicMock()
+    robot_parser.can_fetch.return_value = True
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+        budget=CrawlBudget(max_depth=1),
+    )
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(return_value=fetched("https://example.com"))
+    crawler.parse = MagicMock(
+        return_value={"https://example.com/page1", "https://example.com/a/a/a/a"}
+    )
+
+    await crawler.to_visit_queue.put(URLContainer("https://example.com"))
+    await crawler.process()
+    crawler.parse.return_value = {"https://example.com/page2"}
+    await crawler.process()
+
+    assert [item.url for item in crawler.to_visit_queue.items()] == []
+    assert crawler.stats()["budget"] == {
+        "admitted": 1,
+        "rejected": {"repeated_segments": 1, "depth": 1},
+    }
 
 
 @pytest.mark.asyncio
@@ -55,8 +104,9 @@ async def test_process_crawling_unit_already_visited():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(return_value=["https://example.com/page1"])
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(return_value=fetched("https://example.com"))
+    crawler.parse = MagicMock(return_value={"https://example.com/page1"})
 
     url_container = URLContainer("https://example.com")
     await crawler.to_visit_queue.put(url_container)
@@ -64,7 +114,7 @@ async def test_process_crawling_unit_already_visited():
     await crawler.process()
 
     assert crawler.to_visit_queue.qsize() == 0
-    crawler.crawling.assert_not_awaited()
+    crawler.fetch.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -79,8 +129,9 @@ async def test_process_crawling_unit_robots_txt_prevents_fetching():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(return_value=["https://example.com/page1"])
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(return_value=fetched("https://example.com"))
+    crawler.parse = MagicMock(return_value={"https://example.com/page1"})
 
     url_container = URLContainer("https://example.com")
     await crawler.to_visit_queue.put(url_container)
@@ -88,7 +139,7 @@ async def test_process_crawling_unit_robots_txt_prevents_fetching():
     await crawler.process()
 
     assert crawler.to_visit_queue.qsize() == 0
-    crawler.crawling.assert_not_awaited()
+    crawler.fetch.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -105,20 +156,41 @@ async def test_process_crawling_unit_rate_limit_exception():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.handle_rate_limit = AsyncMock()
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(side_effect=RateLimitException("Rate limit error"))
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(
+        side_effect=RateLimitException("Rate limit error", retry_after=30)
+    )
 
     url_container = URLContainer("https://example.com")
     await crawler.to_visit_queue.put(url_container)
 
-    # Mocking asyncio.sleep to avoid waiting
-    with patch("asyncio.sleep", new_callable=AsyncMock):
-        await crawler.process()
+    await crawler.process()
 
-    assert crawler.to_visit_queue.qsize() == 1
-    crawler.crawling.assert_awaited_once()
-    crawler.handle_rate_limit.assert_called_once()
+    # The URL waits in the retry scheduler, not in the queue nor in the worker
+    assert crawler.to_visit_queue.qsize() == 0
+    assert len(crawler.retry_scheduler) == 1
+    assert crawler.rate_limiter.paused_for("example.com") > 29
+    crawler.fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_paused_host_not_handed_to_workers():
+    network_client = MagicMock()
+    storage_client = MagicMock()
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+    )
+    crawler.rate_limiter.pause("example.com", 30)
+
+    await crawler.to_visit_queue.put(URLContainer("https://example.com"))
+    await crawler.to_visit_queue.put(URLContainer("https://blog.example.com"))
+
+    assert crawler.to_visit_queue.get_nowait().url == "https://blog.example.com"
+    with pytest.raises(asyncio.QueueEmpty):
+        crawler.to_visit_queue.get_nowait()
 
 
 @pytest.mark.asyncio
@@ -135,8 +207,8 @@ async def test_process_crawling_unit_not_found():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(side_effect=NotFoundException("Not found"))
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(side_effect=NotFoundException("Not found"))
 
     url_container = URLContainer("https://example.com")
     await crawler.to_visit_queue.put(url_container)
@@ -146,7 +218,7 @@ async def test_process_crawling_unit_not_found():
         await crawler.process()
 
     assert crawler.to_visit_queue.qsize() == 0
-    crawler.crawling.assert_awaited_once()
+    crawler.fetch.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -162,8 +234,8 @@ async def test_process_crawling_unit_redirect():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(side_effect=RedirectException("Redirect"))
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(side_effect=RedirectException("Redirect loop"))
 
     url_container = URLContainer("https://example.com")
     await crawler.to_visit_queue.put(url_container)
@@ -171,8 +243,9 @@ async def test_process_crawling_unit_redirect():
     with patch("asyncio.sleep", new_callable=AsyncMock):
         await crawler.process()
 
-    assert crawler.to_visit_queue.qsize() == 1
-    crawler.crawling.assert_awaited_once()
+    assert crawler.to_visit_queue.qsize() == 0
+    assert len(crawler.retry_scheduler) == 0
+    crawler.fetch.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -188,8 +261,8 @@ async def test_process_crawling_unit_generic_exception():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(side_effect=Exception("General error"))
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(side_effect=Exception("General error"))
 
     url_container = URLContainer("https://example.com")
     await crawler.to_visit_queue.put(url_container)
@@ -198,8 +271,39 @@ async def test_process_crawling_unit_generic_exception():
     with patch("asyncio.sleep", new_callable=AsyncMock):
         await crawler.process()
 
-    assert crawler.to_visit_queue.qsize() == 1
-    crawler.crawling.assert_awaited_once()
+    assert crawler.to_visit_queue.qsize() == 0
+    assert len(crawler.retry_scheduler) == 1
+    crawler.fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_process_counts_one_try_per_fetch():
+    network_client = MagicMock()
+    storage_client = MagicMock()
+    storage_client.contains = MagicMock(return_value=False)
+    robot_parser = MagicMock()
+    robot_parser.can_fetch.return_value = True
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+        max_retries=2,
+    )
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(side_effect=Exception("General error"))
+
+    url_container = URLContainer("https://example.com")
+    for tries in range(1, 4):
+        await crawler.to_visit_queue.put(url_container)
+        await crawler.process()
+        assert url_container.tries == tries
+        assert len(crawler.retry_scheduler) == (1 if tries <= 2 else 0)
+        crawler.retry_scheduler._heap.clear()
+
+    # The first fetch and 2 retries
+    assert crawler.fetch.await_count == 3
+    assert url_container.ready_at > 0
 
 
 @pytest.mark.asyncio
@@ -215,17 +319,68 @@ async def test_process_crawling_unit_general_exception_exceed_tries():
         network_client=network_client,
         storage_client=storage_client,
     )
-    crawler.robot_parser = robot_parser
-    crawler.crawling = AsyncMock(side_effect=Exception("General error"))
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.fetch = AsyncMock(side_effect=Exception("General error"))
 
-    url_container = URLContainer("https://example.com", _tries=3)
+    url_container = URLContainer("https://example.com", tries=3)
     await crawler.to_visit_queue.put(url_container)
 
     with patch("asyncio.sleep", new_callable=AsyncMock):
         await crawler.process()
 
     assert crawler.to_visit_queue.qsize() == 0
-    crawler.crawling.assert_awaited_once()
+    assert len(crawler.retry_scheduler) == 0
+    crawler.fetch.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_wait_until_done_waits_for_retries():
+    network_client = MagicMock()
+    storage_client = MagicMock()
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+    )
+    retry_task = asyncio.create_task(crawler.retry_scheduler.run())
+    crawler.retry_scheduler.schedule(URLContainer("https://example.com"), 0.01)
+
+    waiting = asyncio.create_task(crawler.wait_until_done())
+    item = await crawler.to_visit_queue.get()
+    assert not waiting.done()
+    crawler.to_visit_queue.task_done()
+
+    await asyncio.wait_for(waiting, 1)
+    retry_task.cancel()
+    assert item.url == "https://example.com"
+
+
+@pytest.mark.asyncio
+async def test_process_crawling_unit_robots_txt_pending():
+    network_client = MagicMock()
+    storage_client = MagicMock()
+    storage_client.contains = MagicMock(return_value=False)
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+    )
+    crawler.robots_cache.park = MagicMock()
+    crawler.fetch = AsyncMock(return_value=fetched("https://example.com"))
+    crawler.parse = MagicMock(return_value={"https://example.com/page1"})
+
+    url_container = URLContainer("https://example.com")
+    await crawler.to_visit_queue.put(url_container)
+
+    await crawler.process()
+
+    assert crawler.to_visit_queue.qsize() == 0
+    crawler.robots_cache.park.assert_called_once_with(
+        "https://example.com", url_container
+    )
+    crawler.fetch.assert_not_awaited()
 
 
 # ----------- Processing logic ------------
@@ -239,7 +394,14 @@ async def test_crawling_success():
     html_parser = MagicMock()
     url_deduplicator = MagicMock()
 
-    network_client.query_html = AsyncMock(return_value="<html></html>")
+    network_client.fetch = AsyncMock(
+        return_value=FetchResult(
+            url="https://example.com",
+            final_url="https://example.com",
+            status_code=200,
+            html="<html></html>",
+        )
+    )
     html_parser.extract_links = MagicMock(return_value=["https://example.com/page1"])
     url_filter.filter_links = MagicMock()
     storage_client.get_all = MagicMock(return_value=[])
@@ -253,13 +415,16 @@ async def test_crawling_success():
     crawler.url_filter = url_filter
     # accessing the method's descriptor to mock it
     crawler.crawling = WebCrawler.crawling.__get__(crawler)
-    HTMLParser.extract_links = html_parser.extract_links
-    URLDeDuplicator.dedup_url = url_deduplicator.dedup_url
-
-    unique_urls = await crawler.crawling("https://example.com")
+    with (
+        patch.object(HTMLParser, "extract_links", html_parser.extract_links),
+        patch.object(URLDeDuplicator, "dedup_url", url_deduplicator.dedup_url),
+    ):
+        unique_urls = await crawler.crawling("https://example.com")
 
     assert unique_urls == ["https://example.com/page1"]
-    network_client.query_html.assert_awaited_once_with("https://example.com")
+    network_client.fetch.assert_awaited_once_with(
+        "https://example.com", follow_redirect=crawler.follow_redirect, parse=False
+    )
     html_parser.extract_links.assert_called_once_with(
         url_filter.filter_links, "<html></html>"
     )
@@ -268,12 +433,121 @@ async def test_crawling_success():
     )
 
 
+@pytest.mark.asyncio
+async def test_crawling_records_fetch_history():
+    network_client = MagicMock()
+    storage_client = StorageClient(output_file_path=Path(__file__).parent)
+    network_client.fetch = AsyncMock(
+        return_value=FetchResult(
+            url="https://example.com",
+            final_url="https://example.com",
+            status_code=200,
+            html=BeautifulSoup("<html></html>", "html.parser"),
+            content_hash="a",
+        )
+    )
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+    )
+    await crawler.crawling("https://example.com")
+
+    assert storage_client.history["https://example.com"]["fetches"] == 1
+    assert storage_client.history["https://example.com"]["hash"] == "a"
+
+
+@pytest.mark.asyncio
+async def test_recrawl_seeds_pages_due():
+    network_client = MagicMock()
+    storage_client = StorageClient(output_file_path=Path(__file__).parent)
+    storage_client.add("https://example.com", {"links": []})
+    storage_client.add("https://example.com/news", {"links": []})
+    recrawl_scheduler = MagicMock()
+    recrawl_scheduler.due = MagicMock(return_value=["https://example.com/news"])
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+        recrawl=recrawl_scheduler,
+    )
+    await crawler.seed()
+
+    recrawl_scheduler.due.assert_called_once_with(storage_client.history)
+    assert [item.url for item in crawler.to_visit_queue.items()] == [
+        "https://example.com/news"
+    ]
+    assert crawler.recrawling == {"https://example.com/news"}
+    assert storage_client.contains("https://example.com/news")
+    assert storage_client.contains("https://example.com")
+
+
+def recrawl_crawler(storage_client):
+    recrawl_scheduler = MagicMock()
+    recrawl_scheduler.due = MagicMock(return_value=["https://example.com/news"])
+    robot_parser = MagicMock()
+    robot_parser.can_fetch.return_value = True
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=MagicMock(),
+        storage_client=storage_client,
+        recrawl=recrawl_scheduler,
+        max_retries=0,
+    )
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    return crawler
+
+
+@pytest.mark.asyncio
+async def test_recrawl_refetches_stored_page():
+    storage_client = StorageClient(output_file_path=Path(__file__).parent)
+    storage_client.add("https://example.com/news", {"links": ["https://example.com/a"]})
+    crawler = recrawl_crawler(storage_client)
+    crawler.fetch = AsyncMock(return_value=fetched("https://example.com/news"))
+    crawler.parse = MagicMock(return_value={"https://example.com/b"})
+
+    await crawler.seed()
+    await crawler.process()
+
+    crawler.fetch.assert_awaited_once_with("https://example.com/news")
+    assert storage_client.get("https://example.com/news") == {
+        "links": ["https://example.com/b"]
+    }
+    assert not crawler.recrawling
+
+
+@pytest.mark.asyncio
+async def test_recrawl_failed_refetch_keeps_stored_page():
+    storage_client = StorageClient(output_file_path=Path(__file__).parent)
+    storage_client.add("https://example.com/news", {"links": ["https://example.com/a"]})
+    crawler = recrawl_crawler(storage_client)
+    crawler.fetch = AsyncMock(side_effect=Exception("General error"))
+
+    await crawler.seed()
+    await crawler.process()
+
+    crawler.fetch.assert_awaited_once()
+    assert storage_client.get("https://example.com/news") == {
+        "links": ["https://example.com/a"]
+    }
+    assert not crawler.recrawling
+
+
 @pytest.mark.asyncio
 async def test_crawling_no_html_content():
     network_client = MagicMock()
     storage_client = MagicMock()
 
-    network_client.query_html = AsyncMock(return_value=None)
+    network_client.fetch = AsyncMock(
+        return_value=FetchResult(
+            url="https://example.com",
+            final_url="https://example.com",
+            status_code=200,
+            html=None,
+        )
+    )
 
     crawler = WebCrawler(
         start_url="https://example.com",
@@ -284,7 +558,9 @@ async def test_crawling_no_html_content():
     unique_urls = await crawler.crawling("https://example.com")
 
     assert unique_urls is None
-    network_client.query_html.assert_awaited_once_with("https://example.com")
+    network_client.fetch.assert_awaited_once_with(
+        "https://example.com", follow_redirect=crawler.follow_redirect, parse=False
+    )
     storage_client.add.assert_called_once_with("https://example.com")
 
 
@@ -296,7 +572,14 @@ async def test_crawling_with_duplicates():
     html_parser = MagicMock()
     url_deduplicator = MagicMock()
 
-    network_client.query_html = AsyncMock(return_value="<html></html>")
+    network_client.fetch = AsyncMock(
+        return_value=FetchResult(
+            url="https://example.com",
+            final_url="https://example.com",
+            status_code=200,
+            html="<html></html>",
+        )
+    )
     html_parser.extract_links = MagicMock(
         return_value=["https://example.com/page1", "https://example.com/page1"]
     )
@@ -311,13 +594,16 @@ async def test_crawling_with_duplicates():
     )
     crawler.url_filter = url_filter
     crawler.crawling = WebCrawler.crawling.__get__(crawler)
-    HTMLParser.extract_links = html_parser.extract_links
-    URLDeDuplicator.dedup_url = url_deduplicator.dedup_url
-
-    unique_urls = await crawler.crawling("https://example.com")
+    with (
+        patch.object(HTMLParser, "extract_links", html_parser.extract_links),
+        patch.object(URLDeDuplicator, "dedup_url", url_deduplicator.dedup_url),
+    ):
+        unique_urls = await crawler.crawling("https://example.com")
 
     assert unique_urls == []
-    network_client.query_html.assert_awaited_once_with("https://example.com")
+    network_client.fetch.assert_awaited_once_with(
+        "https://example.com", follow_redirect=crawler.follow_redirect, parse=False
+    )
     html_parser.extract_links.assert_called_once_with(
         url_filter.filter_links, "<html></html>"
     )
@@ -325,3 +611,270 @@ async def test_crawling_with_duplicates():
         "https://example.com",
         {"links": ["https://example.com/page1", "https://example.com/page1"]},
     )
+
+
+@pytest.mark.asyncio
+async def test_crawling_redirect_rewrites_links():
+    network_client = MagicMock()
+    storage_client = StorageClient(output_file_path=Path(__file__).parent)
+
+    network_client.fetch = AsyncMock(
+        return_value=FetchResult(
+            url="https://example.com/old",
+            final_url="https://example.com/new",
+            status_code=200,
+            html=BeautifulSoup(
+                '<a href="/old"></a><a href="/page1"></a>', "html.parser"
+            ),
+            redirects=["https://example.com/old"],
+        )
+    )
+
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=network_client,
+        storage_client=storage_client,
+    )
+    crawler.crawling = WebCrawler.crawling.__get__(crawler)
+
+    unique_urls = await crawler.crawling("https://example.com/old")
+
+    assert crawler.redirects == {"https://example.com/old": "https://example.com/new"}
+    assert unique_urls == {"https://example.com/page1"}
+    assert storage_client.get("https://example.com/old") is None
+    assert set(storage_client.get("https://example.com/new")["links"]) == {
+        "https://example.com/new",
+        "https://example.com/page1",
+    }
+
+
+@pytest.mark.asyncio
+async def test_follow_redirect_other_host():
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=MagicMock(),
+        storage_client=MagicMock(),
+    )
+    robot_parser = MagicMock()
+    robot_parser.can_fetch.return_value = True
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    crawler.storage_client.contains = MagicMock(return_value=False)
+
+    assert await crawler.follow_redirect(
+        "https://example.com/old", "https://example.com/new"
+    )
+    assert not await crawler.follow_redirect(
+        "https://example.com/old", "https://blog.example.com/new"
+    )
+
+
+# ----------- Shutdown ------------
+
+
+@pytest.mark.asyncio
+async def test_sigterm_drains_in_flight_fetch_and_saves_frontier(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+    robot_parser = MagicMock()
+    robot_parser.can_fetch.return_value = True
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=MagicMock(),
+        storage_client=storage_client,
+    )
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    started = asyncio.Event()
+
+    async def fetch(url):
+        started.set()
+        await asyncio.sleep(0.05)
+        return FetchResult(
+            url=url,
+            final_url=url,
+            status_code=200,
+            text='<a href="https://example.com/a">a</a>',
+        )
+
+    crawler.fetch = fetch
+    crawl = asyncio.create_task(crawler.crawl_with_workers())
+    await started.wait()
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.wait_for(crawl, 1)
+
+    assert json.loads((tmp_path / "storage.json").read_text()) == {
+        "https://example.com": {"links": ["https://example.com/a"]}
+    }
+    frontier = json.loads((tmp_path / "storage.frontier.json").read_text())
+    assert [entry["url"] for entry in frontier] == ["https://example.com/a"]
+    assert frontier[0]["depth"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_fetches_after_shutdown_timeout(tmp_path):
+    storage_client = StorageClient(output_file_path=tmp_path)
+    robot_parser = MagicMock()
+    robot_parser.can_fetch.return_value = True
+    crawler = WebCrawler(
+        start_url="https://example.com",
+        network_client=MagicMock(),
+        storage_client=storage_client,
+        shutdown_timeout=0.01,
+    )
+    crawler.robots_cache.get = MagicMock(return_value=robot_parser)
+    started = asyncio.Event()
+
+    async def fetch(url):
+        started.set()
+        await asyncio.sleep(10)
+
+    crawler.fetch = fetch
+    crawl = asyncio.create_task(crawler.crawl_with_workers())
+    await started.wait()
+    crawler.stop()
+    await asyncio.wait_for(crawl, 1)
+
+    assert [item.url for item in crawler.interrupted] == ["https://example.com"]
+    frontier = json.loads((tmp_path / "storage.frontier.json").read_text())
+    assert [entry["url"] for entry in frontier] == ["https://example.com"]
+
+
+# ----------- Pipeline ------------
+
+
+@pytest.mark.asyncio
+async def test_crawl_through_pipeline_stages(tmp_path):
+    site = SyntheticSite(pages=30, hosts=2)
+    crawler = WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+        parse_workers=2,
+        stage_queue_size=2,
+    )
+
+    await crawler.crawl_with_workers()
+
+    pipeline = crawler.stats()["pipeline"]
+    assert len(crawler.storage_client.get_all()) == 30
+    assert pipeline["fetch"]["processed"] == 30
+    assert pipeline["parse"]["processed"] == 30
+    assert pipeline["store"]["processed"] == 30
+    assert pipeline["parse"]["queue_max"] == 2
+
+
+@pytest.mark.asyncio
+async def test_crawl_synthetic_site_over_http(tmp_path):
+    site = SyntheticSite(
+        pages=30,
+        hosts=2,
+        duplicate_ratio=0.5,
+        rate_limit_ratio=0.2,
+        page_size=2000,
+        scheme="http",
+    )
+
+    async with SyntheticSiteServer(site) as server:
+        network_client = server.network_client()
+        crawler = WebCrawler(
+            start_url=site.start_url,
+            network_client=network_client,
+            storage_client=StorageClient(output_file_path=tmp_path),
+            num_workers=4,
+            backoff=0,
+        )
+        await crawler.crawl_with_workers()
+        await network_client.client.aclose()
+
+    storage = crawler.storage_client.get_all()
+    assert len(storage) == 30
+    assert site._rate_limited
+    assert set(storage[site.url(0)]["links"]) == set(site.links(0))
+
+
+@pytest.mark.asyncio
+async def test_crawl_records_metrics(tmp_path):
+    site = SyntheticSite(pages=30, hosts=2, fan_out=5)
+    crawler = WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+    )
+
+    await crawler.crawl_with_workers()
+
+    metrics = crawler.metrics
+    assert sum(metrics.fetch_seconds.labels("200").counts) == 30
+    assert sum(metrics.parse_seconds.counts) == 30
+    assert metrics.downloaded_bytes.value > 0
+    assert metrics.links_found.value == sum(
+        len(set(site.links(page))) for page in range(30)
+    )
+    assert 0 < metrics.links_duplicate.value < metrics.links_found.value
+    assert 'crawler_queue_depth{queue="frontier"} 0' in metrics.render().splitlines()
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_stored_pages(tmp_path):
+    site = SyntheticSite(pages=30, hosts=2, fan_out=5)
+    crawler = WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+    )
+
+    records = [record async for record in crawler.stream(buffer_size=4)]
+
+    storage = crawler.storage_client.get_all()
+    assert sorted(record.url for record in records) == sorted(storage)
+    for record in records:
+        assert record.status == 200
+        assert set(record.links) == set(storage[record.url]["links"])
+        assert set(record.timings) == {"fetch", "parse", "store"}
+        assert record.timings["fetch"] > 0
+    assert records[0].url == site.start_url and records[0].depth == 0
+    assert (tmp_path / "storage.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_stream_backpressure(tmp_path):
+    site = SyntheticSite(pages=30, hosts=2, fan_out=5)
+    crawler = WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+    )
+    consumed = 0
+
+    async for _ in crawler.stream(buffer_size=2):
+        consumed += 1
+        # A slow consumer, the crawl waits for it
+        await asyncio.sleep(0.01)
+        # Pages buffered, and one page stored waiting for room in the buffer
+        assert crawler.store_stage.processed <= consumed + 2 + 1
+
+    assert consumed == 30
+
+
+@pytest.mark.asyncio
+async def test_stream_closed_early_stops_the_crawl(tmp_path):
+    site = SyntheticSite(pages=200, hosts=2, fan_out=5)
+    crawler = WebCrawler(
+        start_url=site.start_url,
+        network_client=site.network_client(),
+        storage_client=StorageClient(output_file_path=tmp_path),
+        num_workers=4,
+        shutdown_timeout=1.0,
+    )
+
+    stream = crawler.stream(buffer_size=2)
+    async for record in stream:
+        if record.depth > 0:
+            break
+    await stream.aclose()
+
+    assert crawler._stopping.is_set()
+    assert len(crawler.storage_client.get_all()) < 200
+    assert (tmp_path / "storage.json").exists()
@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import zlib
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Spans of the httpx transport events, by event name prefix. DNS resolution happens
+# within connect_tcp, time to first byte goes from sending the request headers to
+# receiving the response headers
+HTTP_SPANS = {
+    "connection.connect_tcp": "connect",
+    "connection.connect_unix_socket": "connect",
+    "connection.start_tls": "tls",
+    "http11.send_request_headers": "ttfb",
+    "http2.send_request_headers": "ttfb",
+    "http11.receive_response_body": "download",
+    "http2.receive_response_body": "download",
+}
+# Events ending the time to first byte span, started by sending the request headers
+TTFB_END = ("http11.receive_response_headers", "http2.receive_response_headers")
+
+
+class Trace:
+    """
+    The spans of a URL, from its queueing to its storage.
+
+    Attributes:
+        url (str): The URL traced.
+        trace_id (str): 128 bits hexadecimal identifier, as in OpenTelemetry.
+        started_at (float): perf_counter time the trace started at.
+        spans (List[tuple]): Name, start, end and arguments of each span, perf_counter times.
+    """
+
+    __slots__ = ("url", "trace_id", "started_at", "spans", "_http_started")
+
+    def __init__(self, url: str, started_at: float):
+        self.url = url
+        self.trace_id = os.urandom(16).hex()
+        self.started_at = started_at
+        self.spans: List[tuple] = []
+        self._http_started: Dict[str, float] = {}
+
+    def add(self, name: str, start: float, end: float, **args):
+        self.spans.append((name, start, end, args))
+
+    async def http_event(self, event_name: str, info: Dict[str, Any]):
+        """
+        httpx trace extension callback, turns the transport events into spans.
+        """
+        now = time.perf_counter()
+        prefix, _, stage = event_name.rpartition(".")
+        if prefix in TTFB_END:
+            if stage != "started":
+                start = self._http_started.pop("ttfb", None)
+                if start is not None:
+                    self.add("ttfb", start, now)
+            return
+        name = HTTP_SPANS.get(prefix)
+        if name is None:
+            return
+        if stage == "started":
+            self._http_started[name] = now
+        elif name != "ttfb":
+            start = self._http_started.pop(name, None)
+            if start is not None:
+                self.add(
+                    name, start, now, **({"failed": True} if stage == "failed" else {})
+                )
+
+
+class Tracer:
+    """
+    Records sampled per-URL spans and exports them to a local file in the Chrome trace event format.
+
+    A URL is sampled from the CRC32 of its text, so the decision is the same on each try and in
+    each process, and URLs not sampled cost a dictionary lookup per span. The spans of a URL:
+    - queue_wait: from its queueing in the frontier, or its retry, to a worker taking it
+    - politeness_wait: waiting for a host concurrency slot and rate limiter token
+    - connect (DNS resolution included), tls, ttfb and download: the transport events of each
+      request, reported by httpx transports through the trace extension, mocked transports
+      do not report them
+    - fetch: the whole fetch, redirects included, with its status
+    - parse and store: the parse and store stages
+    - url: the whole trace, once the URL is done with
+
+    Finished traces are buffered and appended to the file buffer_size events at a time. The file
+    is a JSON array of complete events ("ph": "X"), one row per URL, to be opened in Perfetto or
+    chrome://tracing. It stays loadable if the crawl is killed before the array is closed. The
+    trace and span ids of the events map them to OpenTelemetry spans.
+
+    Attributes:
+        path (Path | None): File the events are written to, None to disable tracing.
+        sample_rate (float): Share of the URLs traced, between 0 and 1.
+        buffer_size (int): Number of events buffered before being written.
+        active (Dict[str, Trace]): Traces of the URLs being crawled, by URL.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        sample_rate: float = 1.0,
+        buffer_size: int = 1000,
+    ):
+        self.path = path
+        self.sample_rate = sample_rate if path is not None else 0.0
+        self.buffer_size = buffer_size
+        self.active: Dict[str, Trace] = {}
+        self._threshold = int(self.sample_rate * 2**32)
+        self._queued: Dict[str, float] = {}
+        self._buffer: List[Dict] = []
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._rows = 0
+        self._file = None
+        self._written = 0
+
+    def sampled(self, url: str) -> bool:
+        return zlib.crc32(url.encode()) < self._threshold
+
+    def queued(self, url: str):
+        """
+        Starts the queue wait of a URL, if sampled.
+        """
+        if self._threshold and self.sampled(url):
+            self._queued[url] = time.perf_counter()
+
+    def dequeued(self, url: str):
+        """
+        Ends the queue wait of a URL taken by a worker, starting its trace if sampled.
+        """
+        if not self._threshold:
+            return
+        now = time.perf_counter()
+        queued_at = self._queued.pop(url, None)
+        trace = self.active.get(url)
+        if trace is None:
+            if queued_at is None and not self.sampled(url):
+                return
+            trace = self.active[url] = Trace(url, queued_at or now)
+        if queued_at is not None:
+            trace.add("queue_wait", queued_at, now)
+
+    def span(self, url: str, name: str, start: float, end: float | None = None, **args):
+        """
+        Records a span of a traced URL, ending now if no end is given.
+        """
+        trace = self.active.get(url)
+        if trace is not None:
+            trace.add(name, start, time.perf_counter() if end is None else end, **args)
+
+    def http_trace(self, url: str) -> Callable[[str, Dict], Awaitable] | None:
+        """
+        Returns the httpx trace extension callback of a traced URL, None if not traced.
+        """
+        trace = self.active.get(url)
+        return trace.http_event if trace is not None else None
+
+    def finish(self, url: str):
+        """
+        Ends the trace of a URL done with and buffers its events.
+        """
+        trace = self.active.pop(url, None)
+        if trace is None:
+            return
+        self._rows += 1
+        span_ids = [os.urandom(8).hex() for _ in range(len(trace.spans) + 1)]
+        root = ("url", trace.started_at, time.perf_counter(), {})
+        self._buffer.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self._pid,
+                "tid": self._rows,
+                "args": {"name": trace.url},
+            }
+        )
+        for span_id, (name, start, end, args) in zip(span_ids, (root, *trace.spans)):
+            self._buffer.append(
+                {
+                    "name": name,
+                    "cat": "crawl",
+                    "ph": "X",
+                    "ts": round((start - self._origin) * 1e6),
+                    "dur": round((end - start) * 1e6),
+                    "pid": self._pid,
+                    "tid": self._rows,
+                    "args": {
+                        "url": trace.url,
+                        "trace_id": trace.trace_id,
+                        "span_id": span_id,
+                        **({"parent_id": span_ids[0]} if name != "url" else {}),
+                        **args,
+                    },
+                }
+            )
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the buffered events to the file.
+        """
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write("[\n")
+        self._file.write(
+            "".join(
+                f"{',' if self._written + i else ''}{json.dumps(event)}\n"
+                for i, event in enumerate(self._buffer)
+            )
+        )
+        self._file.flush()
+        self._written += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        """
+        Writes the buffered events and closes the array, the traces not finished are dropped.
+        """
+        if not self._threshold:
+            return
+        self.flush()
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write("[\n")
+        self._file.write("]\n")
+        self._file.close()
+        self._file = None
+        logger.info(
+            "%s trace events of %s URLs written to %s",
+            self._written,
+            self._rows,
+            self.path,
+        )
@@ -1,32 +1,28 @@
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class URLContainer:
     """
-    URLContainer class to manage a base URL and track the number of times it is accessed.
+    URLContainer class holding a URL to crawl, as queued in the frontier.
 
-    Attributes:
-        _base_url (str): The base URL.
-        _tries (int): The number of times the base URL has been accessed.
+    Slotted to keep frontier entries compact, the frontier heaps hold the containers
+    themselves, ordered by priority then url_id.
 
-    Properties:
-        base_url (str): Gets the base URL and increments the access count.
-        tries (int): Gets the number of times the base URL has been accessed.
+    Attributes:
+        url (str): The URL to crawl.
+        depth (int): Number of links followed from the start URL to reach this URL.
+        parent (str | None): URL of the page this URL was discovered on.
+        tries (int): Number of fetch attempts made, incremented by the crawler before each fetch.
+        priority (float): Score given by the frontier scorer, lower is crawled first.
+        url_id (int): Sequence number given by the frontier queue, priority ties are popped in this order.
+        ready_at (float): Monotonic time the last retry of the URL was due at, 0 if it was never retried.
     """
 
-    _base_url: str
-    _tries: int = 0
-
-    @property
-    def base_url(self) -> str:
-        self._tries += 1
-        return self._base_url
-
-    @base_url.setter
-    def base_url(self, value: str):
-        self._base_url = value
-
-    @property
-    def tries(self) -> int:
-        return self._tries
+    url: str
+    depth: int = 0
+    parent: str | None = None
+    tries: int = 0
+    priority: float = 0.0
+    url_id: int = -1
+    ready_at: float = 0.0
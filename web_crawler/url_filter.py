@@ -3,7 +3,7 @@ from urllib.parse import urlparse, urljoin
 import logging
 
 
-import tldextract
+from web_crawler.public_suffix import extract
 
 
 logger = logging.getLogger(__name__)
@@ -21,7 +21,7 @@ class URLFilter:
 
     Attributes:
         base_url (str): The base URL used as a reference for processing relative URLs
-        extracted_base_url (ExtractResult): Parsed components of the base URL using tldextract
+        extracted_base_url (ExtractResult): Parsed components of the base URL, see public_suffix
         allowed_domain (str): The domain name that URLs are allowed to belong to
         allowed_schemes (List[str]): List of allowed URL schemes (default: ["http", "https"])
     """
@@ -32,7 +32,7 @@ class URLFilter:
         allowed_schemes: List = ["http", "https"],
     ):
         self.base_url = base_url
-        self.extracted_base_url = tldextract.extract(self.base_url)
+        self.extracted_base_url = extract(self.base_url)
         self.allowed_domain = self.extracted_base_url.domain
         self.allowed_schemes = allowed_schemes
 
@@ -85,7 +85,7 @@ class URLFilter:
             return None
 
         # Avoid link like this "example.com/about"
-        if not url_parsed.scheme and tldextract.extract(link).suffix:
+        if not url_parsed.scheme and extract(link).suffix:
             return None
 
         # if link is a path -> Relative url
@@ -1,29 +1,44 @@
 import asyncio
+import json
 import time
+import signal
 import logging
 import httpx
-import random
 import argparse
 from pathlib import Path
-from typing import Set
+from typing import AsyncIterator, Dict, List, Set, Tuple
 
 
-from web_crawler.network_client import NetworkClient
+from web_crawler.network_client import FetchResult, NetworkClient
 from web_crawler.storage_client import StorageClient
 from web_crawler.html_parser import HTMLParser
 from web_crawler.url_filter import URLFilter
 from web_crawler.url_deduplicator import URLDeDuplicator
 from web_crawler.robot_parser import RobotParser
+from web_crawler.robots_cache import RobotsCache
 from web_crawler.url_container import URLContainer
+from web_crawler.rate_limiter import RateLimiter, host_key
+from web_crawler.concurrency_controller import AdaptiveConcurrencyController
+from web_crawler.retry_scheduler import RetryScheduler, parse_retry_after
+from web_crawler.frontier import Frontier
+from web_crawler.scoring import Scorer, depth_score
+from web_crawler.crawl_budget import CrawlBudget, CrawlGuard
+from web_crawler.recrawl_scheduler import RecrawlScheduler
+from web_crawler.event_loop import LoopLagMonitor
+from web_crawler.pipeline import PipelineStage
+from web_crawler.metrics import CrawlMetrics
+from web_crawler.status_reporter import StatusReporter
+from web_crawler.tracing import Tracer
+from web_crawler.page_record import PageRecord
 from web_crawler.exceptions import (
     RateLimitException,
     RedirectException,
     NotFoundException,
     InvalidBaseURL,
     GenericCrawlerException,
+    FrontierClosed,
 )
 
-
 logger = logging.getLogger(__name__)
 
 
@@ -43,19 +58,43 @@ class WebCrawler:
         network_client (NetworkClient): Client for making HTTP requests
         storage_client (StorageClient): Client for storing crawled data
         url_filter (URLFilter): Filter for validating and processing URLs
-        robot_parser (RobotParser): Parser for handling robots.txt rules
-        to_visit_queue (asyncio.Queue): Queue of URLs to be crawled
+        robots_cache (RobotsCache): Per-host cache of the robots.txt rules, fetched asynchronously
+        rate_limiter (RateLimiter): Per-host politeness budget shared by all workers
+        concurrency_controller (AdaptiveConcurrencyController): Per-host AIMD limit of in-flight fetches
+        to_visit_queue (Frontier): Host-partitioned queue of URLs to be crawled
+        retry_scheduler (RetryScheduler): Delay queue holding URLs waiting to be retried
+        redirects (Dict[str, str]): Redirect sources mapped to the final URL of their chain
         num_workers (int): Number of concurrent crawler workers
         max_retries (int): Maximum number of retry attempts for failed requests
         backoff (int): Base time in seconds for exponential backoff
+        min_concurrency (int): Minimum number of in-flight fetches per host
+        max_concurrency (int): Maximum number of in-flight fetches per host, defaults to num_workers
+        scorer (Scorer): Priority of the URLs in the frontier, lower first - breadth-first by default
+        crawl_guard (CrawlGuard): Budgets and crawler-trap heuristics checked when URLs are queued
+        loop_lag_monitor (LoopLagMonitor): Event loop scheduling delay sampled during the crawl
+        shutdown_timeout (float): Number of seconds in-flight fetches have to finish once the crawl is stopped
+        checkpoint_interval (float): Number of seconds between two flushes of the new results, None to disable
+        interrupted (List[URLContainer]): URLs whose fetch was cancelled by a shutdown
+        fetch_stage (PipelineStage): Accounting of the fetches, done by the num_workers workers
+        parse_stage (PipelineStage): Link extraction of the fetched pages, by parse_workers threads
+        store_stage (PipelineStage): Storage of the parsed pages and queueing of their links, by store_workers tasks
+        in_flight (Set[str]): URLs fetched and not stored yet
+        metrics (CrawlMetrics): Fetch latency, parse time, downloaded bytes, dedup, robots and retry counts and queue depths
+        status_reporter (StatusReporter): Progress reported every status_interval seconds, None to disable
+        tracer (Tracer): Sampled per-URL spans, from queueing to storage, disabled by default
+        recrawl (RecrawlScheduler): Revisit schedule of the stored pages, the crawl starts from the pages due instead of the start URL when given
+        recrawling (Set[str]): Stored pages due for a revisit and not done with yet, fetched again despite being stored
 
         InvalidBaseURL: If the starting URL is invalid
     """
 
+    # Signals draining the crawl
+    stop_signals = (signal.SIGINT, signal.SIGTERM)
+
     def __init__(
         self,
         start_url: str,
-        network_client: NetworkClient = NetworkClient(),
+        network_client: NetworkClient | None = None,
         storage_client: StorageClient = StorageClient(
             output_file_path=Path(__file__).parent.parent,
             output_file_name="storage.json",
@@ -63,26 +102,108 @@ class WebCrawler:
         num_workers: int = 1,
         max_retries: int = 3,
         backoff: int = 5,
+        min_concurrency: int = 1,
+        max_concurrency: int | None = None,
+        scorer: Scorer | None = depth_score,
+        budget: CrawlBudget | None = None,
+        shutdown_timeout: float = 10.0,
+        checkpoint_interval: float | None = 30.0,
+        recrawl: RecrawlScheduler | None = None,
+        parse_workers: int = 1,
+        store_workers: int = 1,
+        stage_queue_size: int | None = None,
+        status_interval: float | None = None,
+        status_file: Path | None = None,
+        tracer: Tracer | None = None,
     ):
         self.start_url = start_url
-        self.network_client = network_client
+        self.network_client = (
+            network_client if network_client is not None else NetworkClient()
+        )
         self.url_filter = URLFilter(self.start_url)
         # Validate URL
         if not self.url_filter.is_url_valid():
-            logger.error(f"Crawler not proceeding, invalid URL: {self.start_url}")
+            logger.error("Crawler not proceeding, invalid URL: %s", self.start_url)
             raise InvalidBaseURL(f"Invalid URL: {self.start_url}")
 
-        self.robot_parser = RobotParser(self.start_url)
-
         self.storage_client = storage_client
 
-        self.to_visit_queue = asyncio.Queue()
         self.num_workers = num_workers
+        self.rate_limiter = RateLimiter()
+        self.concurrency_controller = AdaptiveConcurrencyController(
+            min_concurrency=min_concurrency,
+            max_concurrency=max(max_concurrency or num_workers, min_concurrency),
+        )
+        self.to_visit_queue = Frontier(
+            rate_limiter=self.rate_limiter,
+            concurrency_controller=self.concurrency_controller,
+            scorer=scorer,
+        )
+        self.concurrency_controller.on_release = self.to_visit_queue.wake
+        self.robots_cache = RobotsCache(
+            self.network_client,
+            release=self.to_visit_queue.put_nowait,
+            on_load=self.configure_host,
+        )
+        self.crawl_guard = CrawlGuard(budget)
+        self.loop_lag_monitor = LoopLagMonitor()
+        self.shutdown_timeout = shutdown_timeout
+        self.checkpoint_interval = checkpoint_interval
+        self.interrupted: List[URLContainer] = []
+        self.recrawl = recrawl
+        self.recrawling: Set[str] = set()
+        # Fetched pages wait for the parse stage, parsed pages for the store stage, in bounded queues
+        stage_queue_size = stage_queue_size or num_workers
+        self.fetch_stage = PipelineStage("fetch", concurrency=num_workers)
+        self.parse_stage = PipelineStage(
+            "parse",
+            self.parse_page,
+            concurrency=parse_workers,
+            queue_size=stage_queue_size,
+        )
+        self.store_stage = PipelineStage(
+            "store",
+            self.store_page,
+            concurrency=store_workers,
+            queue_size=stage_queue_size,
+        )
+        self._stage_tasks: List[asyncio.Task] = []
+        # URLs fetched and not stored yet, neither in the frontier nor in storage
+        self.in_flight: Set[str] = set()
+        self.metrics = CrawlMetrics()
+        # Read when collected, the queues do not update them
+        self.metrics.queue_depth.labels("frontier").set_function(
+            self.to_visit_queue.qsize
+        )
+        for stage in (self.parse_stage, self.store_stage):
+            self.metrics.queue_depth.labels(stage.name).set_function(stage.queue.qsize)
+        self.metrics.in_flight.set_function(lambda: len(self.in_flight))
+        self.status_reporter = (
+            StatusReporter(self, status_interval, status_file)
+            if status_interval
+            else None
+        )
+        self.tracer = tracer or Tracer()
+        # Records of the stored pages, while streamed
+        self._records: asyncio.Queue | None = None
+        self._workers: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._stop_time = 0.0
+        self.redirects: Dict[str, str] = {}
         self.max_retries = max_retries
         self.backoff = backoff
+        self.retry_scheduler = RetryScheduler(
+            release=self.to_visit_queue.put_nowait, backoff=self.backoff
+        )
 
         logger.info(
-            f"Web Crawler configuration - url: {self.start_url}, workers: {self.num_workers}, retries: {self.max_retries}, backoff: {self.backoff}"
+            "Web Crawler configuration - url: %s, workers: %s, retries: %s, backoff: %s, concurrency: %s-%s",
+            self.start_url,
+            self.num_workers,
+            self.max_retries,
+            self.backoff,
+            self.concurrency_controller.min_concurrency,
+            self.concurrency_controller.max_concurrency,
         )
 
     async def crawl_with_workers(self):
@@ -91,128 +212,599 @@ class WebCrawler:
 
         This method initializes the crawling process by adding the start URL to the
         queue and then creates a number of worker tasks to process the URLs in the queue.
-        The method waits for the queue to be fully processed before canceling the worker
-        tasks and saving the results to a file.
+        Workers fetch the URLs and hand the pages over to the parse then store stages, see
+        `process`. The method waits for the queue and the pending retries to be fully processed before
+        canceling the worker tasks and saving the results to a file. New results are flushed
+        to a journal every checkpoint_interval seconds meanwhile.
+
+        On SIGINT or SIGTERM, or when the wall time budget runs out, the crawl is drained
+        instead: no new URL is handed out, in-flight fetches get shutdown_timeout seconds
+        to finish, then the results are saved along with the URLs left to crawl.
         """
-        await self.to_visit_queue.put(URLContainer(self.start_url))
+        self.crawl_guard.start()
+        await self.seed()
 
-        logger.info(f"Init URL: {self.start_url} added to queue ")
-        logger.debug(f"Queue size: {self.to_visit_queue.qsize()}")
+        logger.info("Init URL: %s added to queue ", self.start_url)
+        logger.debug("Queue size: %s", self.to_visit_queue.qsize())
 
         # Worker creation
-        workers = [
+        self._workers = [
             asyncio.create_task(self.workers(), name=f"worker_{i}")
             for i in range(self.num_workers)
         ]
-
-        # Wait for the queue to be fully processed
-        await self.to_visit_queue.join()
+        self.fetch_stage.start()
+        self._stage_tasks = self.parse_stage.start() + self.store_stage.start()
+        background_tasks = [
+            *self._stage_tasks,
+            asyncio.create_task(self.retry_scheduler.run(), name="retry_scheduler"),
+            asyncio.create_task(self.loop_lag_monitor.run(), name="loop_lag"),
+        ]
+        if self.checkpoint_interval:
+            background_tasks.append(
+                asyncio.create_task(self.checkpoint_periodically(), name="checkpoint")
+            )
+        if self.status_reporter is not None:
+            self.status_reporter.start()
+            background_tasks.append(
+                asyncio.create_task(self.status_reporter.run(), name="status")
+            )
+        self.install_signal_handlers()
+
+        # Wait for the queue and the retries to be fully processed, or for a stop request
+        done = asyncio.create_task(self.wait_until_done(), name="wait_until_done")
+        stopped = asyncio.create_task(self._stopping.wait(), name="stopped")
+        await asyncio.wait(
+            (done, stopped),
+            timeout=self.crawl_guard.remaining_time,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if not done.done():
+            if not stopped.done():
+                self.stop("crawl duration budget reached")
+            done.cancel()
+            await self.drain()
+        stopped.cancel()
 
         # Cancels workers once the queue is empty
-        for worker in workers:
-            worker.cancel()
+        for task in self._workers + background_tasks:
+            task.cancel()
+        self.remove_signal_handlers()
+
+        logger.info("Crawl stats: %s", self.stats())
+        if self.status_reporter is not None:
+            self.status_reporter.report()
+        self.tracer.close()
 
-        # Save to file - Caveat, if the program is interrupted before this point, the data will not be saved
         self.storage_client.write_to_file()
+        if self._stopping.is_set():
+            saved = self.write_frontier()
+            logger.warning(
+                "Shutdown completed in %0.2f seconds - %s fetches interrupted, %s URLs left to crawl saved",
+                time.perf_counter() - self._stop_time,
+                len(self.interrupted),
+                saved,
+            )
+
+    async def stream(self, buffer_size: int = 100) -> AsyncIterator[PageRecord]:
+        """
+        Crawls, yielding the record of each page as soon as it is stored.
+
+        Up to buffer_size records wait for the consumer, then the store stage waits for
+        room, and through the bounded stage queues the fetches, so the crawl goes at the
+        pace of the consumer. Closing the stream early stops the crawl, which drains as on
+        SIGTERM, dropping the records left. The crawl results are saved as usual.
+
+            async with contextlib.aclosing(crawler.stream()) as pages:
+                async for page in pages:
+                    index(page.url, page.links)
+
+        Args:
+            buffer_size (int): Number of records buffered for the consumer.
+
+        Yields:
+            PageRecord: The URL, status, links and stage timings of each page stored.
+        """
+        records = self._records = asyncio.Queue(buffer_size)
+
+        async def crawl():
+            try:
+                await self.crawl_with_workers()
+            finally:
+                self._records = None
+                # Ends the iteration once the records left are consumed
+                await records.put(None)
+
+        task = asyncio.create_task(crawl(), name="stream")
+        try:
+            while (record := await records.get()) is not None:
+                yield record
+            await task
+        finally:
+            if not task.done():
+                # Store tasks waiting on the buffer are let through, their records dropped
+                self._records = None
+                self.stop("stream closed")
+                while not task.done():
+                    while not records.empty():
+                        records.get_nowait()
+                    await asyncio.wait((task,), timeout=0.05)
+                await task
+
+    def stop(self, reason: str = "stop requested"):
+        """
+        Requests the crawl to stop, the first request drains it, the next ones cancel in-flight fetches.
+
+        Args:
+            reason (str): Why the crawl is stopped, logged.
+        """
+        if not self._stopping.is_set():
+            logger.warning(
+                "%s - draining, in-flight fetches have %s seconds to finish",
+                reason,
+                self.shutdown_timeout,
+            )
+            self._stop_time = time.perf_counter()
+            self._stopping.set()
+            self.to_visit_queue.close()
+            return
+        logger.warning("%s - cancelling in-flight fetches", reason)
+        for worker in self._workers:
+            worker.cancel()
+
+    async def drain(self):
+        """
+        Waits for the in-flight fetches to finish, and the fetched pages to be parsed and stored,
+        up to shutdown_timeout seconds, then cancels them.
+        """
+        deadline = time.perf_counter() + self.shutdown_timeout
+        _, pending = await asyncio.wait(self._workers, timeout=self.shutdown_timeout)
+        for worker in pending:
+            worker.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        try:
+            await asyncio.wait_for(
+                self.parse_stage.join(), max(0.0, deadline - time.perf_counter())
+            )
+            await asyncio.wait_for(
+                self.store_stage.join(), max(0.0, deadline - time.perf_counter())
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    def install_signal_handlers(self):
+        """
+        Stops the crawl on the stop_signals, where the event loop supports signal handlers.
+        """
+        loop = asyncio.get_running_loop()
+        for stop_signal in self.stop_signals:
+            try:
+                loop.add_signal_handler(
+                    stop_signal, self.stop, f"{stop_signal.name} received"
+                )
+            except (NotImplementedError, RuntimeError):
+                # Not supported on Windows, nor outside of the main thread
+                return
+
+    def remove_signal_handlers(self):
+        """
+        Restores the default handling of the stop_signals.
+        """
+        loop = asyncio.get_running_loop()
+        for stop_signal in self.stop_signals:
+            try:
+                loop.remove_signal_handler(stop_signal)
+            except (NotImplementedError, RuntimeError):
+                return
+
+    async def checkpoint_periodically(self):
+        """
+        Flushes the new results to the storage journal every checkpoint_interval seconds.
+        """
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            flushed = self.storage_client.flush()
+            logger.debug("Checkpoint - %s new results flushed", flushed)
+
+    def left_to_crawl(self) -> List[URLContainer]:
+        """
+        Returns the URLs left to crawl, emptying the stage queues.
+
+        Those are the interrupted, fetched but not stored yet, queued, waiting for a retry and
+        waiting for robots.txt URLs.
+        """
+        return [
+            *self.interrupted,
+            *(item[0] for item in self.parse_stage.drain_pending()),
+            *(item[0] for item in self.store_stage.drain_pending()),
+            *self.to_visit_queue.items(),
+            *self.retry_scheduler.items(),
+            *(item for items in self.robots_cache.parked.values() for item in items),
+        ]
+
+    def write_frontier(self) -> int:
+        """
+        Writes the URLs left to crawl to a JSON file next to the storage file, see `left_to_crawl`.
+
+        Returns:
+            int: The number of URLs written.
+        """
+        url_containers = self.left_to_crawl()
+        output_file_name = Path(self.storage_client.output_file_name)
+        frontier_path = (
+            self.storage_client.output_file_path
+            / f"{output_file_name.stem}.frontier.json"
+        )
+        with open(frontier_path, "w") as f:
+            json.dump(
+                [
+                    {
+                        "url": url_container.url,
+                        "depth": url_container.depth,
+                        "parent": url_container.parent,
+                        "tries": url_container.tries,
+                    }
+                    for url_container in url_containers
+                ],
+                f,
+                indent=4,
+            )
+        return len(url_containers)
+
+    async def seed(self):
+        """
+        Queues the start URL, or the stored pages due for a revisit in recrawl mode.
+
+        Pages due stay in the storage until they are stored again, so a failed refetch keeps
+        their previous links, new pages linked from them are crawled as usual.
+        """
+        if self.recrawl is None:
+            await self.enqueue(URLContainer(self.start_url))
+            return
+        due = self.recrawl.due(self.storage_client.history)
+        logger.info("Recrawling %s pages due for a revisit", len(due))
+        for url in due:
+            self.recrawling.add(url)
+            await self.enqueue(URLContainer(url))
+
+    async def enqueue(self, url_container: URLContainer):
+        """
+        Queues a discovered URL if it fits in the crawl budget.
+
+        URLs already queued skip the budget, the frontier only bumps their priority so
+        they must not be counted twice. URLs being fetched, parsed or stored are skipped,
+        they would be fetched again before being stored.
+
+        Args:
+            url_container (URLContainer): The URL to queue.
+        """
+        if url_container.url in self.in_flight:
+            return
+        if url_container.url in self.to_visit_queue or self.crawl_guard.admit(
+            url_container
+        ):
+            await self.to_visit_queue.put(url_container)
+            self.tracer.queued(url_container.url)
+
+    async def wait_until_done(self):
+        """
+        Waits until there is nothing left to crawl.
+
+        The queue can be drained while URLs are still waiting in the retry scheduler or
+        parked in the robots cache, those are put back in the queue once ready, so all of
+        them are waited on until they are empty at the same time.
+        """
+        while True:
+            await self.to_visit_queue.join()
+            holders = [
+                holder
+                for holder in (self.retry_scheduler, self.robots_cache)
+                if len(holder)
+            ]
+            if holders:
+                await holders[0].join()
+            # Items may have been released to the queue while we were being woken up
+            elif not self.to_visit_queue.unfinished_tasks:
+                return
+
+    def configure_host(self, host: str, robot_parser: RobotParser):
+        """
+        Applies the robots.txt crawling parameters of a host once they are fetched.
+
+        Args:
+            host (str): The host the rules apply to.
+            robot_parser (RobotParser): The parsed robots.txt rules of the host.
+        """
+        crawl_delay, request_rate = robot_parser.rate_directives()
+        self.rate_limiter.configure(
+            host, crawl_delay=crawl_delay, request_rate=request_rate
+        )
+
+    def stats(self) -> Dict:
+        """
+        Returns a snapshot of the crawler internal state, useful to tune it.
+
+        Returns:
+            dict: The queue size, the pending retries, the per-host concurrency controller state,
+                the URLs admitted and rejected by the crawl budget, the event loop lag and
+                the queue depth and service time of each pipeline stage.
+        """
+        return {
+            "queue_size": self.to_visit_queue.qsize(),
+            "pending_retries": len(self.retry_scheduler),
+            "pending_robots": len(self.robots_cache),
+            "concurrency": self.concurrency_controller.stats(),
+            "budget": self.crawl_guard.stats(),
+            "loop_lag": self.loop_lag_monitor.stats(),
+            "pipeline": {
+                stage.name: stage.stats()
+                for stage in (self.fetch_stage, self.parse_stage, self.store_stage)
+            },
+        }
 
     async def workers(self):
         """
         Asynchronous worker method that continuously processes crawling units.
 
-        This method logs the start of a worker, then enters an infinite loop where it:
-        - Abides by the robots.txt crawling policy by sleeping for the specified crawl delay with additional jitter.
-        - Triggers the processing
+        This method logs the start of a worker, then enters an infinite loop triggering the processing.
+        Politeness is not handled here but by the shared rate limiter, right before fetching.
 
-        If the worker is cancelled, it logs the cancellation and exits the loop.
+        If the worker is cancelled, it logs the cancellation and exits the loop. It also exits
+        once the queue is closed by a shutdown, after finishing its in-flight URL.
 
         Raises:
             asyncio.CancelledError: If the worker is cancelled.
         """
-        logger.info(f"Worker started: {asyncio.current_task().get_name()}")
+        logger.info("Worker started: %s", asyncio.current_task().get_name())
         while True:
             try:
-                # Abide by robots crawling policy
-                await asyncio.sleep(
-                    self.robot_parser.crawl_delay + random.uniform(0, 1)
-                )
                 await self.process()
+            except FrontierClosed:
+                return
             except asyncio.CancelledError:
                 logger.error(
-                    f"Worker: {asyncio.current_task().get_name()} has been cancelled"
+                    "Worker: %s has been cancelled", asyncio.current_task().get_name()
                 )
                 return
 
     async def process(self):
         """
-        Process URLs from the queue and handle crawling logic.
+        Fetch stage, takes a URL from the queue and fetches it.
 
-        This method continuously processes URLs from the queue, handling various scenarios and exceptions:
+        This method processes a URL from the queue, handling various scenarios and exceptions:
         - Checks if URL has already been crawled
-        - Validates against robots.txt rules
-        - Handles rate limiting with exponential backoff
-        - Manages redirects
-        - Retries failed requests up to max_retries
+        - Validates against robots.txt rules, parking the URL while its host rules are fetched
+        - Waits for the host politeness budget before fetching
+        - Hands the fetched page over to the parse stage, waiting for room in its queue
+        - Handles rate limiting by scheduling a delayed retry, honoring Retry-After
+        - Skips URLs whose redirect chain loops or is too long
+        - Retries failed requests up to max_retries, with a jittered exponential backoff
         Returns:
             None
         Raises:
-            RateLimitException: When rate limit is hit, triggers backoff
-            RedirectException: When URL redirects to another location
+            RateLimitException: When rate limit is hit, pauses the host and schedules a retry
+            RedirectException: When the URL redirect chain loops or is too long
             NotFoundException: When page is not found (404)
             Exception: For other errors, will retry up to max_retries
         Queue Management:
-            Marks the task as done in the queue after processing.
+            Marks the task as done in the queue after processing, the store stage does it
+            for the fetched pages.
         """
 
         # Fetch URL from queue
         url_to_visit_container = await self.to_visit_queue.get()
-        url_to_visit = url_to_visit_container.base_url
-
-        logger.info(f"Visiting {url_to_visit_container.base_url}")
-        logger.debug(f"Queue size: {self.to_visit_queue.qsize()}")
+        url_to_visit = url_to_visit_container.url
+        self.tracer.dequeued(url_to_visit)
+
+        logger.info("Visiting %s", url_to_visit)
+        logger.debug("Queue size: %s", self.to_visit_queue.qsize())
+        # Parked and retried URLs come back to the queue, they are not done with yet
+        requeued = False
+        # Fetched pages are done with by the store stage
+        handed_off = False
         try:
             # Check if link has already been crawled
-            if self.storage_client.contains(url_to_visit):
-                logger.info(f"URL already visited: {url_to_visit} - skipping")
+            if url_to_visit not in self.recrawling and self.storage_client.contains(
+                url_to_visit
+            ):
+                logger.info("URL already visited: %s - skipping", url_to_visit)
                 return
             # Check if we can fetch the URL based on robots.txt
-            if self.robot_parser.can_fetch("*", url_to_visit):
-                unique_urls = await self.crawling(url_to_visit)
-                logger.debug(f"Unique urls found {len(unique_urls)}:\n {unique_urls}")
-                for url in unique_urls:
-                    await self.to_visit_queue.put(URLContainer(url))
+            robot_parser = self.robots_cache.get(url_to_visit)
+            if robot_parser is None:
+                self.robots_cache.park(url_to_visit, url_to_visit_container)
+                self.tracer.queued(url_to_visit)
+                requeued = True
+                return
+            if robot_parser.can_fetch("*", url_to_visit):
+                url_to_visit_container.tries += 1
+                self.in_flight.add(url_to_visit)
+                result = await self.throttled_crawling(url_to_visit)
+                # A stage not started handles the page inline, marking the URL as done or interrupted itself
+                handed_off = not self.parse_stage.running
+                await self.parse_stage.submit((url_to_visit_container, result))
+                handed_off = True
             else:
-                logging.info(f"Robots.txt prevents fetching {url_to_visit} - skipping")
-        except RateLimitException as _exc:
-            await self.handle_rate_limit(url_to_visit_container, self.backoff)
-            await self.to_visit_queue.put(url_to_visit_container)
+                logger.info("Robots.txt prevents fetching %s - skipping", url_to_visit)
+                self.metrics.robots_denied.inc()
+        except RateLimitException as exc:
+            self.handle_rate_limit(url_to_visit_container, exc.retry_after)
+            requeued = True
         except RedirectException as exc:
-            logger.info(f"{url_to_visit} Redirected to {exc.redirect_url}")
-            await self.to_visit_queue.put(URLContainer(exc.redirect_url))
+            logger.warning("%s - skipping %s", exc, url_to_visit)
+        except asyncio.CancelledError:
+            # Interrupted by a shutdown, the URL is saved with the ones left to crawl
+            if not handed_off:
+                self.interrupted.append(url_to_visit_container)
+            requeued = True
+            raise
         except NotFoundException as exc:
-            logger.info(f"{exc} - Page not found for {url_to_visit}")
+            logger.info("%s - Page not found for %s", exc, url_to_visit)
         except Exception as exc:
-            if url_to_visit_container.tries < self.max_retries:
+            if url_to_visit_container.tries <= self.max_retries:
+                delay = self.retry_scheduler.retry_delay(url_to_visit_container.tries)
                 logger.warning(
-                    f"Retrying {url_to_visit} - try {url_to_visit_container.tries}"
+                    "Retrying %s in %0.2f seconds - try %s",
+                    url_to_visit,
+                    delay,
+                    url_to_visit_container.tries,
                 )
-                await self.to_visit_queue.put(url_to_visit_container)
+                self.schedule_retry(url_to_visit_container, delay, reason="error")
+                requeued = True
             else:
                 logger.error(
-                    f"Error processing {url_to_visit}: {exc} and Max retries reached - skipping"
+                    "Error processing %s: %s and Max retries reached - skipping",
+                    url_to_visit,
+                    exc,
                 )
         finally:
+            if not handed_off:
+                self.in_flight.discard(url_to_visit)
+                self.to_visit_queue.task_done()
+                if not requeued:
+                    self.finish(url_to_visit_container)
+
+    def finish(self, url_container: URLContainer):
+        """
+        Called once a URL is done with, whether it was crawled or skipped, and will not come back to the queue.
+
+        Ends the URL trace and its revisit, subclasses hook into it to track the progress of the crawl.
+
+        Args:
+            url_container (URLContainer): The URL done with.
+        """
+        self.recrawling.discard(url_container.url)
+        self.tracer.finish(url_container.url)
+
+    async def parse_page(self, item: Tuple[URLContainer, FetchResult]):
+        """
+        Parse stage handler, extracts the links of a fetched page and hands them to the store stage.
+
+        Parsing runs in a worker thread, so a huge page does not block the event loop and
+        the fetches in flight.
+
+        Args:
+            item (tuple): The URL container and the fetch result of the page.
+        """
+        url_container, result = item
+        try:
+            start_time = time.perf_counter()
+            html_urls = await asyncio.to_thread(self.parse, result)
+            parse_seconds = time.perf_counter() - start_time
+            self.metrics.parse_seconds.observe(parse_seconds)
+            self.tracer.span(url_container.url, "parse", start_time)
+            await self.store_stage.submit(
+                (url_container, result, html_urls, parse_seconds)
+            )
+        except asyncio.CancelledError:
+            self.interrupted.append(url_container)
+            raise
+        except Exception as exc:
+            logger.error("Error parsing %s: %s - skipping", result.final_url, exc)
+            self.in_flight.discard(url_container.url)
             self.to_visit_queue.task_done()
+            self.finish(url_container)
+
+    async def store_page(
+        self, item: Tuple[URLContainer, FetchResult, Set | None, float]
+    ):
+        """
+        Store stage handler, stores a parsed page and queues the URLs discovered on it within the crawl budget.
+
+        The URL is marked as done once its links are queued, and its record handed over to
+        the stream if any, waiting for room in its buffer.
+
+        Args:
+            item (tuple): The URL container, the fetch result, the links of the page and its parse time.
+        """
+        url_container, result, html_urls, parse_seconds = item
+        try:
+            start_time = time.perf_counter()
+            unique_urls = self.store(result, html_urls) or set()
+            logger.debug("Unique urls found %s:\n %s", len(unique_urls), unique_urls)
+            for url in unique_urls:
+                await self.enqueue(
+                    URLContainer(
+                        url,
+                        depth=url_container.depth + 1,
+                        parent=url_container.url,
+                    )
+                )
+            self.tracer.span(url_container.url, "store", start_time)
+            if self._records is not None:
+                await self._records.put(
+                    PageRecord(
+                        url=url_container.url,
+                        final_url=result.final_url,
+                        status=result.status_code,
+                        links=list(html_urls or ()),
+                        depth=url_container.depth,
+                        timings={
+                            "fetch": result.elapsed,
+                            "parse": parse_seconds,
+                            "store": time.perf_counter() - start_time,
+                        },
+                    )
+                )
+        except asyncio.CancelledError:
+            self.interrupted.append(url_container)
+            raise
+        except Exception as exc:
+            logger.error("Error storing %s: %s - skipping", result.final_url, exc)
+        self.in_flight.discard(url_container.url)
+        self.to_visit_queue.task_done()
+        self.finish(url_container)
+
+    async def throttled_crawling(self, url: str) -> FetchResult:
+        """
+        Fetches a URL within the host politeness and concurrency budgets.
+
+        Takes a fetch slot from the adaptive concurrency controller, takes a token from the
+        host rate limiter (the frontier only hands out URLs of ready hosts, so this normally
+        does not wait), fetches the URL and reports the fetch latency and outcome back to
+        the controller so it can adjust the host concurrency.
+
+        Args:
+            url (str): The URL to fetch
+
+        Returns:
+            FetchResult: The fetched page, see `fetch`.
+        """
+        host = host_key(url)
+        wait_time = time.perf_counter()
+        async with self.concurrency_controller.slot(host):
+            # Abide by robots crawling policy, only when actually fetching
+            await self.rate_limiter.acquire(host)
+            start_time = time.perf_counter()
+            self.tracer.span(url, "politeness_wait", wait_time, start_time)
+            try:
+                with self.fetch_stage.serving():
+                    result = await self.fetch(url)
+            except RateLimitException:
+                self.concurrency_controller.record(
+                    host, time.perf_counter() - start_time, congested=True
+                )
+                raise
+            except NotFoundException:
+                self.concurrency_controller.record(
+                    host, time.perf_counter() - start_time
+                )
+                raise
+            except Exception:
+                self.concurrency_controller.record(
+                    host, time.perf_counter() - start_time, error=True
+                )
+                raise
+            self.concurrency_controller.record(host, time.perf_counter() - start_time)
+            self.retry_scheduler.reset_host(host)
+            return result
 
     async def crawling(self, url: str) -> Set:
         """
         Crawls a given URL and extracts unique links from its HTML content.
 
-        This asynchronous method performs web crawling by:
-        1. Fetching HTML content from the URL
-        2. Handling various HTTP status codes and exceptions
-        3. Extracting links from the HTML
-        4. Storing crawled URLs and their links
-        5. Deduplicating extracted URLs
+        Runs the fetch, parse and store steps of the pipeline in a row, see `fetch`, `parse`
+        and `store`. The crawl itself runs them as separate stages.
+
         Args:
             url (str): The URL to crawl
         Returns:
@@ -220,41 +812,132 @@ class WebCrawler:
                 Returns None if the HTML content is empty.
         Raises:
             NotFoundException: When the URL returns a 404 status code
-            RateLimitException: When the crawler is being rate limited (429)
-            RedirectException: When the URL redirects (301, 302)
+            RateLimitException: When the crawler is being rate limited (429, 503)
+            RedirectException: When the URL redirect chain loops or is too long
             GenericCrawlerException: For other HTTP errors not explicitly handled
         """
+        result = await self.fetch(url)
+        return self.store(result, self.parse(result))
 
-        logger.info(f"Crawling {url}")
+    async def fetch(self, url: str) -> FetchResult:
+        """
+        Fetches a URL, following its redirects, and records the redirect chain and the fetch history.
+
+        Redirect sources and pages not found are stored as visited without content.
 
-        # Get HTML content
+        Args:
+            url (str): The URL to fetch
+        Returns:
+            FetchResult: The final URL, its unparsed content and the redirect chain.
+        Raises:
+            NotFoundException: When the URL returns a 404 status code
+            RateLimitException: When the crawler is being rate limited (429, 503)
+            RedirectException: When the URL redirect chain loops or is too long
+            GenericCrawlerException: For other HTTP errors not explicitly handled
+        """
+
+        logger.info("Crawling %s", url)
+
+        start_time = time.perf_counter()
+        status = "error"
         try:
-            html_content = await self.network_client.query_html(url)
+            # Only traced URLs get the transport events, the call is unchanged otherwise
+            trace = self.tracer.http_trace(url)
+            result = await self.network_client.fetch(
+                url,
+                follow_redirect=self.follow_redirect,
+                parse=False,
+                **({"trace": trace} if trace is not None else {}),
+            )
+            status = str(result.status_code)
+        except RedirectException:
+            self.storage_client.add(url)
+            raise
         except httpx.HTTPStatusError as e:
+            status = str(e.response.status_code)
             if e.response.status_code == 404:
                 self.storage_client.add(url)
                 raise NotFoundException(f"Page not found for {url}")
-            elif e.response.status_code == 429:
-                raise RateLimitException(f"Rate limited for {url}")
-            elif e.response.status_code in (301, 302):
-                self.storage_client.add(url)
-                raise RedirectException(
-                    f"Redirected for {url}",
-                    redirect_url=str(e.response.next_request.url),
-                    status_code=e.response.status_code,
+            elif e.response.status_code in (429, 503):
+                raise RateLimitException(
+                    f"Rate limited for {url}",
+                    retry_after=parse_retry_after(
+                        e.response.headers.get("Retry-After")
+                    ),
                 )
             else:
                 raise GenericCrawlerException(f"Generic Crawler Error: {e}")
+        finally:
+            end_time = time.perf_counter()
+            self.metrics.fetch_seconds.labels(status).observe(end_time - start_time)
+            self.tracer.span(url, "fetch", start_time, end_time, status=status)
+        self.metrics.downloaded_bytes.inc(result.size)
+
+        # Record the redirect chain, sources are stored as visited without content
+        for source_url in result.redirects:
+            logger.info("%s Redirected to %s", source_url, result.final_url)
+            self.redirects[source_url] = result.final_url
+            self.storage_client.add(source_url)
+        if result.content_hash is not None:
+            self.storage_client.record_fetch(result.final_url, result.content_hash)
+        return result
+
+    def parse(self, result: FetchResult) -> Set | None:
+        """
+        Extracts the links of a fetched page, rewriting known redirect sources to their target.
 
+        Only reads the crawler state, so it can run outside of the event loop thread.
+
+        Args:
+            result (FetchResult): The fetched page.
+        Returns:
+            Set: The in-scope links of the page, the final URL alone if the redirect chain
+                ended on a URL that was not followed. None if the HTML content is empty.
+        """
+        # The chain ended on a URL we did not follow, it gets crawled on its own if in scope
+        if not result.followed:
+            if self.url_filter.filter_links(result.final_url) is None:
+                return set()
+            return {result.final_url}
+
+        html_content = result.html
+        if html_content is None and result.text:
+            # Imported on first use, it is not needed until the first page is fetched
+            from bs4 import BeautifulSoup
+
+            html_content = BeautifulSoup(result.text, "html.parser")
         # Handle empty HTML pages
         if not html_content:
-            self.storage_client.add(url)
             return None
 
         # Extract all links
         html_urls = HTMLParser().extract_links(
             self.url_filter.filter_links, html_content
         )
+        # Point links to known redirect sources straight to their target
+        if self.redirects:
+            html_urls = {self.redirects.get(link, link) for link in html_urls}
+        return html_urls
+
+    def store(self, result: FetchResult, html_urls: Set | None) -> Set:
+        """
+        Stores a parsed page with its links and returns the links not crawled yet.
+
+        Args:
+            result (FetchResult): The fetched page.
+            html_urls (Set | None): The links of the page, see `parse`.
+        Returns:
+            Set: A set of unique URLs found in the page that haven't been crawled yet.
+                Returns None if the HTML content is empty.
+        """
+        url = result.final_url
+        if not result.followed:
+            return URLDeDuplicator().dedup_url(
+                html_urls, set(self.storage_client.get_all_keys())
+            )
+        if html_urls is None:
+            self.storage_client.add(url)
+            return None
 
         # Save to storage all the links contained in the HTML
         self.storage_client.add(url, {"links": list(html_urls)})
@@ -263,25 +946,78 @@ class WebCrawler:
         unique_urls = URLDeDuplicator().dedup_url(
             html_urls, set(self.storage_client.get_all_keys())
         )
+        self.metrics.links_found.inc(len(html_urls))
+        self.metrics.links_duplicate.inc(len(html_urls) - len(unique_urls))
 
         return unique_urls
 
-    async def handle_rate_limit(self, url_container: URLContainer, backoff: int):
+    async def follow_redirect(self, source_url: str, target_url: str) -> bool:
         """
-        Handle rate limiting by implementing an exponential backoff strategy.
+        Decides whether a redirect is followed within the current fetch.
 
-        This method applies a delay when rate limiting is detected, using an exponential
-        backoff approach with some random jitter to prevent synchronized retries.
+        Only redirects to a not yet visited URL of the same host, allowed by the URL filter
+        and robots.txt, are followed. Each hop waits for the host rate limiter like any other
+        request. Other targets are returned to the crawl queue instead, so they go through
+        the politeness budget of their own host.
+
+        Args:
+            source_url (str): The URL that redirected.
+            target_url (str): The URL the response redirects to.
+
+        Returns:
+            bool: True if the redirect should be followed.
+        """
+        host = host_key(target_url)
+        robot_parser = self.robots_cache.get(target_url)
+        if (
+            host != host_key(source_url)
+            or robot_parser is None
+            or self.url_filter.filter_links(target_url) is None
+            or self.storage_client.contains(target_url)
+            or not robot_parser.can_fetch("*", target_url)
+        ):
+            return False
+        await self.rate_limiter.acquire(host)
+        return True
+
+    def handle_rate_limit(
+        self, url_container: URLContainer, retry_after: float | None = None
+    ):
+        """
+        Handle rate limiting without blocking the worker.
+
+        The host is paused for the `Retry-After` delay when the server sent one, or for a
+        jittered exponential backoff growing with its consecutive rate limits otherwise.
+        The URL is then handed over to the retry scheduler, to be retried after the host
+        pause and its own jittered exponential backoff, while the worker moves on.
 
         Args:
             url_container (URLContainer): Container holding URL information and retry attempts
-            backoff (int): Base backoff time in seconds
+            retry_after (float, optional): Delay in seconds requested by the server
 
         Returns:
             None
         """
-        back_pressure = (backoff + random.uniform(0, backoff)) * url_container.tries
-        logger.warning(
-            f"Rate limited - retrying {url_container.base_url} in {back_pressure} seconds"
-        )
-        await asyncio.sleep(back_pressure)
+        url = url_container.url
+        host = host_key(url)
+        host_delay = self.retry_scheduler.host_delay(host, retry_after)
+        self.rate_limiter.pause(host, host_delay)
+        delay = max(host_delay, self.retry_scheduler.retry_delay(url_container.tries))
+        logger.warning("Rate limited - retrying %s in %0.2f seconds", url, delay)
+        self.schedule_retry(url_container, delay, reason="rate_limit")
+
+    def schedule_retry(
+        self, url_container: URLContainer, delay: float, reason: str = "error"
+    ):
+        """
+        Hands a URL over to the retry scheduler, recording when it is due.
+
+        Args:
+            url_container (URLContainer): The URL to retry.
+            delay (float): Number of seconds to wait before queueing the URL again.
+            reason (str): Why the URL is retried, rate_limit or error, counted in the metrics.
+        """
+        self.metrics.retries.labels(reason).inc()
+        self.tracer.queued(url_container.url)
+        url_container.ready_at = time.monotonic() + delay
+        self.retry_scheduler.schedule(url_container, delay)